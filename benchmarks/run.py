@@ -0,0 +1,319 @@
+"""
+Headless rendering benchmarks, run with:
+
+    python benchmarks/run.py
+
+Every benchmark renders to a HeadlessBackend, so no terminal is needed. Frames per second, bytes sent per frame and the
+memory a frame allocates are reported for each. With --baseline, the run fails if any benchmark sends more bytes per
+frame than the baseline did, and, if --tolerance is given, if any is slower than the baseline by more than that. The
+baseline's fps were measured on whichever machine saved it, so only compare them against a baseline saved (with
+--save-baseline) on the same machine. Bytes don't depend on the machine, but they can depend on --frames: the labels
+benchmarks change a different label each frame, and moving the cursor further along costs more bytes, so their average
+depends on which labels a run gets to. They are compared exactly when the baseline ran the same number of frames, and
+within --bytes-tolerance when it didn't. --save-baseline records this run as the baseline.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pywinterm.display import RootDisplay, Display, widget, style  # noqa: E402
+from pywinterm.display.backend import HeadlessBackend  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SIZES = ((80, 24), (200, 60))
+
+COLOURS = (
+    style.foreground.RED,
+    style.foreground.GREEN,
+    style.foreground.BLUE,
+    style.foreground.CYAN,
+    style.foreground.MAGENTA,
+    style.foreground.YELLOW,
+)
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The function sets up a RootDisplay and returns it with a function which changes something
+    and renders one frame.
+    :param name: String
+    :return: function, decorator
+    """
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+def _root(width, height):
+    return RootDisplay("benchmark", backend=HeadlessBackend(width, height), width=width, height=height, max_fps=None)
+
+
+def _filled(width, height, middle=None):
+    root = _root(width, height)
+    for y in range(height):
+        if middle is not None and y == height // 2:
+            root.print(middle)
+        else:
+            root.print(("row %d " % y) * (width // 6))
+    return root
+
+
+for _width, _height in SIZES:
+    @benchmark('flatten/full/%dx%d' % (_width, _height))
+    def flatten_full(width=_width, height=_height):
+        root = _filled(width, height)
+
+        def frame(i):
+            root.invalidate_all()
+            root.flatten()
+        return root, frame
+
+    @benchmark('render/full/%dx%d' % (_width, _height))
+    def render_full(width=_width, height=_height):
+        root = _filled(width, height)
+
+        def frame(i):
+            root.invalidate_all()
+            root.render(full=True)
+        return root, frame
+
+    @benchmark('render/one-label/%dx%d' % (_width, _height))
+    def render_one_label(width=_width, height=_height):
+        label = widget.Label("0")
+        root = _filled(width, height, label)
+
+        def frame(i):
+            label.text = "%06d" % i  # always the same width, so only the digits which change are sent
+            root.render()
+        return root, frame
+
+    @benchmark('render/unchanged/%dx%d' % (_width, _height))
+    def render_unchanged(width=_width, height=_height):
+        root = _filled(width, height)
+
+        def frame(i):
+            root.render()
+        return root, frame
+
+
+for _depth in (1, 8, 32):
+    @benchmark('render/nested/depth-%d' % _depth)
+    def render_nested(depth=_depth):
+        root = _filled(80, 24)
+        parent = root
+        for d in range(depth):
+            child = Display(width=max(1, parent.width - 2), height=max(1, parent.height // 2 or 1), x=1, y=0)
+            parent.add_display(child)
+            parent = child
+
+        leaf = widget.Label("leaf")
+        parent.print(leaf)
+
+        def frame(i):
+            leaf.text = "leaf %06d" % i
+            root.render()
+        return root, frame
+
+
+for _count in (10, 100, 1000):
+    @benchmark('render/labels-%d' % _count)
+    def render_labels(count=_count):
+        root = _root(200, 60)
+        labels = [widget.Label("l%-3d" % (n % 1000)) for n in range(count)]
+        per_row = 40
+        for start in range(0, count, per_row):
+            root.print(widget.Row(labels[start:start + per_row]))
+
+        def frame(i):
+            labels[i % count].text = "x%-3d" % (i % 1000)
+            root.render()
+        return root, frame
+
+
+for _density in (0, 50, 100):
+    @benchmark('render/styles-%d%%' % _density)
+    def render_styles(density=_density):
+        root = _root(80, 24)
+        rows = []
+        for y in range(24):
+            cells = []
+            for x in range(80):
+                if (x * 7 + y * 13) % 100 < density:
+                    cells.append(widget.Label("#", style.Style(fore=COLOURS[(x + y) % len(COLOURS)])))
+                else:
+                    cells.append(widget.Label("."))
+            rows.append(widget.Row(cells))
+        root.print(*rows)
+
+        def frame(i):
+            # shift every style along, so every styled cell changes
+            for row in rows:
+                for cell in row.widgets:
+                    if cell.text == "#":
+                        cell.style = style.Style(fore=COLOURS[(COLOURS.index(cell.style.fore) + 1) % len(COLOURS)])
+            root.render()
+        return root, frame
+
+
+@benchmark('widget/text-input')
+def text_input():
+    root = _root(80, 24)
+    field = widget.TextInput(60)
+    field.text = "ab" * 50  # already scrolling, so every key moves the whole field along, changing every cell
+    root.print(widget.Row((widget.Label("name: "), field)))
+
+    def frame(i):
+        field.text = field.text[-100:] + "ab"[i % 2]
+        root.render()
+    return root, frame
+
+
+@benchmark('widget/row-cells')
+def row_cells():
+    labels = [widget.Label("cell%d" % n) for n in range(50)]
+    row = widget.Row(labels)
+
+    def frame(i):
+        labels[i % 50].text = "c%06d" % i
+        row.cells()
+        len(row)
+    return None, frame
+
+
+def run(name, setup, frames):
+    """
+    Runs a benchmark
+    :param name: String
+    :param setup: function
+    :param frames: int, how many frames to time
+    :return: dict
+    """
+    root, frame = setup()
+    frame(0)  # warm up caches, and send the first full frame
+    bytes_before = root.renderer.bytes_written if root is not None else 0
+
+    start = time.perf_counter()
+    for i in range(1, frames + 1):
+        frame(i)
+    elapsed = time.perf_counter() - start
+
+    bytes_sent = (root.renderer.bytes_written - bytes_before) if root is not None else 0
+
+    # again, with allocations traced, as tracing slows everything down
+    frames_traced = max(1, frames // 10)
+    allocated = 0
+    tracemalloc.start()
+    for i in range(frames + 1, frames + 1 + frames_traced):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        frame(i)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    # allocated is the most memory in use at once during each frame, on top of what was already in use before it
+    return {
+        'frames': frames,
+        'fps': frames / elapsed if elapsed else float('inf'),
+        'bytes_per_frame': bytes_sent / frames,
+        'allocated_per_frame': allocated / frames_traced,
+    }
+
+
+def compare(name, result, baseline, tolerance, bytes_tolerance=0.05):
+    """
+    Checks a result against the baseline
+    :param name: String
+    :param result: dict, from run()
+    :param baseline: dict, name: result
+    :param tolerance: float/None, the fraction of the baseline's fps a benchmark can lose, None not to compare fps
+    :param bytes_tolerance: float, the fraction of the baseline's bytes per frame a benchmark can gain, when the
+    baseline ran a different number of frames
+    :return: list<String>, what has regressed
+    """
+    if name not in baseline:
+        return []
+
+    expected = baseline[name]
+    problems = []
+    if tolerance is not None and result['fps'] < expected['fps'] * (1 - tolerance):
+        problems.append('%s: %.1f fps, baseline %.1f' % (name, result['fps'], expected['fps']))
+
+    allowed = expected['bytes_per_frame']
+    if expected.get('frames') == result['frames']:
+        allowed += 1e-6  # the same frames send the same bytes
+    else:
+        allowed *= 1 + bytes_tolerance
+
+    if result['bytes_per_frame'] > allowed:
+        problems.append('%s: %.3f bytes per frame, baseline %.3f' % (
+            name,
+            result['bytes_per_frame'],
+            expected['bytes_per_frame']
+        ))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pywinterm's rendering, without a terminal")
+    parser.add_argument('--frames', type=int, default=200, help="frames to time for each benchmark")
+    parser.add_argument('--filter', default='', help="only run benchmarks with this in their name")
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, help="fail on regressions from this file")
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="save the results to this file")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help="how much slower than the baseline is allowed, fps aren't compared without it")
+    parser.add_argument('--bytes-tolerance', type=float, default=0.05,
+                        help="how many more bytes per frame than a baseline of a different length is allowed")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    problems = []
+
+    if not args.json:
+        print('%-28s %12s %14s %14s' % ('benchmark', 'fps', 'bytes/frame', 'alloc/frame'))
+
+    for name, setup in BENCHMARKS:
+        if args.filter not in name:
+            continue
+
+        result = results[name] = run(name, setup, args.frames)
+        problems.extend(compare(name, result, baseline, args.tolerance, args.bytes_tolerance))
+
+        if not args.json:
+            print('%-28s %12.1f %14.1f %14.1f' % (
+                name,
+                result['fps'],
+                result['bytes_per_frame'],
+                result['allocated_per_frame']
+            ))
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    for problem in problems:
+        print('REGRESSION ' + problem, file=sys.stderr)
+
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,16 +5,16 @@ import os
 import sys
 import platform
 
-if platform.system() != 'Windows':  # this module supports windows only for the time being
-    raise OSError("This operation is not currently supported. Please only use this library on Windows machines.")
-
 
 def pause():
     """
     Does a pause
     :return: None
     """
-    os.system("pause")
+    if platform.system() == 'Windows':
+        os.system("pause")
+    else:
+        input("Press Enter to continue . . . ")
 
 
 def exit(status=0):
@@ -1,10 +1,20 @@
 """
 Screen utilities
 """
-from pywinterm.display import util, style, widget
+from pywinterm.display import (
+    util, style, widget, renderer, buffer, scheduler, layout, compositor, scrollback, lineindex, stats, recording, server,
+    pipeline, focus
+)
 from pywinterm.display.exceptions import *
 from pywinterm.display.style import foreground, background
-import platform
+import os
+import stat
+import time
+import codecs
+import asyncio
+import selectors
+import threading
+import collections
 
 
 def Label(text, fore_colour=None, back_colour=None, text_alignment=0):
@@ -20,11 +30,52 @@ def Label(text, fore_colour=None, back_colour=None, text_alignment=0):
     )
 
 
+def _geometry_property(name, resizes, axis=None):
+    """
+    Creates a property which invalidates the Display when it is changed
+    :param name: String, the attribute the value is kept in
+    :param resizes: Bool, whether changing it changes the Display's own rasterization, rather than just where it goes
+    :param axis: int/None, layout.HORIZONTAL or layout.VERTICAL if it is the Display's size along that axis, which
+    the parent is told about
+    :return: property
+    """
+    def getter(self):
+        return getattr(self, name)
+
+    def setter(self, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            if resizes:
+                self.invalidate()
+            elif self.parent is not None:
+                self.parent._child_changed()
+
+            if axis is not None and self.parent is not None:
+                self.parent._child_resized(self, axis)
+
+    return property(getter, setter)
+
+
 class Display:
     """
     Represents a Window object. Stuff can be drawn on to the window using it's functions.
+
+    Each Display keeps its rasterized text (and that of its children) from the last frame, and only rasterizes it
+    again once it has been invalidated. print(), clear(), add_display(), moving or resizing it and changes to its
+    widgets all invalidate it; if you change text or children directly, call invalidate() yourself.
+
+    Everything is clipped to the Display it is in. Children with a higher z are drawn over those with a lower one
+    (and those with the same z in the order they were added). An opaque Display hides everything underneath it, and
+    anything it hides completely isn't rasterized at all.
     """
-    def __init__(self, parent=None, width=100, height=30, x=0, y=0, children=()):
+    x = _geometry_property('_x', False)
+    y = _geometry_property('_y', False)
+    z = _geometry_property('_z', False)
+    width = _geometry_property('_width', True, layout.HORIZONTAL)
+    height = _geometry_property('_height', True, layout.VERTICAL)
+    opaque = _geometry_property('_opaque', True)
+
+    def __init__(self, parent=None, width=100, height=30, x=0, y=0, children=(), z=0, opaque=False):
         """
         Initialise a Display
         :param parent: Display, the parent of this Display
@@ -33,16 +84,57 @@ class Display:
         :param x: int, characters to the right of the Parent Display to position this Display
         :param y: int, characters below the top of the Parent Display to position this Display
         :param children: tuple, Child Displays
+        :param z: int, Displays with a higher z are drawn over their siblings with a lower one
+        :param opaque: Bool, whether to fill in our background, hiding whatever is underneath us
         """
-        self.width = width
-        self.height = height
-        self.x = x
-        self.y = y
+        self._width = width
+        self._height = height
+        self._x = x
+        self._y = y
+        self._z = z
+        self._opaque = opaque
         self.children = list(children)
         self.text = []
 
         self.parent = parent
 
+        self._dirty = True  # whether our own text needs rasterizing again
+        self._stale = True  # whether we, or any of our children, have changed since the last rasterize()
+        self._text_runs = []
+        self._runs = []
+        self._encoded = {}  # String: tuple<array<int>, array<int>>, our plain text lines, encoded and clipped last time
+        self._encoded_width = None  # the width they were clipped to
+        self._placements = {}  # Display: tuple, where each child was last time, see rasterize()
+        self._damage = []  # list<tuple<int, int, int, int>>, what the last rasterize() changed, as rects in us
+
+        for child in self.children:
+            child.parent = self
+
+    def invalidate(self):
+        """
+        Marks our text as changed, so that it is rasterized again in the next frame
+        :return: None
+        """
+        self._dirty = True
+        self._child_changed()
+
+    def _child_changed(self):
+        """
+        Marks us as needing to be put back together from our children in the next frame
+        :return: None
+        """
+        self._stale = True
+        if self.parent is not None:
+            self.parent._child_changed()
+
+    def _child_resized(self, disp, axis):
+        """
+        Called when a child's width or height is set, for layouts which depend on it
+        :param disp: Display, the child
+        :param axis: int, layout.HORIZONTAL or layout.VERTICAL
+        :return: None
+        """
+
     def add_display(self, disp):
         """
         Adds a label or display as a child
@@ -56,6 +148,9 @@ class Display:
             raise DisplaySizeError("Display is too tall to fit here")
 
         self.children.append(disp)
+        disp.parent = self
+
+        self._child_changed()
 
     def print(self, *args):
         """
@@ -65,14 +160,26 @@ class Display:
         if args is not None:
             self.text.extend(args)
 
+            for line in args:
+                if isinstance(line, widget.Widget):
+                    line.add_owner(self)
+
+            self.invalidate()
+
     def clear(self):
         """
         Clears the text and the children
         :return: None
         """
+        for line in self.text:
+            if isinstance(line, widget.Widget):
+                line.remove_owner(self)
+
         self.text.clear()
         self.children.clear()
 
+        self.invalidate()
+
     def centre_on_parent(self):
         """
         Centres this on the parent as much as is possible using integer division
@@ -81,15 +188,705 @@ class Display:
         self.x = (self.parent.width // 2) - (self.width // 2)
         self.y = (self.parent.height // 2) - (self.height // 2)
 
+    def measure(self):
+        """
+        :return: tuple<int, int>, the (width, height) we would like to have, for when a layout is sizing us by our
+        contents
+        """
+        return self._width, self._height
+
+    def arrange(self):
+        """
+        Positions and sizes our children, override this to lay them out automatically
+        :return: None
+        """
+
+    def layout(self):
+        """
+        Brings the layout of everything which has changed since the last frame up to date, leaving the rest alone
+        :return: None
+        """
+        if self._stale:
+            self.arrange()
+            for child in self.children:
+                child.layout()
+
+    def _set_geometry(self, x, y, width, height):
+        """
+        Moves and resizes us for our parent's layout, without telling our parent, which is being rebuilt anyway
+        :param x: int
+        :param y: int
+        :param width: int
+        :param height: int
+        :return: None
+        """
+        if width != self._width or height != self._height:
+            self._width = width
+            self._height = height
+            self._dirty = True
+            self._stale = True
+
+        self._x = x
+        self._y = y
+
+    def invalidate_all(self):
+        """
+        Invalidates us and all of our children, and their children etc.
+        :return: None
+        """
+        self._dirty = True
+        self._stale = True
+        for child in self.children:
+            child.invalidate_all()
+
+        if self.parent is not None:
+            self.parent._child_changed()
+
+    def visible_lines(self):
+        """
+        :return: list<String/Widget>, the lines of text which fit in us, top first
+        """
+        return self.text[:self._height]
+
+    def rasterize_text(self):
+        """
+        Converts our own text (not our children) in to runs of cells
+        :return: list<tuple<int, int, array<int>, array<int>>>, (x, y, codepoints, style ids) relative to us
+        """
+        runs = []
+        encoded = {}
+        previously_encoded = self._encoded if self._encoded_width == self._width else {}
+
+        for l, line in enumerate(self.visible_lines()):
+            if isinstance(line, widget.Widget):
+                chars, styles = line.cells()  # one call per widget, cached until the widget changes
+            else:
+                text = str(line)
+                cells = previously_encoded.get(text)  # lines which haven't changed aren't encoded or clipped again
+                if cells is None:
+                    chars = buffer.encode(text)
+                    run = compositor.clip_run(
+                        (0, 0, chars, buffer.style_run(buffer.DEFAULT_STYLE, len(chars))),
+                        self._width,
+                        1
+                    )
+                    cells = run[2:] if run is not None else ((), ())
+                encoded[text] = cells
+                chars, styles = cells
+
+            if not chars:
+                continue
+
+            # decide on how many spaces to leave before the text (to handle alignment)
+            indent = 0
+            if isinstance(line, widget.Widget):
+                # if line.alignment == 0:
+                # left alignment
+                if line.alignment == style.alignment.CENTRE:
+                    # centre alignment
+                    indent = (self.width // 2) - (len(chars) // 2)
+                elif line.alignment == style.alignment.RIGHT:
+                    # right alignment
+                    indent = self.width - len(chars)
+
+            run = compositor.clip_run((indent, l, chars, styles), self._width, self._height)
+            if run is not None:
+                runs.append(run)
+
+        self._encoded = encoded
+        self._encoded_width = self._width
+
+        if self._opaque:
+            runs = self._fill(runs)
+
+        return runs
+
+    def _fill(self, runs):
+        """
+        Fills in the background around our text, so that we hide what's underneath us
+        :param runs: list<tuple<int, int, array<int>, array<int>>>, our clipped text
+        :return: list<tuple<int, int, array<int>, array<int>>>, a run for every row
+        """
+        width = self._width
+        if width <= 0:
+            return []
+
+        rows = []
+        for y in range(self._height):
+            rows.append((0, y, buffer.encode(' ' * width), buffer.style_run(buffer.DEFAULT_STYLE, width)))
+
+        for x, y, chars, styles in runs:
+            row = rows[y]
+            row[2][x:x + len(chars)] = chars
+            row[3][x:x + len(chars)] = styles
+
+        return rows
+
+    def rasterize(self):
+        """
+        Gets the runs of cells for us and our children, only rasterizing what has changed since last time. What looks
+        different since last time is left in _damage, as rects relative to us.
+        :return: list<tuple<int, int, array<int>, array<int>>>, (x, y, codepoints, style ids) relative to us
+        """
+        if not self._stale:
+            self._damage = []
+            return self._runs
+
+        self._stale = False  # cleared first, so changes made while we work are picked up next time
+
+        width = self._width
+        height = self._height
+        damage = []
+
+        if self._dirty:
+            self._dirty = False
+            text_runs = self.rasterize_text()
+            damage.extend(compositor.changed_rows(self._text_runs, text_runs, width))
+            self._text_runs = text_runs
+
+        # children which have moved, been resized, restacked, added or removed change both where they were and where
+        # they are now
+        moved = ()  # the children whose placement has changed, a set if any have
+        for i, child in enumerate(self.children):
+            placement = (child._x, child._y, child._width, child._height, child._z, child._opaque, i)
+            previous = self._placements.get(child)
+            if previous != placement:
+                if not moved:
+                    moved = set()
+                moved.add(child)
+                if previous is not None:
+                    damage.append(previous[:4])
+                damage.append(placement[:4])
+
+        if moved or len(self._placements) != len(self.children):
+            placements = {
+                child: (child._x, child._y, child._width, child._height, child._z, child._opaque, i)
+                for i, child in enumerate(self.children)
+            }
+            for child, previous in self._placements.items():
+                if child not in placements:
+                    damage.append(previous[:4])
+            self._placements = placements
+
+        # go from the top down, so that anything underneath an opaque child can be left out
+        above = []  # the rects of the opaque children above the one we're on
+        layers = []
+        for child in sorted(reversed(self.children), key=lambda c: c._z, reverse=True):  # later ones first on a tie
+            x = child._x
+            y = child._y
+            rect = (x, y, child._width, child._height)
+
+            if above and compositor.covered(rect, above):
+                continue  # hidden, so not even rasterized
+
+            layer = []
+            for run in child.rasterize():
+                run = compositor.clip_run((run[0] + x, run[1] + y, run[2], run[3]), width, height)
+                if run is None:
+                    continue
+                if above:
+                    layer.extend(compositor.cut_run(run, above))
+                else:
+                    layer.append(run)
+
+            if child._damage and child not in moved:  # otherwise all of it has been damaged already
+                damage.extend([(dx + x, dy + y, dw, dh) for dx, dy, dw, dh in child._damage])
+
+            layers.append(layer)
+            if child._opaque:
+                above.append(rect)
+
+        runs = []
+        for run in self._text_runs:
+            if above:
+                runs.extend(compositor.cut_run(run, above))
+            else:
+                runs.append(run)
+
+        for layer in reversed(layers):
+            runs.extend(layer)
+
+        self._runs = runs
+        self._damage = damage
+
+        return runs
+
     def __repr__(self):
         return '<Display x: %r, y: %r, height: %r, width: %r>' % (self.x, self.y, self.height, self.width)
 
 
+class ScrollDisplay(Display):
+    """
+    A Display which keeps the last `capacity` lines printed to it, and shows a screenful of them at a time. Only the
+    lines which are showing are rasterized, so it can be printed to forever, e.g. as a log.
+
+    While following (the default) it scrolls to keep the newest lines showing. Scrolling up stops following, and
+    scrolling back to the end starts it again.
+    """
+    def __init__(self, parent=None, width=100, height=30, x=0, y=0, children=(), capacity=1000, *args, **kwargs):
+        """
+        Initialise a ScrollDisplay
+        :param capacity: int, the most lines to keep, the oldest are forgotten to make room for new ones
+        """
+        super(ScrollDisplay, self).__init__(parent, width, height, x, y, children, *args, **kwargs)
+
+        self.text = scrollback.Scrollback(capacity)
+        self.follow = True
+        self._top = 0
+        self._dropped_seen = 0  # text.dropped when we last adjusted the viewport for it
+
+    @property
+    def top(self):
+        """
+        :return: int, the index in text of the line at the top of the viewport
+        """
+        if self.follow:
+            return self.max_top
+        return min(self._top, self.max_top)
+
+    @property
+    def max_top(self):
+        """
+        :return: int, the top of the viewport when it is scrolled all the way down
+        """
+        return max(0, len(self.text) - self._height)
+
+    def print(self, *args):
+        for line in self.text.extend(args):
+            if isinstance(line, widget.Widget):
+                line.remove_owner(self)
+
+        for line in args:
+            if isinstance(line, widget.Widget):
+                line.add_owner(self)
+
+        if not self.follow:
+            # keep the same lines in view, even though the ones above them have been forgotten
+            self._top = max(0, self._top - (self.text.dropped - self._dropped_seen))
+        self._dropped_seen = self.text.dropped
+
+        self.invalidate()
+
+    def scroll_to(self, top):
+        """
+        Moves the viewport
+        :param top: int, the index in text of the line to show at the top
+        :return: None
+        """
+        top = min(max(0, top), self.max_top)
+        follow = top == self.max_top
+
+        if top != self.top or follow != self.follow:
+            self._top = top
+            self.follow = follow
+            self.invalidate()
+
+    def scroll_by(self, lines):
+        """
+        Moves the viewport up (negative) or down (positive)
+        :param lines: int
+        :return: None
+        """
+        self.scroll_to(self.top + lines)
+
+    def scroll_to_end(self):
+        """
+        Scrolls all the way down and starts following new lines
+        :return: None
+        """
+        self.scroll_to(self.max_top)
+
+    def page_up(self):
+        """
+        Scrolls up by a screenful
+        :return: None
+        """
+        self.scroll_by(-self._height)
+
+    def page_down(self):
+        """
+        Scrolls down by a screenful
+        :return: None
+        """
+        self.scroll_by(self._height)
+
+    def visible_lines(self):
+        top = self.top
+        return self.text.lines(top, top + self._height)
+
+    def __repr__(self):
+        return '<ScrollDisplay x: %r, y: %r, height: %r, width: %r, top: %r, lines: %r>' % (
+            self.x,
+            self.y,
+            self.height,
+            self.width,
+            self.top,
+            len(self.text)
+        )
+
+
+class TailDisplay(ScrollDisplay):
+    """
+    A ScrollDisplay which shows the lines of a file, or of any iterator, as they arrive.
+
+    A file is memory mapped and indexed rather than read, so it can be as big as you like: paging through it only
+    ever reads the lines which are showing. If it is truncated, or rotated (moved away and a new file started in its
+    place), it is shown again from the start. Anything else is consumed in a background thread, keeping the last
+    `capacity` lines. Call close() when finished with it.
+
+    A pipe or socket (anything with a file descriptor which isn't a regular file) is read from its file descriptor,
+    so that close() can stop it while it waits for more. Any other iterator can't be woken up, so close() leaves it
+    to stop when it next gives a line.
+    """
+    def __init__(self, source, parent=None, width=100, height=30, x=0, y=0, children=(), capacity=1000,
+                 poll_interval=0.25, encoding='utf-8', *args, **kwargs):
+        """
+        Initialise a TailDisplay
+        :param source: String/PathLike/iterable, a file to tail, or an iterator (e.g. a generator) of lines
+        :param capacity: int, the most lines to keep from an iterator
+        :param poll_interval: float, seconds between checks for a file having grown
+        :param encoding: String, what the file, or a pipe without an encoding of its own, is written in
+        """
+        super(TailDisplay, self).__init__(parent, width, height, x, y, children, capacity, *args, **kwargs)
+
+        self.source = source
+        self.poll_interval = poll_interval
+
+        self.encoding = encoding
+        self._stop_event = threading.Event()
+        self._wake_r = self._wake_w = None  # a pipe to ourselves, so close() can wake up a wait for the source
+
+        if isinstance(source, (str, bytes, os.PathLike)):
+            self.text = lineindex.LineIndex(source, encoding)
+            target = self._watch_file
+        elif self._source_fd() is not None:
+            self._wake_r, self._wake_w = os.pipe()
+            target = self._consume_fd
+        else:
+            target = self._consume
+
+        self._watcher = threading.Thread(target=target, daemon=True)
+        self._watcher.start()
+
+    def poll(self):
+        """
+        Picks up anything which has been added to the file, without waiting for the next poll_interval
+        :return: Bool, whether anything changed
+        """
+        if isinstance(self.text, lineindex.LineIndex) and self.text.refresh():
+            self.invalidate()
+            return True
+        return False
+
+    def _watch_file(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll()
+
+    def _consume(self):
+        for line in self.source:
+            if self._stop_event.is_set():
+                return
+
+            if isinstance(line, str):
+                line = line.rstrip('\r\n')
+            self.print(line)
+
+    def _source_fd(self):
+        """
+        :return: int/None, the file descriptor of the source, if it has one which can be waited on
+        """
+        if os.name != 'posix':
+            return None
+
+        try:
+            fd = self.source.fileno()
+        except (AttributeError, OSError, ValueError):  # io.UnsupportedOperation is both of the last two
+            return None
+
+        if stat.S_ISREG(os.fstat(fd).st_mode):  # never has to be waited for, and can't be selected by every selector
+            return None
+        return fd
+
+    def _consume_fd(self):
+        fd = self._source_fd()
+        decoder = codecs.getincrementaldecoder(getattr(self.source, 'encoding', None) or self.encoding)('replace')
+        partial = ''
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            selector.register(self._wake_r, selectors.EVENT_READ)
+
+            while True:
+                selector.select()
+                if self._stop_event.is_set():
+                    return
+
+                data = os.read(fd, 65536)
+                lines = (partial + decoder.decode(data, not data)).split('\n')
+                partial = lines.pop()  # the start of a line which hasn't finished arriving yet
+                if not data and partial:
+                    lines.append(partial)
+
+                if lines:
+                    self.print(*[line.rstrip('\r') for line in lines])
+                if not data:
+                    return
+
+    def print(self, *args):
+        if isinstance(self.text, lineindex.LineIndex):
+            raise DisplayError("A TailDisplay of a file can only show the file")
+        super(TailDisplay, self).print(*args)
+
+    def clear(self):
+        if isinstance(self.text, lineindex.LineIndex):
+            raise DisplayError("A TailDisplay of a file can only show the file")
+        super(TailDisplay, self).clear()
+
+    def close(self):
+        """
+        Stops following the source, and releases the file
+        :return: None
+        """
+        self._stop_event.set()
+        if isinstance(self.text, lineindex.LineIndex):
+            self._watcher.join()
+            self.text.close()
+        elif self._wake_w is not None:
+            os.write(self._wake_w, b'x')
+            self._watcher.join()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+
+    def __repr__(self):
+        return '<TailDisplay source: %r, top: %r, lines: %r>' % (self.source, self.top, len(self.text))
+
+
+def _layout_property(name):
+    """
+    Creates a property which lays out a Box again when it is changed
+    :param name: String, the attribute the value is kept in
+    :return: property
+    """
+    def getter(self):
+        return getattr(self, name)
+
+    def setter(self, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self._layout_changed()
+
+    return property(getter, setter)
+
+
+class Box(Display):
+    """
+    A Display which lays its children out one after the other, in a row or a column.
+
+    Each child has a Size along the Box (and across it, unless align is STRETCH): a fixed number of cells, a percentage
+    of the space inside the Box or a flexible share of what's left over; see the layout module. A child Box with no
+    Size of its own is sized to fit its contents. Layouts are only worked out again when the Box is resized or
+    something which decides them changes, and only for the Boxes affected.
+    """
+    direction = _layout_property('_direction')
+    padding = _layout_property('_padding')
+    gap = _layout_property('_gap')
+    align = _layout_property('_align')
+
+    def __init__(self, parent=None, width=100, height=30, x=0, y=0, children=(), direction=layout.VERTICAL,
+                 padding=0, gap=0, align=layout.STRETCH):
+        """
+        Initialise a Box
+        :param direction: int, layout.HORIZONTAL or layout.VERTICAL
+        :param padding: int/tuple, see layout.as_padding
+        :param gap: int, cells between each child
+        :param align: int, where children go across the Box, layout.START, CENTRE, END or STRETCH
+        """
+        self._direction = direction
+        self._padding = padding
+        self._gap = gap
+        self._align = align
+
+        self._sizes = {}  # child: (width Size/None, height Size/None)
+        self._requested = {}  # child: (width, height), as given to add_display() or set_size()
+        self._layout_version = 0
+        self._arranged = None  # (width, height, layout version) the children were last arranged for
+        self._measured = None
+
+        super(Box, self).__init__(parent, width, height, x, y, ())
+
+        for child in children:
+            self.add_display(child)
+
+    def add_display(self, disp, width=None, height=None):
+        """
+        Adds a display as the last child
+        :param disp: Display
+        :param width: Size/int/None, defaults to the Display's width, or its contents for a Box
+        :param height: Size/int/None, defaults to the Display's height, or its contents for a Box
+        :return: None
+        """
+        self.children.append(disp)
+        disp.parent = self
+        self._sizes[disp] = self._default_sizes(disp, width, height)
+        self._requested[disp] = (width, height)
+
+        self._layout_changed()
+
+    def set_size(self, disp, width=None, height=None):
+        """
+        Changes how big a child should be
+        :param disp: Display, one of our children
+        :param width: Size/int/None
+        :param height: Size/int/None
+        :return: None
+        """
+        self._requested[disp] = (width, height)
+        sizes = self._default_sizes(disp, width, height)
+        if self._sizes[disp] != sizes:
+            self._sizes[disp] = sizes
+            self._layout_changed()
+
+    def _child_resized(self, disp, axis):
+        """
+        A child which was sized from its own width or height keeps the new one. Any other is laid out again, back to
+        the size the layout gives it.
+        :param disp: Display, the child
+        :param axis: int, layout.HORIZONTAL or layout.VERTICAL
+        :return: None
+        """
+        if disp not in self._sizes:
+            return
+
+        if self._requested[disp][axis] is None and not isinstance(disp, Box):
+            sizes = list(self._sizes[disp])
+            sizes[axis] = layout.as_size(disp.width if axis == layout.HORIZONTAL else disp.height)
+            self._sizes[disp] = tuple(sizes)
+
+        self._layout_changed()
+
+    def clear(self):
+        self._sizes.clear()
+        self._requested.clear()
+        super(Box, self).clear()
+        self._layout_changed()
+
+    @staticmethod
+    def _default_sizes(disp, width, height):
+        if isinstance(disp, Box):  # left as None, so that it is measured
+            return layout.as_size(width), layout.as_size(height)
+
+        return (
+            layout.as_size(disp.width if width is None else width),
+            layout.as_size(disp.height if height is None else height)
+        )
+
+    def _layout_changed(self):
+        """
+        Marks our layout, and our measurement, as needing to be worked out again
+        :return: None
+        """
+        self._layout_version += 1
+        self._measured = None
+        self._child_changed()
+
+        parent = self.parent
+        if isinstance(parent, Box) and None in parent._sizes.get(self, ()):
+            parent._layout_changed()  # it measures us, so our measurement changing changes its layout
+
+    def _child_sizes(self, axis):
+        """
+        :param axis: int, layout.HORIZONTAL or layout.VERTICAL
+        :return: list<Size>, the sizes of the children along the axis, with those which are measured filled in
+        """
+        sizes = []
+        for child in self.children:
+            size = self._sizes[child][axis]
+            if size is None:
+                size = layout.fixed(child.measure()[axis])
+            sizes.append(size)
+
+        return sizes
+
+    def measure(self):
+        """
+        :return: tuple<int, int>, the (width, height) which fits our fixed size children (and padding), the rest get
+        what's left of whatever size we are given
+        """
+        if self._measured is None:
+            top, right, bottom, left = layout.as_padding(self._padding)
+            main = self._direction
+            lengths = [[], []]
+
+            for axis in (layout.HORIZONTAL, layout.VERTICAL):
+                for size in self._child_sizes(axis):
+                    lengths[axis].append(size.value if size.kind == layout.FIXED else 0)
+
+            along = sum(lengths[main]) + self._gap * max(0, len(self.children) - 1)
+            across = max(lengths[1 - main] or [0])
+
+            if main == layout.HORIZONTAL:
+                self._measured = (along + left + right, across + top + bottom)
+            else:
+                self._measured = (across + left + right, along + top + bottom)
+
+        return self._measured
+
+    def arrange(self):
+        key = (self._width, self._height, self._layout_version)
+        if self._arranged == key:
+            return
+        self._arranged = key
+
+        top, right, bottom, left = layout.as_padding(self._padding)
+        inner = (max(0, self._width - left - right), max(0, self._height - top - bottom))
+        origin = (left, top)
+
+        main = self._direction
+        cross = 1 - main
+
+        lengths = layout.distribute(self._child_sizes(main), inner[main], self._gap)
+        starts = layout.offsets(lengths, origin[main], self._gap)
+
+        for child, start, length, across in zip(self.children, starts, lengths, self._child_sizes(cross)):
+            across = across.resolve(inner[cross])
+            if across is None:  # flexible, there's nothing else across the Box to share with
+                across = inner[cross]
+
+            offset, across = layout.align(across, inner[cross], self._align)
+
+            position = [0, 0]
+            size = [0, 0]
+            position[main], size[main] = start, length
+            position[cross], size[cross] = origin[cross] + offset, across
+
+            child._set_geometry(position[0], position[1], size[0], size[1])
+
+    def __repr__(self):
+        return '<Box x: %r, y: %r, height: %r, width: %r, direction: %r>' % (
+            self.x,
+            self.y,
+            self.height,
+            self.width,
+            self.direction
+        )
+
+
 class RootDisplay(Display):
     """
     A Display object for the root
     """
-    def __init__(self, title="", *args, **kwargs):
+    def __init__(self, title="", *args, backend=None, max_fps=60, pipelined=False, resize=None, **kwargs):
+        """
+        Initialise a RootDisplay
+        :param title: String, the window title
+        :param backend: Backend, the terminal frames are written to, defaults to the one we're running in
+        :param max_fps: float/None, the most frames run() renders per second, None for no limit
+        :param pipelined: Bool, whether to diff and write frames on a thread of their own (see OutputPipeline), while
+        the next frame is flattened
+        :param resize: Bool/None, whether to resize the terminal window to fit, None to leave it to the backend (only
+        the Windows console is resized, as it always has been)
+        """
         self.title = title
 
         super(RootDisplay, self).__init__(*args, **kwargs)
@@ -97,9 +894,25 @@ class RootDisplay(Display):
         self.x = 0
         self.y = 0
 
-        util.set_window_title(self.title)
-        self.resize_window(self.width, self.height)
-        util.clear_window()
+        self.backend = backend if backend is not None else util.get_backend()
+
+        self.screen = buffer.ScreenBuffer(self.width, self.height)
+        self.renderer = renderer.DiffRenderer(self.backend)
+        self.scheduler = scheduler.FrameScheduler(self, max_fps)
+        self.stats = stats.RenderStats()  # call self.stats.enable() to start timing frames
+        self._recorder = None  # SessionRecorder, from start_recording()
+        self.pipeline = pipeline.OutputPipeline(self.renderer, self.stats) if pipelined else None
+        self._frame = 0  # how many frames have been composited
+        self._frame_damage = collections.deque(maxlen=8)  # the _damage of the latest frames, None if drawn in full
+        self._drawn = {}  # ScreenBuffer: int, the frame each buffer the pipeline gives back has on it
+        self.focus_manager = focus.FocusManager(self.scheduler)  # add() TextInputs to it, to tab between them
+
+        self.backend.set_title(self.title)
+        if resize if resize is not None else self.backend.resize_on_start:
+            self.resize_window(self.width, self.height)
+
+        # pastes arrive as a single Paste rather than a key per character, the backend turns it off again at exit
+        self.backend.set_bracketed_paste(True)
 
     def update_title(self, title):
         """
@@ -108,74 +921,298 @@ class RootDisplay(Display):
         :return: None
         """
         self.title = title
-        util.set_window_title(self.title)
+        self.backend.set_title(self.title)
 
     def resize_window(self, x, y):
         """
-        Resizes the window
+        Resizes the window, the next render will redraw the whole screen
         :param x: int
         :param y: int
         :return: None
         """
-        if platform.uname().version == "10":
-            util.resize_window(self.width, self.height + 1)  # +1 because we need to leave room for the cursor in the terminal
-        else:
-            util.resize_window(self.width+5, self.height + 5)  # in order to make the default font fit correctly, based on some testing
+        self.width = x
+        self.height = y
+
+        self.backend.resize(self.width, self.height + 1)  # +1 because we need to leave room for the cursor in the terminal
 
     def flatten(self):
         """
-        Merges displays and then renders them
-        :return: list<list<char>>, a matrix representing the screen, rows first, then columns
-        """
-        screen = [[" " for i in range(self.width)] for x in range(self.height)]  # pre-generate the screen matrix
-
-        def flatten_display(display, x=0, y=0):
-            """
-            Merges displays into one list of strings for outputting
-            :param display: Display, the display we're merging
-            :param x: int, total x indent of parent
-            :param y: int, total y indent of parent
-            :return: None
-            """
-            y_total = display.y + y
-            x_total = display.x + x
-
-            for l in range(len(display.text)):  # render the text
-                # decide on how many spaces to leave before the text (to handle alignment)
-                indent = 0
-                if issubclass(type(display.text[l]), widget.Widget):
-                    # if display.text[l].text_alignment == 0:
-                    # left alignment
-                    if display.text[l].alignment == style.alignment.CENTRE:
-                        # centre alignment
-                        indent = (display.width // 2) - (len(display.text[l]) // 2)
-                    elif display.text[l].alignment == style.alignment.RIGHT:
-                        # right alignment
-                        indent = display.width - len(display.text[l])
-
-                for i in range(len(display.text[l])):
-                    # print("screen[{}][{}] = {}".format(l + y_total, i + x_total + indent, display.text[l][i]))
-                    try:
-                        screen[l + y_total][i + x_total + indent] = str(display.text[l][i])
-                    except IndexError:
-                        raise DisplayError("Either the Label is too long, or the Display is too large.")
-
-            for disp in display.children:  # repeat for all of the children, and the children's children etc.
-                flatten_display(disp, x_total, y_total)
-
-        flatten_display(self)
+        Merges displays in to the screen buffer, which is reused from frame to frame. Only Displays which have been
+        invalidated since the last frame are rasterized again, and if none have, the screen is left as it is.
+        :return: ScreenBuffer, a grid representing the screen, rows first, then columns
+        """
+        self.layout()
+        return self._composite()
+
+    def _composite(self, full=False):
+        """
+        The part of flatten() after layout. Only the parts of the screen which have changed are cleared and blitted
+        again, unless it has been resized.
+        :param full: Bool, clear and blit the whole screen again anyway
+        :return: ScreenBuffer
+        """
+        if self.screen.size != (self.width, self.height):
+            full = True
+
+        if not (self._stale or full):
+            return self.screen
 
+        runs = self.rasterize()
+        if not (full or self._damage):
+            return self.screen  # changed, but only in to what it was already
+
+        damage = None if full else self._damage
+        if self.pipeline is not None:
+            # the last screen has been handed over to the output thread, so it can't be changed. Buffers are swapped
+            # rather than copied, so the one we get back is a frame or two behind, and everything damaged since the
+            # frame on it is drawn again
+            screen = self.pipeline.acquire(self.width, self.height)
+            if damage is not None:
+                damage = self._damage_since(screen)
+        elif self.screen.size != (self.width, self.height):
+            screen = buffer.ScreenBuffer(self.width, self.height)
+        else:
+            screen = self.screen
+
+        if damage is None:
+            screen.clear()
+            for x, y, chars, styles in runs:  # already clipped to the screen
+                screen.blit(x, y, chars, styles)
+        else:
+            compositor.redraw(screen, runs, damage)
+
+        self._frame_drawn(screen, full)
+        self.screen = screen
         return screen
 
-    def render(self):
+    def _damage_since(self, screen):
+        """
+        :param screen: ScreenBuffer, given back by the pipeline
+        :return: list<tuple<int, int, int, int>>/None, everything damaged since the frame on it up to this one, None if
+        it isn't known so it has to be drawn in full
+        """
+        drawn = self._drawn.get(screen)
+        if drawn is None or self._frame - drawn > len(self._frame_damage):
+            return None
+
+        damage = list(self._damage)
+        for rects in list(self._frame_damage)[len(self._frame_damage) - (self._frame - drawn):]:
+            if rects is None:
+                return None
+            damage.extend(rects)
+        return damage
+
+    def _frame_drawn(self, screen, full):
+        """
+        Remembers what a new frame damaged, and which buffer it is on
+        :param screen: ScreenBuffer
+        :param full: Bool, whether everything was
+        :return: None
+        """
+        self._frame += 1
+        self._frame_damage.append(None if full else self._damage)
+
+        self._drawn[screen] = self._frame
+        oldest = self._frame - self._frame_damage.maxlen
+        for old in [s for s, frame in self._drawn.items() if frame < oldest]:  # too far behind to catch up anyway
+            del self._drawn[old]
+
+    def render(self, full=False):
+        """
+        Renders everything, only sending the cells which have changed since the last render
+        :param full: Bool, clear the screen and redraw everything instead
+        :return: None
+        """
+        if self.pipeline is not None:
+            self._render_pipelined(full)
+        elif self.stats.enabled:
+            self._render_measured(full)
+        else:
+            self.renderer.render(self.flatten(), full)
+
+    def _render_pipelined(self, full):
+        """
+        render(), handing the screen over to the pipeline to be diffed and written, rather than waiting for that
+        :param full: Bool
+        :return: None
+        """
+        frame = first_input = None
+        if self.stats.enabled:
+            frame = stats.FrameStats(self.stats.frame_count, time.monotonic(), full)
+            first_input = self.stats.take_input()
+
+        start = time.perf_counter()
+        self.layout()
+        laid_out = time.perf_counter()
+        previous = self.screen
+        screen = self._composite(full)  # a new screen to hand over if full, even if nothing has changed
+
+        if screen is previous and not self.renderer.keyframe_needed():
+            return  # nothing has changed, and the pipeline already has this screen
+
+        if frame is not None:
+            frame.layout_time = laid_out - start
+            frame.flatten_time = time.perf_counter() - laid_out
+
+        self.pipeline.submit(screen, full, frame, first_input)
+
+    def _render_measured(self, full):
+        """
+        render(), timing each part of it for stats
+        :param full: Bool
+        :return: None
+        """
+        renderer = self.renderer
+        frame = stats.FrameStats(self.stats.frame_count, time.monotonic(), full)
+        first_input = self.stats.take_input()
+
+        start = time.perf_counter()
+        self.layout()
+        laid_out = time.perf_counter()
+        screen = self._composite()
+        flattened = time.perf_counter()
+        output = renderer.encode(screen, full)
+        encoded = time.perf_counter()
+        frame.bytes_written = renderer.write(output)
+        written = time.perf_counter()
+        frame.tap_time = renderer.last_tap_time if renderer.taps else 0
+        frame.full = renderer.last_full  # also when there wasn't a last frame, or the screen was resized
+
+        frame.layout_time = laid_out - start
+        frame.flatten_time = flattened - laid_out
+        frame.encode_time = encoded - flattened
+        frame.write_time = written - encoded
+        frame.total_time = written - start
+        frame.cells_changed = renderer.last_cells_changed if output else 0
+        if first_input is not None:
+            frame.input_latency = time.monotonic() - first_input
+
+        self.stats.record(frame)
+
+    def start_recording(self, path, capacity=256):
+        """
+        Starts recording every frame sent to the terminal, as an asciicast file. Frames are written by a background
+        thread, so recording doesn't hold up rendering.
+        :param path: String/PathLike, the file to record to, which is replaced
+        :param capacity: int, the most frames to queue for writing before frames are dropped
+        :return: SessionRecorder, for its frames, dropped and overhead counts
+        """
+        self.stop_recording()
+
+        self._recorder = recording.SessionRecorder(
+            path,
+            self.width,
+            self.height + 1,  # as for the terminal, the cursor is left on the line below
+            self.title,
+            capacity
+        )
+        self.renderer.add_tap(self._recorder)
+        return self._recorder
+
+    def stop_recording(self):
+        """
+        Stops recording, once every frame recorded so far (and the screen as it is, if frames were dropped) has been
+        written
+        :return: SessionRecorder/None, the recorder which was stopped
+        """
+        recorder = self._recorder
+        if recorder is not None:
+            self._recorder = None
+            if self.pipeline is not None:
+                self.pipeline.flush()
+            self.renderer.remove_tap(recorder)
+            recorder.stop(self.renderer.keyframe() if recorder.needs_keyframe else None)
+        return recorder
+
+    def serve(self, address, capacity=32, route_input=True, synchronized=False):
+        """
+        Starts sending every frame to any number of terminals connected over TCP or a Unix socket, as well as our own.
+        Flattening and diffing is still only done once per frame.
+        :param address: tuple<String, int>, (host, port) to listen on, or String, the path of a Unix socket
+        :param capacity: int, the most frames to queue for each client before skipping frames
+        :param route_input: Bool, whether to read keys from the first client to connect, instead of our own terminal
+        :param synchronized: Bool, whether to wrap what is sent in synchronized update markers
+        :return: DisplayServer, stop() it to disconnect everyone
+        """
+        display_server = server.DisplayServer(self, address, capacity, route_input, synchronized)
+        display_server.start()
+        return display_server
+
+    def invalidate(self, full=False):
         """
-        Renders everything
+        Requests a render from run() or run_async(), safe to call from any thread. Any number of requests between
+        frames only cause one render.
+        :param full: Bool, rasterize every Display again, clear the screen and redraw everything
         :return: None
         """
-        util.clear_window()
+        if full:
+            self.invalidate_all()
+
+        super(RootDisplay, self).invalidate()
+        self.scheduler.invalidate(full)
+
+    def _child_changed(self):
+        super(RootDisplay, self)._child_changed()
+        self.scheduler.invalidate()
+
+    def run(self):
+        """
+        Renders every time invalidate() is called (at most max_fps times a second), until stop() is called.
+        Doesn't use any CPU while nothing has been invalidated.
+        :return: None
+        """
+        self.scheduler.run()
+
+        if self.pipeline is not None:
+            self.pipeline.flush()  # so the last frame isn't lost if we're exiting
+
+    def stop(self):
+        """
+        Makes run() or run_async() return
+        :return: None
+        """
+        self.scheduler.stop()
+
+    def close(self):
+        """
+        Shuts down the threads we started: stops recording, and the output thread once it has written the last frame
+        submitted, and takes focus away from every widget
+        :return: None
+        """
+        self.stop()
+        self.stop_recording()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.focus_manager.stop()
+
+    async def render_async(self, full=False):
+        """
+        Renders everything from a coroutine, then lets other tasks run
+        :param full: Bool, clear the screen and redraw everything instead
+        :return: None
+        """
+        self.render(full)
+        await asyncio.sleep(0)
+
+    async def run_async(self, rerender_event=None):
+        """
+        Renders now, and then again every time rerender_event is set (or invalidate() is called if there isn't one),
+        until stop() is called or the task is cancelled. However many times it is set between renders, only one
+        render happens.
+        :param rerender_event: asyncio.Event, set it to request a render, e.g. as the rerender_event of
+        TextInput.focus_async
+        :return: None
+        """
+        if rerender_event is None:
+            await self.scheduler.run_async()
+            return
+
+        await self.render_async()
 
-        for row in self.flatten():
-            print(''.join(row))
+        while True:
+            await rerender_event.wait()
+            rerender_event.clear()
+            await self.render_async()
 
 if __name__ == "__main__":
     import time
@@ -224,7 +1261,7 @@ if __name__ == "__main__":
         else:
             x = 0
 
-        l.style.fore = cols[x]
+        l.style = style.Style(fore=cols[x])  # Styles are immutable, so swap in a new one
 
         root.render()
 
@@ -0,0 +1,283 @@
+"""
+Terminal output backends.
+
+A backend performs terminal operations by writing escape sequences to a buffered stream, rather than spawning shell
+commands. Frames and operations are buffered until flush() is called.
+"""
+import io
+import os
+import atexit
+import sys
+import shutil
+import platform
+
+# Special
+CLEAR_SCREEN = "\033[2J"
+CURSOR_HOME = "\033[H"
+SET_TITLE = "\033]0;{}\007"
+RESIZE = "\033[8;{};{}t"  # xterm window operation, (height, width)
+BRACKETED_PASTE_ON = "\033[?2004h"
+BRACKETED_PASTE_OFF = "\033[?2004l"
+SYNC_BEGIN = "\033[?2026h"  # DEC mode 2026, the terminal holds off drawing until SYNC_END
+SYNC_END = "\033[?2026l"
+
+# terminals known to support synchronized updates, by $TERM_PROGRAM and by the start of $TERM
+SYNC_TERM_PROGRAMS = frozenset(('WezTerm', 'iTerm.app', 'vscode', 'contour', 'ghostty', 'rio'))
+SYNC_TERMS = ('xterm-kitty', 'foot', 'alacritty', 'contour', 'wezterm', 'xterm-ghostty')
+
+
+def detect_synchronized_output(environ=None):
+    """
+    Guesses whether the terminal we're running in supports synchronized updates (DEC mode 2026)
+    :param environ: dict, the environment variables, defaults to os.environ
+    :return: Bool
+    """
+    if environ is None:
+        environ = os.environ
+
+    if environ.get('WT_SESSION'):  # Windows Terminal
+        return True
+    if environ.get('TERM_PROGRAM') in SYNC_TERM_PROGRAMS:
+        return True
+    return environ.get('TERM', '').startswith(SYNC_TERMS)
+
+
+class Backend:
+    """
+    A terminal which understands VT escape sequences, written to through a binary stream
+    """
+    encoding = 'utf-8'
+    resize_on_start = False  # whether a RootDisplay resizes the window to fit it, unless told otherwise
+
+    def __init__(self, stream, synchronized=None):
+        """
+        Initialise a Backend
+        :param stream: binary file-like object, where all output is written to
+        :param synchronized: Bool/None, whether to wrap frames in synchronized update markers, None to detect it
+        """
+        self.stream = stream
+        self.synchronized = detect_synchronized_output() if synchronized is None else synchronized
+        self._paste_reset_at_exit = False
+
+    def write(self, text):
+        """
+        Buffers text (and escape sequences) to be sent to the terminal
+        :param text: String
+        :return: int, the number of bytes written
+        """
+        data = text.encode(self.encoding)
+        self.stream.write(data)
+        return len(data)
+
+    def flush(self):
+        """
+        Sends everything which has been written to the terminal
+        :return: None
+        """
+        self.stream.flush()
+
+    def write_frame(self, frame):
+        """
+        Sends a whole frame to the terminal in one write, so that it is never drawn half finished
+        :param frame: String
+        :return: int, the number of bytes written
+        """
+        if self.synchronized:
+            frame = SYNC_BEGIN + frame + SYNC_END
+
+        written = self.write(frame)
+        self.flush()
+        return written
+
+    def clear(self):
+        """
+        Clears the screen
+        :return: None
+        """
+        self.write(CLEAR_SCREEN + CURSOR_HOME)
+        self.flush()
+
+    def set_title(self, title):
+        """
+        Set the window title
+        :param title: String
+        :return: None
+        """
+        self.write(SET_TITLE.format(title))
+        self.flush()
+
+    def resize(self, width, height):
+        """
+        Resize the terminal window, if the terminal allows it
+        :param width: int, width of the terminal (chars)
+        :param height: int, height of the terminal (rows)
+        :return: None
+        """
+        self.write(RESIZE.format(height, width))
+        self.flush()
+
+    def set_bracketed_paste(self, enabled):
+        """
+        Asks the terminal to mark the start and end of pasted text, so a paste can be read as one Paste. Once enabled,
+        it is disabled again at exit, however many times it was enabled.
+        :param enabled: Bool
+        :return: None
+        """
+        self.write(BRACKETED_PASTE_ON if enabled else BRACKETED_PASTE_OFF)
+        self.flush()
+
+        if enabled and not self._paste_reset_at_exit:
+            self._paste_reset_at_exit = True
+            atexit.register(self.set_bracketed_paste, False)
+
+    def size(self):
+        """
+        :return: tuple<int, int>, (width, height) of the terminal
+        """
+        return tuple(shutil.get_terminal_size())
+
+    def close(self):
+        """
+        Flushes and releases the stream
+        :return: None
+        """
+        self.flush()
+
+    def __repr__(self):
+        return '<%s stream: %r>' % (self.__class__.__name__, self.stream)
+
+
+class HeadlessBackend(Backend):
+    """
+    Keeps everything in memory instead of sending it to a terminal, for testing and benchmarking
+    """
+    def __init__(self, width=100, height=30, synchronized=False):
+        """
+        Initialise a HeadlessBackend
+        :param width: int, the width reported by size()
+        :param height: int, the height reported by size()
+        :param synchronized: Bool, whether to wrap frames in synchronized update markers
+        """
+        self.width = width
+        self.height = height
+        self.title = ""
+
+        super(HeadlessBackend, self).__init__(io.BytesIO(), synchronized)
+
+    def set_title(self, title):
+        self.title = title
+        super(HeadlessBackend, self).set_title(title)
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+        super(HeadlessBackend, self).resize(width, height)
+
+    def size(self):
+        return self.width, self.height
+
+    def getvalue(self):
+        """
+        :return: String, everything written so far
+        """
+        return self.stream.getvalue().decode(self.encoding)
+
+    def take_output(self):
+        """
+        Gets everything written so far and forgets it
+        :return: String
+        """
+        value = self.getvalue()
+        self.stream.seek(0)
+        self.stream.truncate()
+        return value
+
+
+class PosixBackend(Backend):
+    """
+    A POSIX tty, or pseudo-terminal
+    """
+    def __init__(self, fd=None, synchronized=None):
+        """
+        Initialise a PosixBackend
+        :param fd: int/None, file descriptor of the terminal, defaults to standard output
+        :param synchronized: Bool/None, whether to wrap frames in synchronized update markers, None to detect it
+        """
+        if fd is None:
+            sys.stdout.flush()  # anything print()ed so far has to come before us
+            fd = sys.stdout.fileno()
+
+        self.fd = fd
+
+        super(PosixBackend, self).__init__(os.fdopen(fd, 'wb', closefd=False), synchronized)
+
+    def size(self):
+        try:
+            return tuple(os.get_terminal_size(self.fd))
+        except OSError:  # not a terminal
+            return super(PosixBackend, self).size()
+
+    def close(self):
+        self.stream.close()
+
+
+class WindowsConsoleBackend(Backend):
+    """
+    The Windows console, with virtual terminal processing turned on so that it understands escape sequences
+    """
+    STD_OUTPUT_HANDLE = -11
+    ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+
+    resize_on_start = True  # the console window has always been sized to fit the RootDisplay
+
+    def __init__(self, stream=None, synchronized=None):
+        """
+        Initialise a WindowsConsoleBackend
+        :param stream: binary file-like object, defaults to standard output
+        :param synchronized: Bool/None, whether to wrap frames in synchronized update markers, None to detect it
+        """
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._kernel32 = ctypes.windll.kernel32
+        self._handle = self._kernel32.GetStdHandle(self.STD_OUTPUT_HANDLE)
+
+        mode = wintypes.DWORD()
+        if self._kernel32.GetConsoleMode(self._handle, ctypes.byref(mode)):
+            self._kernel32.SetConsoleMode(self._handle, mode.value | self.ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+
+        if stream is None:
+            sys.stdout.flush()
+            stream = sys.stdout.buffer
+
+        super(WindowsConsoleBackend, self).__init__(stream, synchronized)
+
+    def set_title(self, title):
+        self._kernel32.SetConsoleTitleW(title)
+
+    def resize(self, width, height):
+        if platform.release() not in ("10", "11"):
+            # in order to make the default font fit correctly, based on some testing
+            width += 5
+            height += 4
+
+        wintypes = self._wintypes
+        byref = self._ctypes.byref
+
+        # shrink the window first, as the buffer can never be smaller than the window
+        self._kernel32.SetConsoleWindowInfo(self._handle, True, byref(wintypes.SMALL_RECT(0, 0, 0, 0)))
+        self._kernel32.SetConsoleScreenBufferSize(self._handle, wintypes._COORD(width, height))
+        self._kernel32.SetConsoleWindowInfo(self._handle, True, byref(wintypes.SMALL_RECT(0, 0, width - 1, height - 1)))
+
+
+def default_backend():
+    """
+    Creates the right backend for the terminal we're running in
+    :return: Backend
+    """
+    if platform.system() == 'Windows':
+        return WindowsConsoleBackend()
+    else:
+        return PosixBackend()
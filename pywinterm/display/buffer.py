@@ -0,0 +1,288 @@
+"""
+Array backed screen buffers
+"""
+import sys
+import codecs
+import threading
+import unicodedata
+from array import array
+from pywinterm.display.width import char_width
+
+# one codepoint per cell, 'I' is 4 bytes on every platform we care about but fall back to 'L' just in case
+CHAR_TYPECODE = 'I' if array('I').itemsize >= 4 else 'L'
+CHAR_ENCODING = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+STYLE_TYPECODE = 'H'
+
+BLANK = ord(" ")
+DEFAULT_STYLE = 0
+
+# cells from 0x110000 on are past the last code point, so can't be mistaken for a character
+CONTINUATION = 0x110000  # the second cell of a wide character, which the character in the cell before covers
+CLUSTER = 0x110001  # cells from here on are a character with others combined with it, see cluster()
+
+ZERO_WIDTH_JOINER = 0x200D  # joins the next character on to the one before, e.g. for emoji sequences
+SKIN_TONES = range(0x1F3FB, 0x1F400)  # emoji modifiers, which change the emoji before rather than being shown
+
+_clusters = []  # list<String>, the text of each cluster cell, in the order they were first seen
+_cluster_cells = {}  # String: int, the cell of each of _clusters
+_clusters_lock = threading.Lock()
+
+
+def cluster(text):
+    """
+    Gets the cell for a character with others combined with it. The same text always gets the same cell, so cells
+    can still be compared as ints.
+    :param text: String, the character followed by what is combined with it
+    :return: int, CLUSTER or above
+    """
+    cell = _cluster_cells.get(text)
+    if cell is None:
+        with _clusters_lock:
+            cell = _cluster_cells.get(text)
+            if cell is None:
+                _clusters.append(text)  # before it can be looked up, so decode() always finds it
+                cell = _cluster_cells[text] = CLUSTER + len(_clusters) - 1
+    return cell
+
+
+def cell_text(cell):
+    """
+    :param cell: int, from a ScreenBuffer's chars
+    :return: String, the text shown in the cell, '' for a CONTINUATION
+    """
+    if cell < CONTINUATION:
+        return chr(cell)
+    if cell == CONTINUATION:
+        return ''
+    return _clusters[cell - CLUSTER]
+
+
+def encode(text):
+    """
+    Converts a string to an array of cells. Wide characters take up two cells (the second is CONTINUATION). Zero width
+    characters (combining marks, variation selectors, joiners), skin tone modifiers and the characters after a zero
+    width joiner are kept in the cell of the character before, which becomes a cluster(). Zero width characters with
+    nothing before them to combine with are left out, as are control characters, which would move the cursor.
+    :param text: String
+    :return: array<int>
+    """
+    if text.isascii() and text.isprintable():  # a cell a character, without going through a python object each
+        return array(CHAR_TYPECODE, text.encode(CHAR_ENCODING))
+
+    cells = array(CHAR_TYPECODE)
+    append = cells.append
+    base = -1  # the cell of the last character with a width
+    combined = []  # list<String>, that character and the characters combined with it so far
+    joining = False  # whether the last character was a zero width joiner
+    for char in unicodedata.normalize('NFC', text):
+        codepoint = ord(char)
+        if codepoint < 0x20 or 0x7F <= codepoint < 0xA0:  # C0, DEL and C1 controls, not combined with anything
+            continue
+
+        width = char_width(codepoint)
+        if base >= 0 and (width == 0 or joining or codepoint in SKIN_TONES):
+            combined.append(char)
+            joining = codepoint == ZERO_WIDTH_JOINER
+        elif width:
+            if len(combined) > 1:
+                cells[base] = cluster(''.join(combined))
+            base = len(cells)
+            combined = [char]
+            append(codepoint)
+            if width == 2:
+                append(CONTINUATION)
+            joining = False
+
+    if len(combined) > 1:
+        cells[base] = cluster(''.join(combined))
+
+    return cells
+
+
+def _decode_cells(error):
+    """
+    Error handler for decode(), for the cells which aren't code points
+    :param error: UnicodeDecodeError
+    :return: tuple<String, int>, the text of the cell, and where to carry on decoding from
+    """
+    end = error.start + 4
+    return cell_text(int.from_bytes(error.object[error.start:end], sys.byteorder)), end
+
+
+codecs.register_error('pywinterm.cells', _decode_cells)
+
+
+def decode(chars):
+    """
+    Converts an array (or memoryview of one) of cells back to a string
+    :param chars: array<int>/memoryview
+    :return: String
+    """
+    return bytes(chars).decode(CHAR_ENCODING, 'pywinterm.cells')
+
+
+def style_run(style_id, length):
+    """
+    Creates the style ids for a run of cells which all share a style
+    :param style_id: int
+    :param length: int, the number of cells
+    :return: array<int>
+    """
+    return array(STYLE_TYPECODE, [style_id]) * length
+
+
+class ScreenBuffer:
+    """
+    A grid of cells, stored as parallel arrays of codepoints and style ids, rows first, then columns.
+
+    Allocate one once and clear it in place every frame rather than building a new one.
+    """
+    def __init__(self, width, height):
+        """
+        Initialise a ScreenBuffer
+        :param width: int, the number of cells in each row
+        :param height: int, the number of rows
+        """
+        self.width = width
+        self.height = height
+
+        self._blank_chars = array(CHAR_TYPECODE, [BLANK]) * (width * height)
+        self._blank_styles = array(STYLE_TYPECODE, [DEFAULT_STYLE]) * (width * height)
+
+        self.chars = array(CHAR_TYPECODE, self._blank_chars)
+        self.styles = array(STYLE_TYPECODE, self._blank_styles)
+
+        # views let rows be sliced out without copying
+        self._chars_view = memoryview(self.chars)
+        self._styles_view = memoryview(self.styles)
+        self._blank_chars_view = memoryview(self._blank_chars)
+        self._blank_styles_view = memoryview(self._blank_styles)
+
+    @property
+    def size(self):
+        """
+        :return: tuple<int, int>, (width, height)
+        """
+        return self.width, self.height
+
+    def clear(self):
+        """
+        Blanks every cell, in place
+        :return: None
+        """
+        self.chars[:] = self._blank_chars
+        self.styles[:] = self._blank_styles
+
+    def clear_span(self, x, y, length):
+        """
+        Blanks part of a row, in place. As for blit(), a wide character cut in half at either end is blanked whole.
+        :param x: int, the column of the first cell
+        :param y: int, the row
+        :param length: int, the number of cells
+        :return: None
+        """
+        start = y * self.width + x
+        end = start + length
+
+        if x > 0 and self.chars[start] == CONTINUATION:
+            self.chars[start - 1] = BLANK
+        if x + length < self.width and self.chars[end] == CONTINUATION:
+            self.chars[end] = BLANK
+
+        self._chars_view[start:end] = self._blank_chars_view[:length]
+        self._styles_view[start:end] = self._blank_styles_view[:length]
+
+    def copy_from(self, other):
+        """
+        Makes this buffer's cells the same as another buffer of the same size, in place
+        :param other: ScreenBuffer
+        :return: None
+        """
+        self.chars[:] = other.chars
+        self.styles[:] = other.styles
+
+    def write(self, x, y, text, style_id=DEFAULT_STYLE):
+        """
+        Writes text in to a row, starting from a cell
+        :param x: int, the column of the first cell
+        :param y: int, the row
+        :param text: String
+        :param style_id: int, the id of the style for every cell written
+        :return: None
+        """
+        chars = encode(text)
+        n = len(chars)
+        if n == 0:
+            return
+
+        if x < 0 or y < 0 or x + n > self.width or y >= self.height:
+            raise IndexError("Writing %r at (%r, %r) would fall outside the buffer" % (text, x, y))
+
+        self.blit(x, y, chars, style_run(style_id, n))
+
+    def blit(self, x, y, chars, styles):
+        """
+        Copies a run of already encoded cells in to a row
+        :param x: int, the column of the first cell
+        :param y: int, the row
+        :param chars: array<int>, codepoints
+        :param styles: array<int>, style ids, the same length as chars
+        :return: None
+        """
+        n = len(chars)
+        if x < 0 or y < 0 or x + n > self.width or y >= self.height:
+            raise IndexError("A run of %r cells at (%r, %r) would fall outside the buffer" % (n, x, y))
+
+        if n == 0:
+            return
+
+        start = y * self.width + x
+        end = start + n
+
+        # blank out the other half of any wide character we're about to write over half of
+        if x > 0 and self.chars[start] == CONTINUATION:
+            self.chars[start - 1] = BLANK
+        if x + n < self.width and self.chars[end] == CONTINUATION:
+            self.chars[end] = BLANK
+
+        self.chars[start:end] = chars
+        self.styles[start:end] = styles
+
+    def row(self, y):
+        """
+        Gets a row without copying it
+        :param y: int
+        :return: tuple<memoryview, memoryview>, the codepoints and the style ids of the row
+        """
+        start = y * self.width
+        end = start + self.width
+        return self._chars_view[start:end], self._styles_view[start:end]
+
+    def row_text(self, y):
+        """
+        Gets the characters in a row, without any styling
+        :param y: int
+        :return: String
+        """
+        return decode(self.row(y)[0])
+
+    def row_equals(self, other, y):
+        """
+        Checks whether a row is the same in this buffer and another one of the same size
+        :param other: ScreenBuffer
+        :param y: int
+        :return: Bool
+        """
+        chars, styles = self.row(y)
+        other_chars, other_styles = other.row(y)
+        return chars == other_chars and styles == other_styles
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self.row_text(y)
+
+    def __repr__(self):
+        return '<ScreenBuffer width: %r, height: %r>' % (self.width, self.height)
@@ -0,0 +1,208 @@
+"""
+Clipping and occlusion of runs of cells, for putting overlapping Displays together, and redrawing only the parts of
+the screen which have changed.
+
+A run is a tuple of (x, y, codepoints, style ids), and a rect is a tuple of (x, y, width, height).
+"""
+from pywinterm.display.buffer import BLANK, CONTINUATION
+
+
+def _slice(chars, styles, start, end):
+    """
+    Cuts out part of a run, blanking either half of a wide character which has been cut in two
+    :param chars: array<int>
+    :param styles: array<int>
+    :param start: int, the index of the first cell to keep
+    :param end: int, the index after the last cell to keep
+    :return: tuple<array<int>, array<int>>
+    """
+    piece = chars[start:end]
+    if piece:
+        if piece[0] == CONTINUATION:
+            piece[0] = BLANK
+        if end < len(chars) and chars[end] == CONTINUATION:
+            piece[-1] = BLANK
+
+    return piece, styles[start:end]
+
+
+def clip_run(run, width, height):
+    """
+    Cuts off the parts of a run which fall outside of a rectangle at (0, 0)
+    :param run: tuple<int, int, array<int>, array<int>>
+    :param width: int
+    :param height: int
+    :return: tuple<int, int, array<int>, array<int>>/None, the run (itself if it fits), None if none of it fits
+    """
+    x, y, chars, styles = run
+    n = len(chars)
+
+    if y < 0 or y >= height or x >= width or x + n <= 0:
+        return None
+
+    if x >= 0 and x + n <= width:
+        return run
+
+    start = max(0, -x)
+    end = min(n, width - x)
+    return (x + start, y) + _slice(chars, styles, start, end)
+
+
+def _uncovered(x, y, length, rects):
+    """
+    :return: list<tuple<int, int>>, the (start, end) columns of the parts of a row segment no rect covers
+    """
+    pieces = [(x, x + length)]
+
+    for rx, ry, rw, rh in rects:
+        if not ry <= y < ry + rh:
+            continue
+
+        left = rx
+        right = rx + rw
+        remaining = []
+        for start, end in pieces:
+            if right <= start or left >= end:
+                remaining.append((start, end))
+                continue
+            if start < left:
+                remaining.append((start, left))
+            if right < end:
+                remaining.append((right, end))
+
+        pieces = remaining
+        if not pieces:
+            break
+
+    return pieces
+
+
+def cut_run(run, rects):
+    """
+    Removes the parts of a run which are covered by rectangles
+    :param run: tuple<int, int, array<int>, array<int>>
+    :param rects: list<tuple<int, int, int, int>>
+    :return: list<tuple<int, int, array<int>, array<int>>>, what's still showing
+    """
+    x, y, chars, styles = run
+    pieces = _uncovered(x, y, len(chars), rects)
+
+    if len(pieces) == 1 and pieces[0] == (x, x + len(chars)):
+        return [run]
+
+    return [(start, y) + _slice(chars, styles, start - x, end - x) for start, end in pieces]
+
+
+def covered(rect, rects):
+    """
+    :param rect: tuple<int, int, int, int>
+    :param rects: list<tuple<int, int, int, int>>
+    :return: Bool, whether rect is entirely covered by rects put together
+    """
+    x, y, width, height = rect
+    if width <= 0 or height <= 0:
+        return True
+
+    for row in range(y, y + height):
+        if _uncovered(x, row, width, rects):
+            return False
+
+    return True
+
+
+def changed_rows(old, new, width):
+    """
+    Finds the rows which look different between two rasterizations of a Display's text
+    :param old: list<tuple<int, int, array<int>, array<int>>>, the runs from last time, in row order
+    :param new: list<tuple<int, int, array<int>, array<int>>>, the runs from this time, in row order
+    :param width: int, the width of the Display
+    :return: list<tuple<int, int, int, int>>, a rect for each block of changed rows
+    """
+    changed = set()
+    if len(old) == len(new):
+        # usually the same rows have the same number of runs, so they can be compared pair by pair. If they don't,
+        # some pair in the rows which don't will be from different rows, so those rows are still found
+        for before, after in zip(old, new):
+            if before is not after and before != after:
+                changed.add(before[1])
+                changed.add(after[1])
+    else:
+        rows = {}
+        for run in old:
+            rows.setdefault(run[1], ([], []))[0].append(run)
+        for run in new:
+            rows.setdefault(run[1], ([], []))[1].append(run)
+        changed = [y for y, (before, after) in rows.items() if before != after]
+
+    rects = []
+    for y in sorted(changed):
+        if rects and rects[-1][1] + rects[-1][3] == y:
+            rects[-1] = (0, rects[-1][1], width, rects[-1][3] + 1)
+        else:
+            rects.append((0, y, width, 1))
+
+    return rects
+
+
+def damaged_spans(rects, width, height):
+    """
+    Converts damage rects in to the columns to redraw in each row
+    :param rects: list<tuple<int, int, int, int>>
+    :param width: int, of the screen
+    :param height: int, of the screen
+    :return: dict<int, list<int>>, row: [start, end) of everything damaged in it
+    """
+    spans = {}
+    for x, y, w, h in rects:
+        start = max(0, x)
+        end = min(width, x + w)
+        if start >= end:
+            continue
+
+        for row in range(max(0, y), min(height, y + h)):
+            span = spans.get(row)
+            if span is None:
+                spans[row] = [start, end]
+            else:
+                span[0] = min(span[0], start)
+                span[1] = max(span[1], end)
+
+    return spans
+
+
+def redraw(screen, runs, rects):
+    """
+    Brings a screen which has the last frame on it up to date, by clearing only the damaged parts of it and blitting
+    the runs which overlap them again. Spans are widened so that no run is partly redrawn, which keeps wide characters
+    whole and the runs drawn over each other in the same order.
+    :param screen: ScreenBuffer
+    :param runs: list<tuple<int, int, array<int>, array<int>>>, every run of the frame, already clipped to the screen
+    :param rects: list<tuple<int, int, int, int>>, what has changed since the last frame
+    :return: None
+    """
+    spans = damaged_spans(rects, screen.width, screen.height)
+    if not spans:
+        return
+
+    rows = {}
+    for run in runs:
+        if run[1] in spans:
+            rows.setdefault(run[1], []).append(run)
+
+    for y, (start, end) in spans.items():
+        row = rows.get(y, ())
+
+        widened = True
+        while widened:
+            widened = False
+            for x, _, chars, _ in row:
+                run_end = x + len(chars)
+                if x < end and run_end > start and (x < start or run_end > end):
+                    start = min(start, x)
+                    end = max(end, run_end)
+                    widened = True
+
+        screen.clear_span(start, y, end - start)
+        for x, _, chars, styles in row:
+            if x < end and x + len(chars) > start:
+                screen.blit(x, y, chars, styles)
@@ -0,0 +1,243 @@
+"""
+Keyboard focus: which widget keys are sent to, and moving it between widgets with tab and shift+tab
+"""
+import threading
+from pywinterm import key
+from pywinterm.key.key import TAB, SHIFT_TAB
+
+_ANY = object()  # for _change(), to change focus whichever widget has it
+
+
+class FocusManager:
+    """
+    Sends keys to whichever widget in its focus chain has focus, from one thread which lives as long as we do.
+
+    A focusable widget is anything with a keypress_handler(k, rerender_event), e.g. a TextInput. Keys are only read
+    while a widget has focus, so the rest of the application can read them itself the rest of the time; a key which
+    was already being read when focus was lost is kept for the next widget to get focus. The next and previous keys
+    move focus along the chain (wrapping around at the ends) before the focused widget sees them.
+    """
+    def __init__(self, rerender_event=None, next_keys=(TAB,), previous_keys=(SHIFT_TAB,)):
+        """
+        Initialise a FocusManager, its thread is started the first time something is focused
+        :param rerender_event: threading.Event/FrameScheduler, given to widgets' keypress handlers and set whenever
+        focus changes
+        :param next_keys: iterable<Key>, keys which move focus to the next widget in the chain
+        :param previous_keys: iterable<Key>, keys which move focus to the previous widget in the chain
+        """
+        self.rerender_event = rerender_event if rerender_event is not None else threading.Event()
+        self.next_keys = frozenset(map(key.as_key, next_keys))
+        self.previous_keys = frozenset(map(key.as_key, previous_keys))
+
+        self.focused = None  # the widget keys are sent to, None for none of them
+
+        self._chain = []  # widgets, in the order focus moves through them
+        self._callbacks = {}  # widget: tuple<function/None, function/None>, (on_focus, on_blur)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._reading = False  # whether our thread is waiting for a key
+        self._held = None  # Key/Paste/None, read after focus was lost, for the next widget to get focus
+
+    def add(self, widget, on_focus=None, on_blur=None):
+        """
+        Adds a widget to the end of the focus chain
+        :param widget: a widget with a keypress_handler
+        :param on_focus: function/None, called with the widget when it gets focus
+        :param on_blur: function/None, called with the widget when it loses focus
+        :return: None
+        """
+        with self._condition:
+            if widget not in self._callbacks:
+                self._chain.append(widget)
+            self._callbacks[widget] = (on_focus, on_blur)
+
+        widget.focus_manager = self
+
+    def remove(self, widget):
+        """
+        Takes a widget out of the focus chain, taking focus away from it first if it has it
+        :param widget: a widget which was add()ed
+        :return: None
+        """
+        self.blur(widget)
+
+        with self._condition:
+            if widget in self._callbacks:
+                self._chain.remove(widget)
+                del self._callbacks[widget]
+
+        widget.focus_manager = None
+
+    @property
+    def chain(self):
+        """
+        :return: tuple, the widgets in the order focus moves through them
+        """
+        return tuple(self._chain)
+
+    def focus(self, widget):
+        """
+        Gives a widget focus, taking it away from the widget which had it
+        :param widget: a widget which was add()ed, or None for no widget to have focus
+        :return: None
+        """
+        self._change(widget)
+
+    def _change(self, widget, only_from=_ANY):
+        """
+        Changes which widget has focus, calling the callbacks once the change has been made
+        :param widget: the widget to focus, or None
+        :param only_from: the widget which has to have focus for it to change, _ANY for any of them
+        :return: None
+        """
+        with self._condition:
+            if widget is not None and widget not in self._callbacks:
+                raise ValueError("%r isn't in the focus chain" % (widget,))
+
+            previous = self.focused
+            if previous is widget or (only_from is not _ANY and previous is not only_from):
+                return
+
+            self.focused = widget
+            self._condition.notify_all()
+
+            on_blur = self._callbacks.get(previous, (None, None))[1] if previous is not None else None
+            on_focus = self._callbacks[widget][0] if widget is not None else None
+
+            if widget is None:
+                self._stop_reading()  # leave the keys for the rest of the application
+            elif self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        if on_blur is not None:
+            on_blur(previous)
+        if on_focus is not None:
+            on_focus(widget)
+
+        self.rerender_event.set()
+
+    def blur(self, widget=None):
+        """
+        Takes focus away from a widget, if it has it
+        :param widget: the widget, None for whichever has focus
+        :return: None
+        """
+        self._change(None, _ANY if widget is None else widget)
+
+    def _move(self, step):
+        """
+        :param step: int, 1 for the next widget in the chain, -1 for the previous
+        :return: None
+        """
+        with self._condition:
+            if not self._chain:
+                return
+
+            previous = self.focused
+            if previous is None:
+                index = 0 if step > 0 else len(self._chain) - 1
+            else:
+                index = (self._chain.index(previous) + step) % len(self._chain)
+            widget = self._chain[index]
+
+        self._change(widget, previous)
+
+    def focus_next(self):
+        """
+        Moves focus to the next widget in the chain
+        :return: None
+        """
+        self._move(1)
+
+    def focus_previous(self):
+        """
+        Moves focus to the previous widget in the chain
+        :return: None
+        """
+        self._move(-1)
+
+    def wait_blurred(self, widget, timeout=None):
+        """
+        Blocks until a widget doesn't have focus
+        :param widget: the widget
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Bool, whether it has lost focus
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.focused is not widget, timeout)
+
+    def dispatch(self, k):
+        """
+        Sends a key to the focused widget, or moves focus if it is one of the next or previous keys
+        :param k: Key/Paste
+        :return: None
+        """
+        if isinstance(k, key.Key):
+            if k in self.next_keys:
+                self.focus_next()
+                return
+            if k in self.previous_keys:
+                self.focus_previous()
+                return
+
+        widget = self.focused
+        if widget is not None:
+            widget.keypress_handler(k, self.rerender_event)
+
+    def _stop_reading(self):
+        """
+        Wakes our thread up if it is waiting for a key, and waits for it to stop. Called with the condition held.
+        :return: None
+        """
+        # interrupt() only wakes a read which has already started, so it's repeated until our thread has stopped
+        # reading. Our thread itself (from a keypress handler) isn't reading.
+        while self._reading and threading.current_thread() is not self._thread:
+            key.get_reader().interrupt()
+            self._condition.wait(0.01)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self.focused is not None or self._stopped)
+                if self._stopped:
+                    return
+
+                k, self._held = self._held, None
+                self._reading = k is None
+
+            if k is None:
+                try:
+                    k = key.pressed(None)
+                finally:
+                    with self._condition:
+                        self._reading = False
+                        self._condition.notify_all()
+
+                        if k is not None and (self.focused is None or self._stopped):
+                            self._held, k = k, None  # it arrived as focus was lost
+
+            if k is not None:
+                self.dispatch(k)
+
+    def stop(self):
+        """
+        Takes focus away from everything, and ends our thread
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            self._stop_reading()
+
+        self.blur()
+
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def __repr__(self):
+        return '<FocusManager focused: %r, chain: %r>' % (self.focused, len(self._chain))
@@ -0,0 +1,163 @@
+"""
+Sizing and arrangement for Boxes, which lay their children out in a row or a column
+"""
+
+# Directions
+HORIZONTAL = 0
+VERTICAL = 1
+
+# Where children go across a Box
+START = 0
+CENTRE = 1
+END = 2
+STRETCH = 3
+
+# Kinds of Size
+FIXED = 0
+PERCENT = 1
+FLEX = 2
+
+
+class Size:
+    """
+    How long a child of a Box should be, in one direction
+    """
+    __slots__ = ('kind', 'value')
+
+    def __init__(self, kind, value):
+        """
+        Initialise a Size, use fixed(), percent() or flex() rather than this
+        :param kind: int, FIXED, PERCENT or FLEX
+        :param value: int, cells for FIXED, a percentage for PERCENT, a weight for FLEX
+        """
+        self.kind = kind
+        self.value = value
+
+    def resolve(self, available):
+        """
+        :param available: int, the cells there are to take a share of
+        :return: int/None, the cells to take, None for a FLEX Size, which takes a share of what's left over
+        """
+        if self.kind == FIXED:
+            return self.value
+        elif self.kind == PERCENT:
+            return available * self.value // 100
+        return None
+
+    def __eq__(self, other):
+        return isinstance(other, Size) and self.kind == other.kind and self.value == other.value
+
+    def __hash__(self):
+        return hash((self.kind, self.value))
+
+    def __repr__(self):
+        return '<Size kind: %r, value: %r>' % (self.kind, self.value)
+
+
+def fixed(cells):
+    """
+    :param cells: int
+    :return: Size, exactly this many cells
+    """
+    return Size(FIXED, cells)
+
+
+def percent(value):
+    """
+    :param value: int, 0 to 100
+    :return: Size, this percentage of the space inside the Box
+    """
+    return Size(PERCENT, value)
+
+
+def flex(weight=1):
+    """
+    :param weight: int, how big a share to take compared to the other flexible children
+    :return: Size, a share of whatever space the other children leave
+    """
+    return Size(FLEX, weight)
+
+
+def as_size(size):
+    """
+    :param size: Size/int/None, an int is a fixed number of cells
+    :return: Size/None
+    """
+    if size is None or isinstance(size, Size):
+        return size
+    return fixed(size)
+
+
+def as_padding(padding):
+    """
+    :param padding: int/tuple, the same on every side, (top and bottom, left and right) or (top, right, bottom, left)
+    :return: tuple<int, int, int, int>, (top, right, bottom, left)
+    """
+    if isinstance(padding, int):
+        return padding, padding, padding, padding
+    elif len(padding) == 2:
+        return padding[0], padding[1], padding[0], padding[1]
+    return tuple(padding)
+
+
+def distribute(sizes, available, gap=0):
+    """
+    Works out how long each child of a Box is along it. Fixed and percentage Sizes are taken first, then whatever is
+    left is shared out between the flexible ones by weight.
+    :param sizes: list<Size>
+    :param available: int, the cells inside the Box
+    :param gap: int, cells between each child
+    :return: list<int>
+    """
+    lengths = [size.resolve(available) for size in sizes]
+
+    remaining = available - gap * max(0, len(sizes) - 1) - sum([l for l in lengths if l is not None])
+    remaining = max(0, remaining)
+    total_weight = sum([size.value for size in sizes if size.kind == FLEX])
+
+    weight = 0
+    given = 0
+    for i, size in enumerate(sizes):
+        if size.kind == FLEX:
+            # share by running total, so rounding never leaves a cell unused
+            weight += size.value
+            share = remaining * weight // total_weight if total_weight else 0
+            lengths[i] = share - given
+            given = share
+
+    return [max(0, l) for l in lengths]
+
+
+def offsets(lengths, start=0, gap=0):
+    """
+    :param lengths: list<int>, from distribute()
+    :param start: int, where the first child starts
+    :param gap: int, cells between each child
+    :return: list<int>, where each child starts
+    """
+    result = []
+    position = start
+    for length in lengths:
+        result.append(position)
+        position += length + gap
+
+    return result
+
+
+def align(length, available, alignment):
+    """
+    Places a child across a Box
+    :param length: int, the child's length across the Box
+    :param available: int, the cells inside the Box
+    :param alignment: int, START, CENTRE, END or STRETCH
+    :return: tuple<int, int>, (offset, length)
+    """
+    if alignment == STRETCH:
+        return 0, available
+
+    length = min(length, available)
+    if alignment == CENTRE:
+        return (available - length) // 2, length
+    elif alignment == END:
+        return available - length, length
+    return 0, length
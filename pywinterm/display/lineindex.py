@@ -0,0 +1,152 @@
+"""
+Random access to the lines of a (possibly huge, possibly growing) file, without reading all of it in to memory
+"""
+import os
+import mmap
+import threading
+from array import array
+
+NEWLINE = b"\n"
+
+
+class LineIndex:
+    """
+    The lines of a file, memory mapped so that only the lines which are asked for are ever read.
+
+    The offset of the start of every line is kept in an array, built incrementally: refresh() only looks at what has
+    been added to the file since it was last called, and getting line N is a lookup rather than a scan.
+    """
+    def __init__(self, path, encoding='utf-8'):
+        """
+        Initialise a LineIndex
+        :param path: String/PathLike, the file
+        :param encoding: String, what the file is written in
+        """
+        self.path = path
+        self.encoding = encoding
+        self.dropped = 0  # never anything, a file keeps all of its lines
+
+        self._file = open(path, 'rb')
+        self._map = None
+        self._size = 0
+        self._offsets = array('Q', [0])  # where each line starts, the last one is the line being written
+        self._lock = threading.Lock()
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Indexes whatever has been added to the file since last time. If the file has got smaller (it was truncated),
+        or the path is now a different file (it was rotated, by moving it away and starting a new one), it is indexed
+        again from the start.
+        :return: Bool, whether anything changed
+        """
+        with self._lock:
+            rotated = self._reopen_if_rotated()
+
+            size = os.fstat(self._file.fileno()).st_size
+            if size == self._size and not rotated:
+                return False
+
+            if size < self._size or rotated:
+                self._offsets = array('Q', [0])
+
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+            # carry on from the start of the last, unfinished, line
+            position = self._offsets[-1]
+            find = self._map.find if self._map is not None else None
+            append = self._offsets.append
+            while position < size:
+                end = find(NEWLINE, position)
+                if end == -1:
+                    break
+                position = end + 1
+                append(position)
+
+            self._size = size
+            return True
+
+    def _reopen_if_rotated(self):
+        """
+        Opens the file at our path again if it isn't the one we have open. Called with the lock held.
+        :return: Bool, whether it was reopened
+        """
+        try:
+            current = os.stat(self.path)
+        except OSError:  # moved away, and nothing has replaced it yet, so there's nothing newer to follow
+            return False
+
+        opened = os.fstat(self._file.fileno())
+        if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+            return False
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self._file = open(self.path, 'rb')
+        return True
+
+    @property
+    def size(self):
+        """
+        :return: int, the bytes indexed so far
+        """
+        return self._size
+
+    def _line(self, i):
+        start = self._offsets[i]
+        end = self._offsets[i + 1] - 1 if i + 1 < len(self._offsets) else self._size
+        return self._map[start:end].decode(self.encoding, errors='replace').rstrip('\r')
+
+    def lines(self, start, stop):
+        """
+        :param start: int, the index of the first line
+        :param stop: int, the index after the last line
+        :return: list<String>, the lines between them, without their line endings
+        """
+        with self._lock:
+            start = max(0, start)
+            stop = min(self._count(), stop)
+            return [self._line(i) for i in range(start, stop)]
+
+    def _count(self):
+        # a line which hasn't been finished yet still counts
+        lines = len(self._offsets) - 1
+        if self._offsets[-1] < self._size:
+            lines += 1
+        return lines
+
+    def close(self):
+        """
+        Releases the file
+        :return: None
+        """
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+    def __getitem__(self, item):
+        with self._lock:
+            count = self._count()
+            if item < 0:
+                item += count
+            if not 0 <= item < count:
+                raise IndexError("LineIndex index out of range")
+            return self._line(item)
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return '<LineIndex path: %r, lines: %r, size: %r>' % (self.path, len(self), self._size)
@@ -0,0 +1,144 @@
+"""
+Rendering in two stages: the application's thread lays out and flattens each frame in to a ScreenBuffer, and an
+output thread diffs and writes it while the next frame is being prepared
+"""
+import time
+import atexit
+import threading
+from pywinterm.display.buffer import ScreenBuffer
+
+
+class OutputPipeline:
+    """
+    Takes flattened frames from the application's thread, and diffs and writes them on a thread of its own.
+
+    A frame handed to submit() belongs to the pipeline from then on, and is never changed again. Once written it
+    becomes the DiffRenderer's last frame, and the buffer that replaces goes back to be flattened in to again, so
+    buffers are swapped between the threads rather than copied. Only the most recent frame waits to be written: if
+    the application submits faster than the terminal can take them, frames are skipped rather than queued, so the
+    write is all that limits how many frames are shown.
+
+    The thread is stopped at exit, after writing the last frame, if stop() hasn't been called by then.
+    """
+    def __init__(self, renderer, stats=None):
+        """
+        Initialise an OutputPipeline, and start its thread
+        :param renderer: DiffRenderer, only used by the output thread from now on
+        :param stats: RenderStats/None, for the FrameStats of submitted frames to be recorded in once written
+        """
+        self.renderer = renderer
+        self.stats = stats
+
+        self.submitted = 0
+        self.written = 0
+        self.skipped = 0  # frames replaced by a newer one before they could be written
+
+        self._pending = None  # tuple<ScreenBuffer, Bool, FrameStats/None, float/None>, the frame to write next
+        self._writing = False
+        self._spares = []  # list<ScreenBuffer>, buffers the output thread has finished with
+        self._stopped = False
+        self._condition = threading.Condition()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def acquire(self, width, height):
+        """
+        Gets a buffer to flatten the next frame in to
+        :param width: int
+        :param height: int
+        :return: ScreenBuffer, with anything in it
+        """
+        with self._condition:
+            while self._spares:
+                screen = self._spares.pop()
+                if screen.size == (width, height):
+                    return screen
+        return ScreenBuffer(width, height)
+
+    def submit(self, screen, full=False, frame=None, first_input=None):
+        """
+        Hands a frame over to be written, without waiting for it to be
+        :param screen: ScreenBuffer, which mustn't be changed from now on
+        :param full: Bool, whether to clear the screen and redraw everything
+        :param frame: FrameStats/None, with the layout and flatten times filled in, for the rest to be
+        :param first_input: float/None, time.monotonic() of the first key read since the last frame
+        :return: None
+        """
+        with self._condition:
+            if self._pending is not None:
+                skipped_screen, skipped_full, _, skipped_input = self._pending
+                full = full or skipped_full
+                if skipped_input is not None:
+                    first_input = skipped_input  # the keys haven't been shown yet either
+                if skipped_screen is not screen:  # the same screen again, when a tap needs a keyframe of it
+                    self._spares.append(skipped_screen)
+                self.skipped += 1
+
+            self._pending = (screen, full, frame, first_input)
+            self.submitted += 1
+            self._condition.notify_all()
+
+    def _run(self):
+        renderer = self.renderer
+
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopped)
+                if self._pending is None:
+                    return
+
+                screen, full, frame, first_input = self._pending
+                self._pending = None
+                self._writing = True
+
+            start = time.perf_counter()
+            output, spare = renderer.encode_owned(screen, full)
+            encoded = time.perf_counter()
+            written_bytes = renderer.write(output)
+            written = time.perf_counter()
+
+            if frame is not None:
+                frame.encode_time = encoded - start
+                frame.write_time = written - encoded
+                frame.tap_time = renderer.last_tap_time if renderer.taps else 0
+                frame.full = renderer.last_full
+                frame.total_time = time.monotonic() - frame.start  # including any wait for the frame before
+                frame.cells_changed = renderer.last_cells_changed if output else 0
+                frame.bytes_written = written_bytes
+                if first_input is not None:
+                    frame.input_latency = time.monotonic() - first_input
+                if self.stats is not None:
+                    frame.number = self.stats.frame_count  # not when it was submitted, as some are skipped
+                    self.stats.record(frame)
+
+            with self._condition:
+                if spare is not None:
+                    self._spares.append(spare)
+                self._writing = False
+                self.written += 1
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Waits for every frame submitted to be written (or skipped)
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Bool, whether they have been
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def stop(self):
+        """
+        Writes the frame waiting to be written, if there is one, then stops the output thread and waits for it to end
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        atexit.unregister(self.stop)
+
+    def __repr__(self):
+        return '<OutputPipeline submitted: %r, written: %r, skipped: %r>' % (self.submitted, self.written, self.skipped)
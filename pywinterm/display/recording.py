@@ -0,0 +1,201 @@
+"""
+Passing the frames a DiffRenderer sends on to somewhere else, without holding up rendering, and recording them as an
+asciicast (v2) file which can be played back with asciinema
+"""
+import json
+import time
+import queue
+import threading
+
+_STOP = object()  # put on the queue to make the consumer finish
+
+
+class FrameQueue:
+    """
+    A bounded queue of the frames a DiffRenderer sends, for a thread of its own to consume (see DiffRenderer.add_tap).
+
+    Putting a frame never waits. If the consumer falls behind and the queue is full, the frame is dropped instead; as
+    later frames only contain what changed, nothing more is queued until there is room for a keyframe, which redraws
+    the whole screen.
+    """
+    def __init__(self, capacity=256):
+        """
+        Initialise a FrameQueue
+        :param capacity: int, the most frames to hold on to while the consumer catches up
+        """
+        self.frames = 0  # frames queued
+        self.dropped = 0  # frames dropped because the queue was full
+        self.overhead = 0  # seconds the render path has spent giving us frames, added up by the DiffRenderer
+
+        self.needs_keyframe = True  # the first frame has to be complete
+
+        self._queue = queue.Queue(capacity)
+
+    def frame(self, output, full, keyframe):
+        """
+        Called by the DiffRenderer with every frame it encodes
+        :param output: String, the frame, '' if nothing changed
+        :param full: Bool, whether the frame redraws the whole screen
+        :param keyframe: function, gives a frame which redraws the whole screen
+        :return: None
+        """
+        if full:
+            self.put_keyframe(output)
+        elif self.needs_keyframe:
+            if self.has_room():
+                self.put_keyframe(keyframe())
+            elif output:
+                self.drop()
+        elif output:
+            self.put(output)
+
+    def put(self, output, is_keyframe=False):
+        """
+        Queues a frame, without waiting. If it has to be dropped, nothing more is queued until a keyframe.
+        :param output: String
+        :param is_keyframe: Bool, whether it redraws the whole screen
+        :return: Bool, whether it was queued
+        """
+        try:
+            self._queue.put_nowait((time.monotonic(), output, is_keyframe))
+        except queue.Full:
+            self.drop()
+            return False
+
+        self.frames += 1
+        return True
+
+    def put_keyframe(self, output):
+        """
+        Queues a frame which redraws the whole screen, so that the frames after it can be used
+        :param output: String
+        :return: Bool, whether it was queued
+        """
+        self.needs_keyframe = False
+        return self.put(output, True)
+
+    def drop(self):
+        """
+        Notes that a frame couldn't be queued
+        :return: None
+        """
+        self.dropped += 1
+        self.needs_keyframe = True
+
+    def has_room(self):
+        """
+        :return: Bool, whether a frame can be queued without being dropped
+        """
+        return not self._queue.full()
+
+    @property
+    def mean_overhead(self):
+        """
+        :return: float, the mean seconds queueing (or dropping) a frame has added to rendering it
+        """
+        attempts = self.frames + self.dropped
+        return self.overhead / attempts if attempts else 0
+
+    def batches(self, limit=256):
+        """
+        For the consumer, waits for frames and gives back everything queued at once, until finish() is called
+        :param limit: int, the most frames in a batch
+        :return: generator<list<tuple<float, String, Bool>>>, (time.monotonic() when queued, frame, is_keyframe)
+        """
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < limit:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+
+            if batch:
+                yield batch
+
+            if stopping:
+                return
+
+    def discard(self):
+        """
+        Throws away every frame which hasn't been consumed yet
+        :return: None
+        """
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def finish(self, final=None):
+        """
+        Makes batches() finish, once the consumer has had everything already queued
+        :param final: String/None, a keyframe to end with, waiting for room for it if need be
+        :return: None
+        """
+        if final is not None:
+            self._queue.put((time.monotonic(), final, True))
+            self.frames += 1
+            self.needs_keyframe = False
+        self._queue.put(_STOP)
+
+
+class SessionRecorder(FrameQueue):
+    """
+    Records every frame a DiffRenderer sends, with the time it was sent.
+
+    Frames are written by a background thread in batches, so recording costs the render path little more than a put.
+    """
+    def __init__(self, path, width, height, title="", capacity=256):
+        """
+        Initialise a SessionRecorder, and start its writer
+        :param path: String/PathLike, the file to record to, which is replaced
+        :param width: int, the width of the terminal
+        :param height: int, the height of the terminal
+        :param title: String
+        :param capacity: int, the most frames to hold on to while the writer catches up
+        """
+        super(SessionRecorder, self).__init__(capacity)
+
+        self.path = path
+        self.bytes_written = 0  # bytes written to the file
+
+        self._start = time.monotonic()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(json.dumps({
+            'version': 2,
+            'width': width,
+            'height': height,
+            'timestamp': int(time.time()),
+            'title': title,
+        }) + '\n')
+
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def _write(self):
+        for batch in self.batches():
+            data = ''.join([
+                json.dumps([round(queued - self._start, 6), 'o', output]) + '\n' for queued, output, _ in batch
+            ])
+            self._file.write(data)
+            self._file.flush()
+            self.bytes_written += len(data)
+
+    def stop(self, final=None):
+        """
+        Writes everything which is still queued, and closes the file
+        :param final: String/None, a keyframe to end the recording with, waiting for room for it if need be
+        :return: None
+        """
+        if self._writer.is_alive():
+            self.finish(final)
+            self._writer.join()
+        self._file.close()
+
+    def __repr__(self):
+        return '<SessionRecorder path: %r, frames: %r, dropped: %r>' % (self.path, self.frames, self.dropped)
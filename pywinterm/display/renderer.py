@@ -0,0 +1,291 @@
+"""
+Damage-tracked rendering of flattened screens
+"""
+import time
+from pywinterm.display import style, util
+from pywinterm.display.buffer import ScreenBuffer, CONTINUATION, decode
+
+# Special
+CLEAR_SCREEN = "\033[2J"
+CURSOR_HOME = "\033[H"
+RESET_STYLE = "\033[0m"
+
+# runs of changed cells separated by fewer unchanged cells than this are merged, as re-sending a few cells is
+# cheaper than the cursor movement needed to skip them
+MERGE_GAP = 4
+
+
+def move_cursor(x, y):
+    """
+    Generates the sequence to move the cursor
+    :param x: int, column (from 0)
+    :param y: int, row (from 0)
+    :return: String
+    """
+    return "\033[{};{}H".format(y + 1, x + 1)
+
+
+def changed_runs(screen, previous, y):
+    """
+    Compares a row of two buffers and finds the runs of cells which have changed
+    :param screen: ScreenBuffer, the new frame
+    :param previous: ScreenBuffer, the frame as it was last emitted
+    :param y: int, the row
+    :return: list<tuple<int, int>>, (start, end) pairs, end exclusive
+    """
+    chars, styles = screen.row(y)
+    previous_chars, previous_styles = previous.row(y)
+
+    runs = []
+    width = screen.width
+
+    for i in range(width):
+        if chars[i] != previous_chars[i] or styles[i] != previous_styles[i]:
+            # a wide character is always sent whole, so a run can't start or end in the middle of one
+            start = i - 1 if chars[i] == CONTINUATION and i > 0 else i
+            end = i + 2 if i + 1 < width and chars[i + 1] == CONTINUATION else i + 1
+
+            if runs and start - runs[-1][1] < MERGE_GAP:
+                runs[-1][1] = max(runs[-1][1], end)
+            else:
+                runs.append([start, end])
+
+    return [tuple(run) for run in runs]
+
+
+class DiffRenderer:
+    """
+    Keeps the last frame which was emitted, and only emits the cells which have changed since then
+    """
+    def __init__(self, backend=None, styles=style.TABLE):
+        """
+        Initialise a DiffRenderer
+        :param backend: Backend, where to write frames to, defaults to the terminal's backend
+        :param styles: StyleTable, the table the style ids in the frames refer to
+        """
+        self.backend = backend if backend is not None else util.get_backend()
+        self.styles = styles
+
+        self.previous = None  # ScreenBuffer, a copy of the last frame emitted
+        self.taps = []  # given every frame encoded, see add_tap()
+
+        self.last_frame_bytes = 0  # bytes written for the last frame, 0 if nothing had changed
+        self.last_cells_changed = 0  # cells sent for the last frame
+        self.last_full = False  # whether the last frame redrew the whole screen, asked for or not
+        self.bytes_written = 0  # bytes written for every frame so far
+        self.last_tap_time = 0  # seconds the taps took over the last frame
+
+    def reset(self):
+        """
+        Forget the last frame, so the next render clears the screen and redraws everything
+        :return: None
+        """
+        self.previous = None
+
+    def encode_run(self, screen, y, start, end, current=0):
+        """
+        Generates the escape sequences and characters for part of a row. Only the difference between adjacent styles
+        is emitted, rather than ending one style and starting the next.
+        :param screen: ScreenBuffer
+        :param y: int, the row
+        :param start: int, the first column
+        :param end: int, the column after the last
+        :param current: int, the id of the style in effect before the run
+        :return: tuple<list<String>, int>, the output and the id of the style in effect after it
+        """
+        chars, styles = screen.row(y)
+
+        out = []
+
+        i = start
+        while i < end:
+            style_id = styles[i]
+
+            j = i + 1
+            while j < end and styles[j] == style_id:
+                j += 1
+
+            if style_id != current:
+                out.append(self.styles.transition(current, style_id))
+                current = style_id
+
+            out.append(decode(chars[i:j]))
+            i = j
+
+        return out, current
+
+    def full_frame(self, screen):
+        """
+        Generates the output needed to redraw the whole screen
+        :param screen: ScreenBuffer
+        :return: String
+        """
+        out = [RESET_STYLE, CLEAR_SCREEN, CURSOR_HOME]
+        current = 0
+
+        for y in range(screen.height):
+            out.append(move_cursor(0, y))
+            run, current = self.encode_run(screen, y, 0, screen.width, current)
+            out.extend(run)
+
+        out.append(self.styles.transition(current, 0))
+
+        return ''.join(out)
+
+    def diff_frame(self, screen):
+        """
+        Generates the output needed to turn the last emitted frame in to this one
+        :param screen: ScreenBuffer
+        :return: String
+        """
+        out = []
+        current = 0
+        cells = 0
+
+        for y in range(screen.height):
+            if screen.row_equals(self.previous, y):
+                continue
+
+            for start, end in changed_runs(screen, self.previous, y):
+                cells += end - start
+                out.append(move_cursor(start, y))  # moving the cursor keeps the current style
+                run, current = self.encode_run(screen, y, start, end, current)
+                out.extend(run)
+
+        out.append(self.styles.transition(current, 0))
+        self.last_cells_changed = cells
+
+        return ''.join(out)
+
+    def _encode(self, screen, full):
+        """
+        Generates a frame, and gives it to the taps
+        :param screen: ScreenBuffer
+        :param full: Bool
+        :return: tuple<String, Bool>, the frame and whether it redraws everything
+        """
+        if full or self.previous is None or self.previous.size != screen.size:
+            full = True
+            frame = self.full_frame(screen)
+            self.last_cells_changed = screen.width * screen.height
+        else:
+            frame = self.diff_frame(screen)
+
+        if frame:
+            frame += move_cursor(0, screen.height)  # leave the cursor below the display
+
+        self.last_full = full
+
+        if self.taps:
+            self._tap(screen, frame, full)
+
+        return frame, full
+
+    def encode(self, screen, full=False):
+        """
+        Generates a frame, and remembers it as the last one emitted
+        :param screen: ScreenBuffer
+        :param full: Bool, whether to clear the screen and redraw everything
+        :return: String, '' if nothing has changed
+        """
+        frame, full = self._encode(screen, full)
+
+        if full:
+            self.previous = ScreenBuffer(screen.width, screen.height)
+        self.previous.copy_from(screen)
+
+        return frame
+
+    def encode_owned(self, screen, full=False):
+        """
+        encode(), but keeping the screen itself as the last frame emitted rather than a copy of it, so it mustn't be
+        changed afterwards
+        :param screen: ScreenBuffer
+        :param full: Bool, whether to clear the screen and redraw everything
+        :return: tuple<String, ScreenBuffer/None>, the frame, and the buffer which was the last frame emitted, to be
+        reused
+        """
+        frame, full = self._encode(screen, full)
+
+        spare = self.previous if self.previous is not screen else None
+        self.previous = screen
+
+        return frame, spare
+
+    def add_tap(self, tap):
+        """
+        Adds something to be given every frame as it is encoded, e.g. a SessionRecorder. Safe to call from any thread.
+        :param tap: object with a frame(output, full, keyframe) method, see FrameQueue.frame(), a needs_keyframe
+        attribute, and an overhead attribute which the seconds spent in it are added to
+        :return: None
+        """
+        self.taps = self.taps + [tap]  # replaced rather than changed, so a frame being encoded isn't disturbed
+
+    def remove_tap(self, tap):
+        """
+        :param tap: object
+        :return: None
+        """
+        self.taps = [t for t in self.taps if t is not tap]
+
+    def keyframe_needed(self):
+        """
+        :return: Bool, whether a tap is waiting for a keyframe, so the next frame has to be encoded even if nothing
+        has changed
+        """
+        return any([tap.needs_keyframe for tap in self.taps])
+
+    def keyframe(self, screen=None):
+        """
+        Generates a frame which redraws the whole screen, without it counting as sent
+        :param screen: ScreenBuffer, defaults to the last frame emitted
+        :return: String, '' if nothing has been emitted yet
+        """
+        if screen is None:
+            screen = self.previous
+            if screen is None:
+                return ''
+        return self.full_frame(screen) + move_cursor(0, screen.height)
+
+    def _tap(self, screen, frame, full):
+        """
+        Gives a frame to every tap. A keyframe is only generated if one of them needs it, and then only once.
+        :param screen: ScreenBuffer
+        :param frame: String, from encode()
+        :param full: Bool, whether the frame redraws the whole screen
+        :return: None
+        """
+        keyframes = []
+
+        def keyframe():
+            if not keyframes:
+                keyframes.append(self.keyframe(screen))
+            return keyframes[0]
+
+        start = time.perf_counter()
+        for tap in self.taps:
+            tap_start = time.perf_counter()
+            tap.frame(frame, full, keyframe)
+            tap.overhead += time.perf_counter() - tap_start
+        self.last_tap_time = time.perf_counter() - start
+
+    def write(self, frame):
+        """
+        Sends a frame from encode() to the backend, all in one write
+        :param frame: String
+        :return: int, the number of bytes written
+        """
+        self.last_frame_bytes = self.backend.write_frame(frame) if frame else 0
+        self.bytes_written += self.last_frame_bytes
+        return self.last_frame_bytes
+
+    def render(self, screen, full=False):
+        """
+        Emits a frame
+        :param screen: ScreenBuffer
+        :param full: Bool, whether to clear the screen and redraw everything
+        :return: String, what was written to the output
+        """
+        frame = self.encode(screen, full)
+        self.write(frame)
+        return frame
@@ -0,0 +1,215 @@
+"""
+Scheduling of frames, so that rendering only happens when something has changed
+"""
+import time
+import asyncio
+import threading
+
+
+class FrameScheduler:
+    """
+    Renders a RootDisplay when it has been invalidated, at most once per frame interval.
+
+    Any number of invalidations between frames are coalesced in to one render, and nothing at all happens while
+    nothing is invalidated. A FrameScheduler has set() and is_set() so it can be passed anywhere a rerender_event is
+    expected, e.g. TextInput.focus(rerender_event=root.scheduler).
+    """
+    def __init__(self, root, max_fps=60):
+        """
+        Initialise a FrameScheduler
+        :param root: RootDisplay, what to render
+        :param max_fps: float/None, the most frames to render per second, None for no limit
+        """
+        self.root = root
+        self.max_fps = max_fps
+
+        self.frame_count = 0
+        self.overrun_count = 0  # frames which took longer than the frame interval
+        self.last_frame_time = 0  # seconds the last frame took to render
+
+        self._dirty = False
+        self._full = False
+        self._stopped = False
+        self._last_frame = None  # time.monotonic() when the last frame started
+        self._condition = threading.Condition()
+        self._overrun_callbacks = []
+
+        self._loop = None  # the event loop of run_async, and the asyncio.Event which wakes it up
+        self._async_event = None
+
+    @property
+    def frame_interval(self):
+        """
+        :return: float, the least seconds between the start of one frame and the next
+        """
+        return 1 / self.max_fps if self.max_fps else 0
+
+    def add_overrun_callback(self, callback):
+        """
+        Adds a function to be called whenever a frame takes longer than the frame interval to render
+        :param callback: function, called with the seconds the frame took and the frame interval
+        :return: None
+        """
+        self._overrun_callbacks.append(callback)
+
+    def remove_overrun_callback(self, callback):
+        """
+        :param callback: function
+        :return: None
+        """
+        self._overrun_callbacks.remove(callback)
+
+    def invalidate(self, full=False):
+        """
+        Requests a render, safe to call from any thread
+        :param full: Bool, clear the screen and redraw everything
+        :return: None
+        """
+        with self._condition:
+            self._dirty = True
+            self._full = self._full or full
+            self._condition.notify_all()
+            self._wake_async()
+
+    set = invalidate  # so we can be used as a rerender_event
+
+    def is_set(self):
+        """
+        :return: Bool, whether a render has been requested
+        """
+        return self._dirty
+
+    def stop(self):
+        """
+        Makes run() or run_async() return, or the next one to be called if neither is running
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            self._wake_async()
+
+    def _wake_async(self):
+        """
+        Wakes run_async() up, if it is running. Called with the condition held, so the loop can't be gone by the time
+        it is woken.
+        :return: None
+        """
+        if self._async_event is not None:
+            self._loop.call_soon_threadsafe(self._async_event.set)
+
+    def _until_next_frame(self):
+        """
+        :return: float, seconds until the frame interval has passed since the last frame
+        """
+        if self._last_frame is None:
+            return 0
+        return max(0, self._last_frame + self.frame_interval - time.monotonic())
+
+    def render(self):
+        """
+        Renders a frame now, if one has been requested
+        :return: Bool, whether a frame was rendered
+        """
+        with self._condition:
+            if not self._dirty:
+                return False
+            full = self._full
+            self._dirty = self._full = False
+
+        start = time.monotonic()
+        self._last_frame = start
+
+        self.root.render(full)
+
+        self.last_frame_time = time.monotonic() - start
+        self.frame_count += 1
+
+        if self.max_fps and self.last_frame_time > self.frame_interval:
+            self.overrun_count += 1
+            for callback in self._overrun_callbacks:
+                callback(self.last_frame_time, self.frame_interval)
+
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Blocks until a render has been requested and the frame interval has passed since the last frame
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Bool, whether a frame is due (False after a timeout or stop())
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return False
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                if not self._dirty:
+                    self._condition.wait(remaining)  # no timeout of our own, there's nothing to do until invalidated
+                    continue
+
+                until_next = self._until_next_frame()
+                if until_next <= 0:
+                    return True
+
+                self._condition.wait(until_next if remaining is None else min(until_next, remaining))
+
+    def run(self):
+        """
+        Renders frames as they are requested, until stop() is called. The first frame is rendered straight away.
+        :return: None
+        """
+        self.invalidate()
+
+        try:
+            while self.wait():
+                self.render()
+        finally:
+            self._reset_stopped()
+
+    async def run_async(self):
+        """
+        Renders frames as they are requested, from a coroutine, until stop() is called or the task is cancelled
+        :return: None
+        """
+        with self._condition:
+            self._loop = asyncio.get_running_loop()
+            self._async_event = asyncio.Event()
+        self.invalidate()
+
+        try:
+            while not self._stopped:
+                await self._async_event.wait()
+                self._async_event.clear()
+
+                until_next = self._until_next_frame()
+                if until_next > 0:
+                    await asyncio.sleep(until_next)
+
+                self.render()
+                await asyncio.sleep(0)
+        finally:
+            with self._condition:
+                self._async_event = None
+                self._loop = None
+            self._reset_stopped()
+
+    def _reset_stopped(self):
+        """
+        Forgets stop() once run() or run_async() has returned because of it, so they can be run again
+        :return: None
+        """
+        with self._condition:
+            self._stopped = False
+
+    def __repr__(self):
+        return '<FrameScheduler max_fps: %r, frames: %r, overruns: %r>' % (
+            self.max_fps,
+            self.frame_count,
+            self.overrun_count
+        )
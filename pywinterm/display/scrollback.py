@@ -0,0 +1,101 @@
+"""
+A bounded buffer of lines, for Displays used as logs
+"""
+import threading
+
+
+class Scrollback:
+    """
+    Keeps the last `capacity` lines added to it, forgetting the oldest as new ones arrive.
+
+    The lines are kept in a ring of fixed size, so memory stays the same however many lines are added, and any line
+    can be got in the same time. Lines can be added from one thread while another reads them.
+    """
+    def __init__(self, capacity=1000, lines=()):
+        """
+        Initialise a Scrollback
+        :param capacity: int, the most lines to keep
+        :param lines: iterable, lines to start with
+        """
+        if capacity < 1:
+            raise ValueError("A Scrollback has to be able to keep at least one line")
+
+        self.capacity = capacity
+        self.dropped = 0  # how many lines have been forgotten, ever
+
+        self._lines = [None] * capacity
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+        self.extend(lines)
+
+    def append(self, line):
+        """
+        Adds a line after the newest one
+        :param line: String/Widget
+        :return: list, the line which had to be forgotten to make room, if there was one
+        """
+        return self.extend((line,))
+
+    def extend(self, lines):
+        """
+        Adds lines after the newest one
+        :param lines: iterable<String/Widget>
+        :return: list, the lines which had to be forgotten to make room, oldest first
+        """
+        dropped = []
+        capacity = self.capacity
+
+        with self._lock:
+            for line in lines:
+                if self._count < capacity:
+                    self._lines[(self._start + self._count) % capacity] = line
+                    self._count += 1
+                else:
+                    dropped.append(self._lines[self._start])
+                    self._lines[self._start] = line
+                    self._start = (self._start + 1) % capacity
+
+            self.dropped += len(dropped)
+
+        return dropped
+
+    def clear(self):
+        """
+        Forgets every line
+        :return: None
+        """
+        with self._lock:
+            self._lines = [None] * self.capacity
+            self._start = 0
+            self._count = 0
+
+    def lines(self, start, stop):
+        """
+        :param start: int, the index of the first line, 0 is the oldest
+        :param stop: int, the index after the last line
+        :return: list, the lines between them
+        """
+        with self._lock:
+            start = max(0, start)
+            stop = min(self._count, stop)
+            return [self._lines[(self._start + i) % self.capacity] for i in range(start, stop)]
+
+    def __getitem__(self, item):
+        with self._lock:
+            if item < 0:
+                item += self._count
+            if not 0 <= item < self._count:
+                raise IndexError("Scrollback index out of range")
+
+            return self._lines[(self._start + item) % self.capacity]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.lines(0, self.capacity))
+
+    def __repr__(self):
+        return '<Scrollback capacity: %r, lines: %r, dropped: %r>' % (self.capacity, self._count, self.dropped)
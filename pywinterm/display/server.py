@@ -0,0 +1,309 @@
+"""
+Serving one RootDisplay to any number of terminals over TCP or Unix sockets.
+
+The Display tree is flattened and diffed once per frame, as usual, and each frame is sent on to every client. A client
+only needs a raw terminal on the other end of the socket, e.g.
+
+    socat -,raw,echo=0 TCP:localhost:7000
+"""
+import os
+import socket
+import threading
+import collections
+from pywinterm import key
+from pywinterm.key.reader import KeyReader
+from pywinterm.key.parser import InputParser
+from pywinterm.display import recording, backend
+
+# bytes the OS buffers for each client. Kept small, so that a slow client's frames back up in to its queue, where
+# they can be skipped, rather than in to the OS's, where they'd all be sent however stale they were
+SEND_BUFFER = 64 * 1024
+
+
+class SocketKeyReader(KeyReader):
+    """
+    Gives out the keys typed in to whichever client of a DisplayServer has input
+    """
+    def __init__(self):
+        self._keys = collections.deque()
+        self._condition = threading.Condition()
+        self._interrupts = 0  # interrupt()s so far, so a wait is only cut short by the ones after it started
+
+    def push(self, keys):
+        """
+        Adds keys for the next read()s
+        :param keys: list<Key/Paste>
+        :return: None
+        """
+        with self._condition:
+            self._keys.extend(keys)
+            self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        with self._condition:
+            interrupts = self._interrupts
+            self._condition.wait_for(lambda: self._keys or self._interrupts != interrupts, timeout)
+            return bool(self._keys)
+
+    def read(self, timeout=None):
+        with self._condition:
+            if not self._keys:
+                interrupts = self._interrupts
+                self._condition.wait_for(lambda: self._keys or self._interrupts != interrupts, timeout)
+            return self._keys.popleft() if self._keys else None
+
+    def read_available(self):
+        with self._condition:
+            keys = list(self._keys)
+            self._keys.clear()
+        return keys
+
+    def interrupt(self):
+        with self._condition:
+            self._interrupts += 1
+            self._condition.notify_all()
+
+    def __repr__(self):
+        return '<SocketKeyReader pending: %r>' % len(self._keys)
+
+
+class Client(recording.FrameQueue):
+    """
+    A terminal connected to a DisplayServer.
+
+    Frames are queued for it as they are rendered and sent by a thread of its own, so a slow client doesn't hold up
+    rendering or the other clients. When it falls behind, the frames it has no room for are skipped, and it is sent a
+    keyframe once it has caught up; if a batch of queued frames has a keyframe in it, the frames before it aren't sent.
+    """
+    def __init__(self, server, sock, address, capacity=32):
+        """
+        Initialise a Client
+        :param server: DisplayServer
+        :param sock: socket.socket, connected to the client
+        :param address: the client's address
+        :param capacity: int, the most frames to queue for it
+        """
+        super(Client, self).__init__(capacity)
+
+        self.server = server
+        self.sock = sock
+        self.address = address
+
+        self.bytes_sent = 0
+        self.skipped = 0  # frames queued but left out because a later keyframe replaced them
+
+        self._parser = InputParser()
+        self._sender = threading.Thread(target=self._send, daemon=True)
+        self._receiver = threading.Thread(target=self._receive, daemon=True)
+
+    def start(self):
+        """
+        Starts sending frames to the client, and reading what it types
+        :return: None
+        """
+        self._sender.start()
+        self._receiver.start()
+
+    def _send(self):
+        try:
+            self._send_all(backend.BRACKETED_PASTE_ON + backend.SET_TITLE.format(self.server.root.title))
+
+            for batch in self.batches():
+                first = 0
+                for i, (_, _, is_keyframe) in enumerate(batch):
+                    if is_keyframe:
+                        first = i
+                self.skipped += first
+
+                output = ''.join([frame for _, frame, _ in batch[first:]])
+                if self.server.synchronized:
+                    output = backend.SYNC_BEGIN + output + backend.SYNC_END
+                self._send_all(output)
+
+                if self.needs_keyframe:
+                    # we've skipped frames, and now that we've caught up a frame is needed to send the keyframe with,
+                    # even if nothing changes
+                    self.server.root.scheduler.invalidate()
+        except OSError:  # they've gone
+            self.server.disconnect(self)
+
+    def _send_all(self, output):
+        data = output.encode('utf-8')
+        self.sock.sendall(data)
+        self.bytes_sent += len(data)
+
+    def _receive(self):
+        parser = self._parser
+        try:
+            while True:
+                # wait for the rest of an escape sequence for only so long, so a lone escape is still a key
+                self.sock.settimeout(parser.timeout if parser.pending else None)
+                try:
+                    data = self.sock.recv(4096)
+                except socket.timeout:
+                    keys = parser.flush()
+                else:
+                    if not data:
+                        break
+                    keys = parser.feed(data)
+
+                if keys and self.server.input_client is self:
+                    self.server.reader.push(keys)
+                    key._input_received()
+        except OSError:
+            pass
+
+        self.server.disconnect(self)
+
+    def close(self):
+        """
+        Disconnects the client, throwing away any frames which haven't been sent
+        :return: None
+        """
+        self.discard()
+        self.finish()
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __repr__(self):
+        return '<Client address: %r, frames: %r, dropped: %r>' % (self.address, self.frames, self.dropped)
+
+
+class DisplayServer:
+    """
+    Sends everything a RootDisplay renders to every client connected to a socket, and (optionally) gives the keys
+    typed by one of them to the application, as if they had been typed in to its own terminal.
+
+    Clients which connect late are sent a keyframe of the whole screen, then the changes from frame to frame like
+    everyone else.
+    """
+    def __init__(self, root, address, capacity=32, route_input=True, synchronized=False):
+        """
+        Initialise a DisplayServer
+        :param root: RootDisplay, what to serve
+        :param address: tuple<String, int> for TCP, (host, port) with port 0 for any free port, or String, the path of
+        a Unix socket
+        :param capacity: int, the most frames to queue for each client before skipping frames
+        :param route_input: Bool, whether keys from the input_client are read in place of the terminal's
+        :param synchronized: Bool, whether to wrap what is sent in synchronized update markers
+        """
+        self.root = root
+        self.address = address
+        self.capacity = capacity
+        self.route_input = route_input
+        self.synchronized = synchronized
+
+        self.clients = []  # list<Client>, oldest first
+        self.input_client = None  # Client/None, whose keys are read, the oldest client unless set_input_client()
+        self.reader = SocketKeyReader()
+
+        self._socket = None
+        self._path = None  # of a Unix socket
+        self._previous_reader = None
+        self._lock = threading.Lock()
+        self._acceptor = None
+
+    def start(self):
+        """
+        Starts listening for clients
+        :return: None
+        """
+        if isinstance(self.address, (str, bytes, os.PathLike)):
+            self.address = self._path = os.fspath(self.address)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            if os.path.exists(self._path):
+                os.unlink(self._path)  # left behind by a server which didn't stop
+        else:
+            self._socket = socket.socket(socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        self._socket.bind(self.address)
+        self._socket.listen()
+        self.address = self._socket.getsockname()  # the port, if we were given 0
+
+        if self.route_input:
+            self._previous_reader = key._reader  # not get_reader(), there may not be a terminal to read from at all
+            key.set_reader(self.reader)
+
+        self._acceptor = threading.Thread(target=self._accept, daemon=True)
+        self._acceptor.start()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self._socket.accept()
+            except OSError:  # stop() has closed the socket
+                return
+
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+            if sock.family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # frames are already sent in one go
+            client = Client(self, sock, address, self.capacity)
+
+            with self._lock:
+                self.clients.append(client)
+                if self.input_client is None:
+                    self.input_client = client
+
+            self.root.renderer.add_tap(client)
+            client.start()
+            self.root.scheduler.invalidate()  # so a keyframe is sent, even if nothing changes
+
+    def set_input_client(self, client):
+        """
+        Chooses which client's keys are read
+        :param client: Client/None, None to ignore every client's keys
+        :return: None
+        """
+        self.input_client = client
+
+    def disconnect(self, client):
+        """
+        Disconnects a client. If it had input, the oldest remaining client is given it.
+        :param client: Client
+        :return: None
+        """
+        with self._lock:
+            if client not in self.clients:
+                return
+
+            self.clients.remove(client)
+            if self.input_client is client:
+                self.input_client = self.clients[0] if self.clients else None
+
+        self.root.renderer.remove_tap(client)
+        client.close()
+
+    def stop(self):
+        """
+        Disconnects everyone and stops listening, and gives the terminal's keys back to the application
+        :return: None
+        """
+        if self._socket is None:
+            return
+
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)  # wakes up accept(), which closing alone doesn't
+        except OSError:
+            pass
+        self._socket.close()
+        self._socket = None
+        self._acceptor.join()
+
+        for client in list(self.clients):
+            self.disconnect(client)
+
+        if self.route_input:
+            key.set_reader(self._previous_reader)
+            self._previous_reader = None
+        self.reader.interrupt()
+
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def __repr__(self):
+        return '<DisplayServer address: %r, clients: %r>' % (self.address, len(self.clients))
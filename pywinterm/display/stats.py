@@ -0,0 +1,188 @@
+"""
+Per-frame performance statistics for RootDisplays
+"""
+import json
+import collections
+from pywinterm import key
+
+
+class FrameStats:
+    """
+    How long each part of rendering one frame took, and what it sent. Times are in seconds.
+    """
+    __slots__ = (
+        'number',  # frames recorded before this one
+        'start',  # time.monotonic() when the frame started
+        'full',  # whether the whole screen was redrawn
+        'layout_time',  # arranging Displays
+        'flatten_time',  # rasterizing Displays and putting them together in to the screen buffer
+        'encode_time',  # working out the escape sequences and characters to send
+        'write_time',  # sending them to the terminal
+        'tap_time',  # handing them to recorders and servers (DiffRenderer taps), part of encode_time
+        'total_time',
+        'cells_changed',
+        'bytes_written',
+        'input_latency',  # from the first key read since the last frame to the end of this one, or None
+    )
+
+    def __init__(self, number, start, full=False):
+        """
+        Initialise a FrameStats, the rest are filled in as the frame is rendered
+        :param number: int
+        :param start: float
+        :param full: Bool, whether a full frame was asked for, until the renderer says whether it drew one
+        """
+        self.number = number
+        self.start = start
+        self.full = full
+
+        self.layout_time = 0
+        self.flatten_time = 0
+        self.encode_time = 0
+        self.write_time = 0
+        self.tap_time = 0
+        self.total_time = 0
+        self.cells_changed = 0
+        self.bytes_written = 0
+        self.input_latency = None
+
+    def as_dict(self):
+        """
+        :return: dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return '<FrameStats number: %r, total_time: %r, cells_changed: %r, bytes_written: %r>' % (
+            self.number,
+            self.total_time,
+            self.cells_changed,
+            self.bytes_written
+        )
+
+
+class RenderStats:
+    """
+    Collects FrameStats for a RootDisplay, keeping the most recent `history` of them.
+
+    Nothing is timed until enable() is called, and while disabled the only cost to a frame is checking `enabled`.
+    Hooks are called with every FrameStats as it is recorded, and enable() can also stream them to a file, as one JSON
+    object per line.
+    """
+    def __init__(self, history=120):
+        """
+        Initialise a RenderStats
+        :param history: int, how many recent frames to keep
+        """
+        self.enabled = False
+        self.frames = collections.deque(maxlen=history)
+        self.frame_count = 0
+
+        self._hooks = []
+        self._stream = None
+        self._first_input = None  # time.monotonic() of the first key read since the last frame started
+
+    def enable(self, path=None):
+        """
+        Starts collecting stats
+        :param path: String/None, a file to append every frame's stats to, as JSON lines
+        :return: None
+        """
+        if path is not None:
+            if self._stream is not None:
+                self._stream.close()
+            self._stream = open(path, 'a', buffering=1)
+
+        if not self.enabled:
+            self.enabled = True
+            key.add_input_listener(self.input_received)
+
+    def disable(self):
+        """
+        Stops collecting stats, and closes the file they were being streamed to
+        :return: None
+        """
+        if self.enabled:
+            self.enabled = False
+            key.remove_input_listener(self.input_received)
+
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def add_hook(self, hook):
+        """
+        Adds a function to be called with the stats of every frame, once it has been rendered
+        :param hook: function, called with a FrameStats
+        :return: None
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        :param hook: function
+        :return: None
+        """
+        self._hooks.remove(hook)
+
+    def input_received(self, timestamp):
+        """
+        Notes that keys have been read, so that the next frame can work out how long they took to show up
+        :param timestamp: float, time.monotonic() when they were read
+        :return: None
+        """
+        if self._first_input is None:
+            self._first_input = timestamp
+
+    def take_input(self):
+        """
+        :return: float/None, time.monotonic() of the first key read since this was last called
+        """
+        first = self._first_input
+        self._first_input = None
+        return first
+
+    def record(self, frame):
+        """
+        Adds the stats of a frame which has finished rendering
+        :param frame: FrameStats
+        :return: None
+        """
+        self.frames.append(frame)
+        self.frame_count += 1
+
+        for hook in list(self._hooks):
+            hook(frame)
+
+        if self._stream is not None:
+            self._stream.write(json.dumps(frame.as_dict()) + '\n')
+
+    @property
+    def last(self):
+        """
+        :return: FrameStats/None, the most recent frame
+        """
+        return self.frames[-1] if self.frames else None
+
+    def summary(self):
+        """
+        :return: dict, the mean of every timing and count over the recent frames, and the slowest total_time
+        """
+        frames = list(self.frames)
+        if not frames:
+            return {}
+
+        result = {}
+        for name in ('layout_time', 'flatten_time', 'encode_time', 'write_time', 'tap_time', 'total_time',
+                     'cells_changed', 'bytes_written'):
+            result[name] = sum([getattr(frame, name) for frame in frames]) / len(frames)
+
+        latencies = [frame.input_latency for frame in frames if frame.input_latency is not None]
+        result['input_latency'] = sum(latencies) / len(latencies) if latencies else None
+        result['max_total_time'] = max([frame.total_time for frame in frames])
+        result['frames'] = len(frames)
+
+        return result
+
+    def __repr__(self):
+        return '<RenderStats enabled: %r, frames: %r>' % (self.enabled, self.frame_count)
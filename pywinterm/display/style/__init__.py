@@ -1,7 +1,9 @@
 """
 Styles for text
 """
+import os
 import platform
+import threading
 from . import background, foreground, alignment
 
 # Special
@@ -14,44 +16,199 @@ BOLD = "1"
 UNDERLINE = "4"
 INVERSE = "7"
 
+# Codes which undo a single attribute, so we don't always need to reset everything
+DEFAULT_FORE = "39"
+DEFAULT_BACK = "49"
+STYLE_OFF = {
+    BOLD: "22",
+    UNDERLINE: "24",
+    INVERSE: "27",
+}
+
+
+def detect_colour_support():
+    """
+    Works out whether the terminal understands escape sequences for colour
+    :return: Bool
+    """
+    if platform.system() == 'Windows':
+        return platform.release() in ("10", "11")  # colours only work on Windows 10 onwards
+    else:
+        return os.environ.get('TERM') != 'dumb'
+
+
+COLOUR_ENABLED = detect_colour_support()  # detected once, rather than every time a sequence is needed
+
 
 class Style:
-    def __init__(self, fore=None, back=None, style=None):
-        self.fore = fore
-        self.back = back
-        self.style = style
+    """
+    An immutable combination of foreground, background and style.
 
-    @property
-    def start_sequence(self):
-        """
-        :return: String, the starting sequence for the Style
-        """
-        if platform.uname().release == "10":  # colours only work on Windows 10
-            if self.fore and self.back and self.style:
-                return ESCAPE_SEQUENCE + self.fore + ";" + self.back + ';' + self.style + 'm'
-            elif self.fore and self.back:
-                return ESCAPE_SEQUENCE + self.fore + ";" + self.back + 'm'
-            elif self.fore and self.style:
-                return ESCAPE_SEQUENCE + self.fore + ";" + self.style + 'm'
-            elif self.back and self.style:
-                return ESCAPE_SEQUENCE + self.back + ";" + self.style + 'm'
-            elif self.style:
-                return ESCAPE_SEQUENCE + self.style + 'm'
-            elif self.fore:
-                return ESCAPE_SEQUENCE + self.fore + 'm'
-            elif self.back:
-                return ESCAPE_SEQUENCE + self.back + 'm'
-            else:
-                return END
-        else:
-            return ''
+    Styles are interned, so Style(fore, back, style) always gives back the same object for the same arguments, which
+    has a small integer id and its escape sequences worked out in advance.
+    """
+    __slots__ = ('fore', 'back', 'style', 'id', 'start_sequence', 'end_sequence')
+
+    def __new__(cls, fore=None, back=None, style=None):
+        return TABLE.intern(fore, back, style)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Styles are immutable, create a new Style instead")
+
+    def __delattr__(self, item):
+        raise AttributeError("Styles are immutable, create a new Style instead")
+
+    def __reduce__(self):
+        return Style, (self.fore, self.back, self.style)
 
     @property
-    def end_sequence(self):
-        if platform.uname().release == "10":  # colours only work on Windows 10
-            return END
+    def codes(self):
+        """
+        :return: list<String>, the SGR codes for the Style
+        """
+        return [code for code in (self.fore, self.back, self.style) if code]
+
+    def _update_sequences(self):
+        """
+        Works out the escape sequences for the style, to be called whenever COLOUR_ENABLED changes
+        :return: None
+        """
+        if COLOUR_ENABLED:
+            codes = self.codes
+            start = ESCAPE_SEQUENCE + ';'.join(codes) + 'm' if codes else END
+            end = END
         else:
-            return ''
+            start = end = ''
+
+        object.__setattr__(self, 'start_sequence', start)
+        object.__setattr__(self, 'end_sequence', end)
 
     def __repr__(self):
-        return '<Style (fore: %r, back: %r, style: %r)>' % (self.fore, self.back, self.style)
\ No newline at end of file
+        return '<Style (fore: %r, back: %r, style: %r)>' % (self.fore, self.back, self.style)
+
+
+def _transition(previous, style):
+    """
+    Works out the shortest escape sequence to change from one style to another
+    :param previous: Style
+    :param style: Style
+    :return: String
+    """
+    if previous is style or not COLOUR_ENABLED:
+        return ''
+
+    restart = ESCAPE_SEQUENCE + ';'.join([RESET] + style.codes) + 'm'
+    if not style.codes:
+        return END
+
+    codes = []
+    if previous.style != style.style:
+        if previous.style:
+            if previous.style not in STYLE_OFF:
+                return restart  # we don't know how to undo this one by itself
+            codes.append(STYLE_OFF[previous.style])
+        if style.style:
+            codes.append(style.style)
+    if previous.fore != style.fore:
+        codes.append(style.fore or DEFAULT_FORE)
+    if previous.back != style.back:
+        codes.append(style.back or DEFAULT_BACK)
+
+    delta = ESCAPE_SEQUENCE + ';'.join(codes) + 'm'
+
+    return delta if len(delta) <= len(restart) else restart
+
+
+class StyleTable:
+    """
+    Interns every distinct Style and gives it a small integer id, so that screen buffers can store style ids instead
+    of escape sequences. Id 0 is always the default (unstyled) style.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._styles = []
+        self._transitions = {}
+        self._lock = threading.Lock()  # held while adding a Style, so two threads can't give out the same id
+
+    def intern(self, fore=None, back=None, style=None):
+        """
+        Gets the Style for a combination of codes, creating it if it hasn't been seen before
+        :param fore: String/None
+        :param back: String/None
+        :param style: String/None
+        :return: Style
+        """
+        k = (fore, back, style)
+        try:
+            return self._styles[self._ids[k]]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if k in self._ids:  # another thread interned it since we looked
+                return self._styles[self._ids[k]]
+
+            s = object.__new__(Style)
+            object.__setattr__(s, 'fore', fore)
+            object.__setattr__(s, 'back', back)
+            object.__setattr__(s, 'style', style)
+            object.__setattr__(s, 'id', len(self._styles))
+            s._update_sequences()
+
+            self._styles.append(s)
+            self._ids[k] = s.id  # only once it can be looked up by its id
+            return s
+
+    def id_of(self, style):
+        """
+        Gets the id for a Style
+        :param style: Style/None
+        :return: int
+        """
+        if style is None:
+            return 0
+        return style.id
+
+    def transition(self, from_id, to_id):
+        """
+        Gets the escape sequence which changes the terminal from one style to another, only changing what differs
+        :param from_id: int, the id of the Style currently in effect
+        :param to_id: int, the id of the Style wanted
+        :return: String
+        """
+        try:
+            return self._transitions[from_id, to_id]
+        except KeyError:
+            sequence = _transition(self._styles[from_id], self._styles[to_id])
+            self._transitions[from_id, to_id] = sequence
+            return sequence
+
+    def refresh(self):
+        """
+        Recalculates every escape sequence, to be called when COLOUR_ENABLED changes
+        :return: None
+        """
+        self._transitions.clear()
+        for s in self._styles:
+            s._update_sequences()
+
+    def __getitem__(self, style_id):
+        return self._styles[style_id]
+
+    def __len__(self):
+        return len(self._styles)
+
+
+TABLE = StyleTable()  # the table every Style is interned in
+DEFAULT = Style()  # always id 0
+
+
+def set_colour_enabled(enabled):
+    """
+    Overrides the detected colour support, e.g. for writing to something which isn't a console
+    :param enabled: Bool
+    :return: None
+    """
+    global COLOUR_ENABLED
+    COLOUR_ENABLED = enabled
+    TABLE.refresh()
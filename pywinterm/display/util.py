@@ -1,7 +1,31 @@
 """
 Display utilities
 """
-import os
+from pywinterm.display import backend as _backend
+
+_default_backend = None
+
+
+def get_backend():
+    """
+    Gets the backend for the terminal we're running in, creating it the first time
+    :return: Backend
+    """
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = _backend.default_backend()
+
+    return _default_backend
+
+
+def set_backend(backend):
+    """
+    Replaces the default backend, e.g. with a HeadlessBackend
+    :param backend: Backend
+    :return: None
+    """
+    global _default_backend
+    _default_backend = backend
 
 
 def clear_window():
@@ -9,17 +33,16 @@ def clear_window():
     Clears the screen
     :return: None
     """
-    os.system("cls")
+    get_backend().clear()
 
 
 def render_chars(arr):
     """
-    Prints every character to the terminal window
-    :param arr: iter<String>, each String is a line in the terminal
+    Prints every character to the terminal window, in a single write
+    :param arr: iter<String/list<char>>, each is a line in the terminal
     :return: None
     """
-    for row in arr:
-        print(arr)
+    get_backend().write_frame(''.join([''.join(row) + '\n' for row in arr]))
 
 
 def set_window_title(title):
@@ -28,7 +51,7 @@ def set_window_title(title):
     :param title: String
     :return: None
     """
-    os.system("TITLE {}".format(title))
+    get_backend().set_title(title)
 
 
 def resize_window(width, height):
@@ -38,7 +61,7 @@ def resize_window(width, height):
     :param height: height of the terminal (rows)
     :return: None
     """
-    os.system("mode con: cols={} lines={}".format(width, height))
+    get_backend().resize(width, height)
 
 
 def flatten_root(root):
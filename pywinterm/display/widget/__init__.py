@@ -2,23 +2,102 @@
 Widgets for some nifty new features
 """
 import platform
+import asyncio
 import threading
 import itertools
-from pywinterm.display import style
+import weakref
+from array import array
+from pywinterm.display import style, buffer
 from pywinterm.key.key import TAB, RETURN, ESCAPE, BACKSPACE
+from pywinterm.key import aio
+from pywinterm.key.keymap import KeyMap
 from pywinterm import key
 
 
+_UNSET = object()
+
+
+def _changing_property(name):
+    """
+    Creates a property which invalidates the widget when it is changed
+    :param name: String, the attribute the value is kept in
+    :return: property
+    """
+    def getter(self):
+        return getattr(self, name)
+
+    def setter(self, value):
+        if getattr(self, name, _UNSET) != value:
+            setattr(self, name, value)
+            self.invalidate()
+
+    return property(getter, setter)
+
+
+def _keymap_property(name):
+    """
+    Creates a property which makes a TextInput build its KeyMap again when it is changed
+    :param name: String, the attribute the value is kept in
+    :return: property
+    """
+    def getter(self):
+        return getattr(self, name)
+
+    def setter(self, value):
+        setattr(self, name, value)
+        self._keymap = None
+
+    return property(getter, setter)
+
+
 class Widget:
     """
     A Generic widget, extend this to easily create a custom widget with styling
+
+    Whatever a widget is shown in (its owners) is invalidated whenever the widget changes. If you change something
+    which isn't a property of the widget, call invalidate() yourself.
     """
     index = 0
+    version = 0  # goes up every time the widget changes
+    _owners = ()
+    _cells = None
+    _cells_version = None  # the version _cells was made from
 
     def __init__(self, style=style.Style(), alignment=0):
         self.alignment = alignment
         self.style = style
 
+    # defined after __init__, so that the style module can still be used for its default
+    style = _changing_property('_style')
+    alignment = _changing_property('_alignment')
+
+    def invalidate(self):
+        """
+        Marks the widget as changed, and invalidates its owners
+        :return: None
+        """
+        self.version += 1
+        for owner in list(self._owners):
+            owner.invalidate()
+
+    def add_owner(self, owner):
+        """
+        Adds something which shows this widget, to be invalidated when the widget changes
+        :param owner: Display/Widget, anything with an invalidate() method
+        :return: None
+        """
+        if not isinstance(self._owners, weakref.WeakSet):
+            self._owners = weakref.WeakSet()
+        self._owners.add(owner)
+
+    def remove_owner(self, owner):
+        """
+        :param owner: Display/Widget
+        :return: None
+        """
+        if isinstance(self._owners, weakref.WeakSet):
+            self._owners.discard(owner)
+
     def __len__(self):
         return 0
 
@@ -28,6 +107,41 @@ class Widget:
     def __repr__(self):
         return '<Widget alignment: %r>' % self.alignment
 
+    def segments(self):
+        """
+        Gets the text of the widget split in to runs which share a style, without any escape sequences
+        :return: list<tuple<String, Style>>
+        """
+        return []
+
+    def cells(self):
+        """
+        Gets the codepoints and style ids of the whole widget in one go, from a single snapshot of it. They are kept
+        until the widget's version changes, so an unchanged widget costs nothing to render; don't modify them.
+        :return: tuple<array<int>, array<int>>, (codepoints, style ids)
+        """
+        version = self.version  # read first, so a change made while we work is picked up next time
+        if self._cells_version != version:
+            self._cells = self._build_cells()
+            self._cells_version = version
+
+        return self._cells
+
+    def _build_cells(self):
+        """
+        Makes the cells returned by cells(), override this if segments() isn't the quickest way to get them
+        :return: tuple<array<int>, array<int>>
+        """
+        chars = array(buffer.CHAR_TYPECODE)
+        styles = array(buffer.STYLE_TYPECODE)
+
+        for text, s in self.segments():
+            encoded = buffer.encode(text)
+            chars.extend(encoded)
+            styles.extend(buffer.style_run(style.TABLE.id_of(s), len(encoded)))
+
+        return chars, styles
+
     def __getitem__(self, item):
         raise NotImplementedError()
         '''
@@ -68,28 +182,78 @@ class Row(Widget):
         self.widgets = widgets
         super(self.__class__, self).__init__(*args, **kwargs)
 
-    def __len__(self):
-        l = 0
-        for widget in self.widgets:
-            l += len(widget)
+    @property
+    def widgets(self):
+        return self._widgets
+
+    @widgets.setter
+    def widgets(self, widgets):
+        for widget in getattr(self, '_widgets', ()):
+            if isinstance(widget, Widget):
+                widget.remove_owner(self)
 
-        return l
+        self._widgets = widgets
+
+        for widget in widgets:
+            if isinstance(widget, Widget):
+                widget.add_owner(self)  # so that a change to one of them invalidates wherever we are shown
+
+        self.invalidate()
+
+    _str = None
+    _str_version = None
+
+    def __len__(self):
+        return len(self.cells()[0])
 
     def __str__(self):
-        return ''.join([str(widget) for widget in self.widgets])
+        version = self.version
+        if self._str_version != version:
+            self._str = ''.join([str(widget) for widget in self.widgets])
+            self._str_version = version
+
+        return self._str
 
     def __getitem__(self, item):
         return self.__str__()[item]
 
+    def segments(self):
+        result = []
+        for widget in self.widgets:
+            if isinstance(widget, Widget):
+                result.extend(widget.segments())
+            else:
+                result.append((str(widget), None))
+
+        return result
+
+    def _build_cells(self):
+        # reuse the cells our widgets already have, rather than going back to their text
+        chars = array(buffer.CHAR_TYPECODE)
+        styles = array(buffer.STYLE_TYPECODE)
+
+        for widget in self.widgets:
+            if isinstance(widget, Widget):
+                widget_chars, widget_styles = widget.cells()
+                chars.extend(widget_chars)
+                styles.extend(widget_styles)
+            else:
+                encoded = buffer.encode(str(widget))
+                chars.extend(encoded)
+                styles.extend(buffer.style_run(buffer.DEFAULT_STYLE, len(encoded)))
+
+        return chars, styles
+
     def __iter__(self):
         self.index = 0
         return self
 
     def __next__(self):
-        if self.index >= self.__len__():
+        text = self.__str__()
+        if self.index >= len(text):
             raise StopIteration
 
-        result = self.__str__()[self.index]
+        result = text[self.index]
         self.index += 1
 
         return result
@@ -200,6 +364,21 @@ class TextInput(Widget):
     """
     An input widget to input text of unlimited length
     """
+    text = _changing_property('_text')
+    length = _changing_property('_length')
+
+    valid_chars = _keymap_property('_valid_chars')
+    unfocus_keys = _keymap_property('_unfocus_keys')
+    backspace_key = _keymap_property('_backspace_key')
+
+    _keymap = None
+    _valid_text = frozenset()
+
+    _snapshot_text = None
+    _snapshot_version = None
+
+    focus_manager = None  # the FocusManager we've been added to, if any
+
     def __init__(
             self,
             length,
@@ -227,60 +406,159 @@ class TextInput(Widget):
 
         self._keylistener_stop_event = threading.Event()
         self._keylistener_stop_event.set()
+        self._keylistener = None
+        self._key_stream = None
 
-        super(self.__class__, self).__init__(*args, **kwargs)
+        super(self.__class__, self).__init__(style, *args, **kwargs)
+
+    @property
+    def keymap(self):
+        """
+        The keys we handle, built from valid_chars, unfocus_keys and backspace_key, and built again whenever one of
+        them is changed (losing anything else bound to it)
+        :return: KeyMap
+        """
+        if self._keymap is None:
+            self._build_keymap()
+        return self._keymap
+
+    def _build_keymap(self):
+        """
+        Builds the keymap, and the set of characters a paste can insert
+        :return: None
+        """
+        # bound in reverse order of precedence, as later bindings replace earlier ones
+        keymap = KeyMap()
+        keymap.bind(self.backspace_key, self._backspace)
+        keymap.bind_all(self.unfocus_keys, lambda k, rerender_event: self._unfocus(k))
+        keymap.bind_all(self.valid_chars, self._insert)
+
+        self._valid_text = frozenset(str(k) for k in map(key.as_key, self.valid_chars) if not k.is_special_key)
+        self._keymap = keymap
 
     def keypress_handler(self, k, rerender_event):
         """
         Handles every keypress for the ThreadedKeyListener
-        :param k: Key
+        :param k: Key/Paste
         :param rerender_event: threading.Event
         :return: None
         """
-        if k in self.valid_chars:
-            with self.text_lock:
-                self.text += str(k)
-            rerender_event.set()
-        elif k in self.unfocus_keys:
-            self._unfocus(k)  # call the internal unfocus which was designed for this purpose
-        elif k == self.backspace_key:
+        if isinstance(k, key.Paste):
+            self._paste(k, rerender_event)
+        else:
+            self.keymap.dispatch(k, rerender_event)
+
+    def _paste(self, paste, rerender_event):
+        """
+        Inserts all of the valid characters of a paste at once, with a single rerender
+        :param paste: Paste
+        :param rerender_event: threading.Event
+        :return: None
+        """
+        if self._keymap is None:
+            self._build_keymap()
+
+        text = ''.join([char for char in paste.text if char in self._valid_text])
+        if text:
             with self.text_lock:
-                self.text = self.text[:-1]
+                self.text += text
             rerender_event.set()
 
+    def _insert(self, k, rerender_event):
+        with self.text_lock:
+            self.text += str(k)
+        rerender_event.set()
+
+    def _backspace(self, k, rerender_event):
+        with self.text_lock:
+            self.text = self.text[:-1]
+        rerender_event.set()
+
     @property
     def is_focused(self):
+        if self.focus_manager is not None and self.focus_manager.focused is self:
+            return True
         return not self._keylistener_stop_event.is_set()
 
-    def focus(self, sleep_time=0.1, blocking=False, rerender_event=threading.Event()):
+    def focus(self, sleep_time=None, blocking=False, rerender_event=None):
         """
-        Hijack keylistening until one of the unfocus keys is hit
+        Hijack keylistening until one of the unfocus keys is hit. If we've been added to a FocusManager, it is asked to
+        send us keys from its thread instead, and its rerender_event is used.
+        :param sleep_time: float/None, how often the listener checks whether it has been unfocused, None to only wake
+        up for keys and unfocus()
+        :param blocking: Bool, whether to wait until we've been unfocused
         :param rerender_event: threading.Event, set on update time
         :return: None
         """
-        if not self.is_focused:
-            self._keylistener_stop_event.clear()
+        if self.is_focused:
+            raise RuntimeError('You cannot call focus more than once without unfocusing first')
+
+        if self.focus_manager is not None:
+            self.focus_manager.focus(self)
+            if blocking:
+                self.focus_manager.wait_blurred(self)
+            return
 
-            keylistener = key.ThreadedKeyListener(
-                self._keylistener_stop_event,
-                self.keypress_handler,
-                sleep_time,
-                rerender_event=rerender_event
-            )
+        if rerender_event is None:
+            rerender_event = threading.Event()
 
-            keylistener.start()
+        self._keylistener_stop_event.clear()
 
-            if blocking:
-                keylistener.join()
-        else:
+        self._keylistener = key.ThreadedKeyListener(
+            self._keylistener_stop_event,
+            self.keypress_handler,
+            sleep_time,
+            rerender_event=rerender_event
+        )
+
+        self._keylistener.start()
+
+        if blocking:
+            self._keylistener.join()
+
+    async def focus_async(self, rerender_event=None, reader=None):
+        """
+        Hijack keylistening until one of the unfocus keys is hit, from a coroutine instead of a thread
+        :param rerender_event: asyncio.Event/threading.Event, set on update time
+        :param reader: KeyReader, where keys come from, defaults to the terminal's reader
+        :return: Key/None, the key which caused the unfocus, None if unfocus() was called
+        """
+        if self.is_focused:
             raise RuntimeError('You cannot call focus more than once without unfocusing first')
 
+        if rerender_event is None:
+            rerender_event = asyncio.Event()
+
+        self._keylistener_stop_event.clear()
+        self._keylistener = None
+        self._key_stream = aio.KeyStream(reader)
+
+        try:
+            async for k in self._key_stream:
+                self.keypress_handler(k, rerender_event)
+
+                if not self.is_focused:
+                    return k
+        finally:
+            self._key_stream.close()
+            self._key_stream = None
+            self._keylistener_stop_event.set()
+
     def unfocus(self):
         """
-        Unfocus ourselves, kill the ThreadedKeyListener
+        Unfocus ourselves, kill the ThreadedKeyListener (or end focus_async)
         :return: None
         """
-        self._keylistener_stop_event.set()
+        if self.focus_manager is not None:
+            self.focus_manager.blur(self)
+
+        if self._keylistener is not None:
+            self._keylistener.stop()
+        else:
+            self._keylistener_stop_event.set()
+
+        if self._key_stream is not None:
+            self._key_stream.close()
 
     def _unfocus(self, k=None):
         """
@@ -302,16 +580,32 @@ class TextInput(Widget):
     def __len__(self):
         return self.length
 
+    def _snapshot(self):
+        """
+        Gets _unstyled_text, only taking the lock and padding the text again once we have changed
+        :return: String
+        """
+        version = self.version
+        if self._snapshot_version != version:
+            self._snapshot_text = self._unstyled_text
+            self._snapshot_version = version
+
+        return self._snapshot_text
+
+    def segments(self):
+        return [(self._snapshot(), self.style)]
+
     def __getitem__(self, item):
+        text = self._snapshot()
         if item == 0:
-            return self.style.start_sequence + self._unstyled_text[0]
+            return self.style.start_sequence + text[0]
         elif item == len(self) - 1:
-            return self._unstyled_text[item] + self.style.end_sequence
+            return text[item] + self.style.end_sequence
         else:
-            return self._unstyled_text[item]
+            return text[item]
 
     def __str__(self):
-        return self.style.start_sequence + self._unstyled_text + self.style.end_sequence
+        return self.style.start_sequence + self._snapshot() + self.style.end_sequence
 
     def __repr__(self):
         with self.text_lock:
@@ -322,14 +616,15 @@ class TextInput(Widget):
         return self
 
     def __next__(self):
-        if self.index >= len(self._unstyled_text):
+        text = self._snapshot()
+        if self.index >= len(text):
             raise StopIteration
         elif self.index == 0:
-            result = self.style.start_sequence + self._unstyled_text[0]
-        elif self.index == len(self) - 1:
-            result = self._unstyled_text[self.index] + self.style.end_sequence
+            result = self.style.start_sequence + text[0]
+        elif self.index == len(text) - 1:
+            result = text[self.index] + self.style.end_sequence
         else:
-            result = self._unstyled_text[self.index]
+            result = text[self.index]
 
         self.index += 1
         return result
@@ -339,12 +634,14 @@ class Label(Widget):
     """
     A coloured string of text (any length)
     """
+    text = _changing_property('_text')
+
     def __init__(self, text, style=style.Style(), *args, **kwargs):
         self.text = text
         self.style = style
         self.index = 0
 
-        super(self.__class__, self).__init__(*args, **kwargs)
+        super(self.__class__, self).__init__(style, *args, **kwargs)
 
     def __str__(self):
         return self.text
@@ -359,6 +656,9 @@ class Label(Widget):
     def __len__(self):
         return len(self.text)
 
+    def segments(self):
+        return [(self.text, self.style)]
+
     def __getitem__(self, item):
         if item == 0:
             return self.style.start_sequence + self.text[0]
@@ -0,0 +1,94 @@
+"""
+How many cells characters take up in a terminal.
+
+Widths are looked up by bisection in a table of runs of code points (widthtable.py), generated from unicodedata with
+
+    python -c "from pywinterm.display import width; width.generate_table()"
+"""
+import os
+import unicodedata
+from bisect import bisect_right
+from pywinterm.display import widthtable
+
+# categories which don't take up a cell of their own: combining marks and formatting characters
+ZERO_WIDTH_CATEGORIES = frozenset(('Mn', 'Me', 'Cf'))
+
+# East Asian Width classes which take up two cells
+WIDE_CLASSES = frozenset(('W', 'F'))
+
+# zero width characters which unicodedata puts somewhere else
+ZERO_WIDTH = frozenset((
+    0x200B,  # zero width space
+    0x1160,  # hangul jungseong filler, and the rest of the medial vowels and final consonants
+))
+
+_STARTS = widthtable.STARTS
+_WIDTHS = widthtable.WIDTHS
+
+
+def char_width(codepoint):
+    """
+    :param codepoint: int
+    :return: int, how many cells the character takes up, 0, 1 or 2
+    """
+    if codepoint < 0x80:  # printable ASCII is written a cell a character, as it always has been
+        return 1 if 0x20 <= codepoint < 0x7F else 0  # control characters aren't shown at all
+
+    return _WIDTHS[bisect_right(_STARTS, codepoint) - 1]
+
+
+def _lookup(codepoint):
+    """
+    Works out a character's width from unicodedata, for the table
+    :param codepoint: int
+    :return: int, 0, 1 or 2
+    """
+    if codepoint in ZERO_WIDTH or 0x1160 <= codepoint <= 0x11FF or codepoint < 0xA0:
+        return 0
+
+    char = chr(codepoint)
+    category = unicodedata.category(char)
+    if category in ZERO_WIDTH_CATEGORIES:
+        return 0
+    if category == 'Cn':  # unassigned, which unicodedata calls fullwidth, but are wide only in the ideograph planes
+        return 2 if 0x20000 <= codepoint <= 0x3FFFD else 1
+    if unicodedata.east_asian_width(char) in WIDE_CLASSES:
+        return 2
+    return 1
+
+
+def generate_table(path=None):
+    """
+    Writes widthtable.py from the unicodedata of the python running it
+    :param path: String/None, where to write it, next to this module if None
+    :return: int, the number of runs in the table
+    """
+    starts = []
+    widths = []
+    for codepoint in range(0x80, 0x110000):
+        width = _lookup(codepoint)
+        if not widths or widths[-1] != width:
+            starts.append(codepoint)
+            widths.append(width)
+
+    def rows(values, per_row, fmt):
+        return '\n'.join([
+            '    ' + ' '.join([fmt % value + ',' for value in values[i:i + per_row]])
+            for i in range(0, len(values), per_row)
+        ])
+
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'widthtable.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('"""\n')
+        f.write('The width of every code point from 0x80 on, as runs of code points which share a width. Generated by\n')
+        f.write('pywinterm.display.width from Unicode %s, don\'t edit it by hand.\n' % unicodedata.unidata_version)
+        f.write('"""\n')
+        f.write('UNICODE_VERSION = %r\n\n' % unicodedata.unidata_version)
+        f.write('# the first code point of each run\n')
+        f.write('STARTS = (\n%s\n)\n\n' % rows(starts, 10, '0x%05X'))
+        f.write('# the width of each run, 0, 1 or 2 cells\n')
+        f.write('WIDTHS = bytes((\n%s\n))\n' % rows(widths, 30, '%d'))
+
+    return len(starts)
+
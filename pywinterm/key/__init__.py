@@ -1,36 +1,102 @@
 """
 Keyboard related stuff
 """
-import msvcrt
 import time
 import threading
 import types
 
+try:
+    import msvcrt
+except ImportError:  # only needed by the deprecated kbfunc(), readers import what they need for their platform
+    msvcrt = None
+
 
 class Key:
-    def __init__(self, id, is_special_key=False):
-        self.id = id
-        self.is_special_key = is_special_key
+    """
+    A key on the keyboard. Keys are interned and immutable, so Key(id, is_special_key) always gives back the same
+    object for the same arguments, and Keys can be used in sets and as dictionary keys.
+
+    NOTE: Keys compare equal to the characters (and ords) they represent, but don't hash the same as them, so convert
+    with as_key() before looking them up in a set or dictionary of Keys.
+    """
+    __slots__ = ('id', 'is_special_key', '_hash')
+
+    _interned = {}
+
+    def __new__(cls, id, is_special_key=False):
+        k = (id, bool(is_special_key))
+        try:
+            return cls._interned[k]
+        except KeyError:
+            self = object.__new__(cls)
+            object.__setattr__(self, 'id', k[0])
+            object.__setattr__(self, 'is_special_key', k[1])
+            object.__setattr__(self, '_hash', hash(k))
+
+            # another thread may have interned the same key since we looked, setdefault() gives back whichever won
+            return cls._interned.setdefault(k, self)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Keys are immutable")
+
+    def __delattr__(self, item):
+        raise AttributeError("Keys are immutable")
+
+    def __reduce__(self):
+        return Key, (self.id, self.is_special_key)
 
     def __repr__(self):
         return '<Key id: %r, special: %r>' % (self.id, self.is_special_key)
 
     def __eq__(self, other):
         if isinstance(other, Key):  # both objects are of Key type, nothing special here...
-            return self.id == other.id and self.is_special_key == other.is_special_key
+            return self is other  # they're interned
 
         elif isinstance(other, str) and len(other) == 1:  # if the other key is a string, and this isn't a special key
-            if not self.is_special_key:
-                return ord(other) == self.id  # see if they represent the same character
+            return not self.is_special_key and ord(other) == self.id  # see if they represent the same character
 
-        elif isinstance(other, int):
-            if not self.is_special_key:  # if the other key is an ord value for a character
-                return other == self.id  # see if they represent the same character
+        elif isinstance(other, int):  # if the other key is an ord value for a character
+            return not self.is_special_key and other == self.id  # see if they represent the same character
+
+        return False
+
+    def __hash__(self):
+        return self._hash
 
     def __str__(self):
         return chr(self.id)
 
 
+class Paste:
+    """
+    Text which was pasted in to the terminal, delivered as one event rather than a Key per character
+    """
+    __slots__ = ('text', )
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return '<Paste length: %r>' % len(self.text)
+
+    def __str__(self):
+        return self.text
+
+
+def as_key(key):
+    """
+    Converts a key in any form to a Key
+    :param key: String, Int, Key - the requested key in either form.
+    :return: Key/None, None if it doesn't represent a key
+    """
+    if isinstance(key, Key):
+        return key
+    elif isinstance(key, str) and len(key) == 1:
+        return Key(ord(key))
+    elif isinstance(key, int):
+        return Key(key)
+
+
 def kbfunc():
     """
     !!DEPRECATED!!
@@ -49,72 +115,226 @@ def kbfunc():
     return ret
 
 
-def pressed():
+_reader = None
+
+
+def get_reader():
+    """
+    Gets the KeyReader for the terminal we're running in, creating it the first time
+    :return: KeyReader
+    """
+    global _reader
+    if _reader is None:
+        from pywinterm.key import reader
+        _reader = reader.default_reader()
+
+    return _reader
+
+
+def set_reader(reader):
+    """
+    Replaces the KeyReader that keys are read from, e.g. with one for a pseudo-terminal
+    :param reader: KeyReader
+    :return: None
+    """
+    global _reader
+    events_running = _event_reader is not None
+    stop_events()
+
+    _reader = reader
+
+    if events_running and reader is not None:
+        start_events()
+
+
+_input_listeners = []
+
+
+def add_input_listener(listener):
+    """
+    Adds a function to be called whenever keys are read, e.g. to measure how long they take to show up on screen
+    :param listener: function, called with time.monotonic() when the keys were read
+    :return: None
+    """
+    _input_listeners.append(listener)
+
+
+def remove_input_listener(listener):
+    """
+    :param listener: function
+    :return: None
+    """
+    _input_listeners.remove(listener)
+
+
+def _input_received():
+    """
+    Tells the input listeners that keys have been read
+    :return: None
+    """
+    if _input_listeners:
+        now = time.monotonic()
+        for listener in list(_input_listeners):
+            listener(now)
+
+
+def pressed(timeout=0):
     """
     Gets the currently pressed key and returns it
-    :return: Key
+    :param timeout: float/None, seconds to wait for a key, None to wait forever
+    :return: Key/None
     """
-    if msvcrt.kbhit():  # if the key has been hit
-        key = ord(msvcrt.getch())
-        if key == 224 or key == 0:  # 224 always comes before a special key, 0 appears to come before an F key
-            key_2 = ord(msvcrt.getch())
-            return Key(key_2, True)
-        else:
-            return Key(key)
+    if _event_reader is not None:  # it has the reader to itself, so the keys are on the event queue
+        event = get_event_queue().get(timeout)
+        return event.key if event is not None else None
 
+    k = get_reader().read(timeout)
+    if k is not None:
+        _input_received()
+    return k
 
-pressed_key = None  # a list of pressed keys for this frame, so that different keys can be checked in the same frame
 
+_event_queue = None
+_event_reader = None  # events.EventReader, filling the event queue, from start_events()
 
-def get_pressed():
+pressed_key = None  # the first key pressed this frame, kept for back compatibility
+pressed_events = []  # list<KeyEvent>, every key pressed this frame, oldest first
+_pressed_keys = set()  # set<Key>, every key pressed this frame
+
+
+def get_event_queue():
+    """
+    Gets the queue keys wait in between frames, creating it the first time
+    :return: KeyEventQueue
+    """
+    global _event_queue
+    if _event_queue is None:
+        from pywinterm.key import events
+        _event_queue = events.KeyEventQueue()
+
+    return _event_queue
+
+
+def set_event_queue(queue):
+    """
+    Replaces the queue keys wait in between frames, e.g. to change its capacity or overflow policy
+    :param queue: KeyEventQueue
+    :return: None
+    """
+    global _event_queue
+    events_running = _event_reader is not None
+    stop_events()
+
+    _event_queue = queue
+
+    if events_running:
+        start_events()
+
+
+def start_events():
+    """
+    Starts a thread which reads keys as they arrive and puts them on the event queue, stamped with when they were
+    read, for drain_events() to take a frame at a time. drain_events() calls this the first time.
+
+    While it runs it has the reader to itself, so pressed() (and so ThreadedKeyListener) takes keys from the event
+    queue instead. KeyStreams read the reader directly, so don't use them at the same time.
+    :return: None
     """
-    Gets the currently pressed key and assigns it to a variable for later reference
+    global _event_reader
+    if _event_reader is None:
+        from pywinterm.key import events
+        _event_reader = events.EventReader(get_reader(), get_event_queue())
+        _event_reader.start()
+
+
+def stop_events():
+    """
+    Stops the thread start_events() started, so keys are read from the reader again. Keys already on the event queue
+    are left there.
     :return: None
     """
+    global _event_reader
+    if _event_reader is not None:
+        _event_reader.stop()
+        _event_reader = None
+
+
+def drain_events():
+    """
+    Takes every key which has arrived since the last call off the event queue, and makes them all part of this frame
+    :return: list<KeyEvent>, the keys which were added to this frame, oldest first
+    """
     global pressed_key
-    if pressed_key is None:  # if there is no key already being handled
-        pressed_key = pressed()
+
+    start_events()
+    _event_reader.raise_overflow()
+
+    events = get_event_queue().drain()
+    for event in events:
+        pressed_events.append(event)
+        _pressed_keys.add(event.key)
+
+    if pressed_key is None and pressed_events:
+        pressed_key = pressed_events[0].key
+
+    return events
+
+
+def get_pressed():
+    """
+    Gets every key which has been pressed and adds them to this frame for later reference
+    :return: None
+    """
+    drain_events()
 
 
 def key_down(key):
     """
-    Checks if key is currently pressed
+    Checks if key has been pressed this frame
     :param key: String, Int, Key - the requested key in either form.
     :return: Bool
     """
     get_pressed()
-    global pressed_key
 
-    return key == pressed_key
+    return as_key(key) in _pressed_keys
 
 
 def clear_keypresses():
     """
-    To be called at the end of every frame
+    To be called at the end of every frame. Keys which arrive afterwards belong to the next frame, none are lost.
     :return: None
     """
     global pressed_key
     pressed_key = None
+    pressed_events.clear()
+    _pressed_keys.clear()
 
 
-def wait_for_keypress(sleep_time=0.01):
+def wait_for_keypress(timeout=None):
     """
-    Blocks until a keypress event occurs
-    :return: None
+    Blocks until a keypress event occurs, without using any CPU while waiting
+    :param timeout: float/None, seconds to wait for, None to wait forever
+    :return: Bool, whether a key was pressed before the timeout
     """
-    while not msvcrt.kbhit():
-        time.sleep(sleep_time)
+    if _event_reader is not None:
+        return get_event_queue().wait(timeout)
+
+    if _event_queue is not None and len(_event_queue):  # left there since stop_events()
+        return True
+
+    return get_reader().wait(timeout)
 
 
 class ThreadedKeyListener(threading.Thread):
     """
     A threaded Key Listener which executes a function every time a specific key is pressed
     """
-    def __init__(self, stop_event, key_handler=lambda k: None, sleep_time=0.1, rerender_event=threading.Event(), *args, **kwargs):
+    def __init__(self, stop_event, key_handler=lambda k: None, sleep_time=None, rerender_event=None, *args, **kwargs):
         self.stop_event = stop_event  # threading.Event
         self.key_handler = key_handler  # Executed every time a key is hit with the Key object as it's parameter
-        self.sleep_time = sleep_time
-        self.rerender_event = rerender_event
+        self.sleep_time = sleep_time  # how often to check stop_event, None to rely on stop() waking us up
+        # a new Event each, rather than a default argument which every listener would share
+        self.rerender_event = rerender_event if rerender_event is not None else threading.Event()
 
         super(ThreadedKeyListener, self).__init__(*args, **kwargs)
 
@@ -122,17 +342,30 @@ class ThreadedKeyListener(threading.Thread):
     def do_run(self):
         return not self.stop_event.is_set()  # if it's set, then we have to stop
 
+    def stop(self):
+        """
+        Stops listening, waking the thread up if it's waiting for a key, and waits for it to finish (unless it's the
+        thread calling stop(), from its key handler)
+        :return: None
+        """
+        self.stop_event.set()
+
+        # interrupt() only wakes a wait which has already started, so it's repeated until the thread has seen
+        # stop_event, in case it was about to start one
+        while self.is_alive() and self is not threading.current_thread():
+            get_reader().interrupt()
+            self.join(0.01)
+
     def run(self):
         """
         Listen for keys and add them to the Queue when they're pressed.
 
-        Will run until key is pressed, before determining whether to continue execution
+        Blocks until a key is pressed (or stop() is called), before determining whether to continue execution
         """
         while self.do_run:
-            wait_for_keypress(self.sleep_time)
-            k = pressed()
+            k = pressed(self.sleep_time)
 
-            if self.do_run:
+            if k is not None and self.do_run:
                 self.key_handler(k, self.rerender_event)  # execute the key handler
 
 
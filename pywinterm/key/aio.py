@@ -0,0 +1,186 @@
+"""
+asyncio integration for key input
+"""
+import asyncio
+from pywinterm import key
+
+_sources = {}  # (loop, reader) -> _KeySource
+
+
+class _KeySource:
+    """
+    Reads keys for every KeyStream on one event loop from one reader.
+
+    Readers with a file descriptor are registered with the loop, so keys are read as soon as they arrive without any
+    extra threads. Otherwise (e.g. the Windows console, which the proactor loop can't watch) a single executor thread
+    blocks on the reader instead.
+    """
+    def __init__(self, loop, reader):
+        self.loop = loop
+        self.reader = reader
+        self.streams = set()
+
+        self._task = None
+        self._flush_handle = None
+
+    def _dispatch(self, keys):
+        key._input_received()
+        for stream in list(self.streams):
+            for k in keys:
+                stream._queue.put_nowait(k)
+
+    def _on_readable(self):
+        keys = self.reader.read_available()
+        if keys:
+            self._dispatch(keys)
+
+        # the reader may be holding on to an escape which nothing else will arrive after to wake us up
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        due = self.reader.flush_due()
+        if due is not None:
+            self._flush_handle = self.loop.call_later(due, self._on_readable)
+
+    async def _read_in_thread(self):
+        while True:
+            k = await self.loop.run_in_executor(None, self.reader.read, None)
+            if k is not None:
+                self._dispatch([k])
+
+    def _start(self):
+        try:
+            self.loop.add_reader(self.reader.fileno(), self._on_readable)
+        except (AttributeError, NotImplementedError):
+            self._task = self.loop.create_task(self._read_in_thread())
+        else:
+            self._on_readable()  # there may already be keys waiting in the reader
+
+    def _stop(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._task is None:
+            self.loop.remove_reader(self.reader.fileno())
+        else:
+            self._task.cancel()
+            self.reader.interrupt()  # let the executor thread go
+            self._task = None
+
+    def add(self, stream):
+        starting = not self.streams
+        self.streams.add(stream)
+        if starting:
+            self._start()  # after adding the stream, so it gets the keys which are already waiting
+
+    def remove(self, stream):
+        self.streams.discard(stream)
+        if not self.streams:
+            self._stop()
+            del _sources[self.loop, self.reader]
+
+
+class KeyStream:
+    """
+    An asynchronous stream of every key pressed, to be used with async for:
+
+        async for k in KeyStream():
+            ...
+
+    Every open KeyStream gets every key. Close the stream (or leave an async with block) to stop listening.
+    """
+    _closed = object()  # put on the queue to end iteration
+
+    def __init__(self, reader=None):
+        """
+        Initialise a KeyStream
+        :param reader: KeyReader, defaults to the terminal's reader
+        """
+        self.reader = reader if reader is not None else key.get_reader()
+
+        self._queue = None
+        self._source = None
+        self.closed = False
+
+    def _open(self):
+        if self._source is None and not self.closed:
+            loop = asyncio.get_running_loop()
+
+            self._queue = asyncio.Queue()
+
+            if (loop, self.reader) not in _sources:
+                _sources[loop, self.reader] = _KeySource(loop, self.reader)
+            self._source = _sources[loop, self.reader]
+            self._source.add(self)
+
+    async def get(self, timeout=None):
+        """
+        Waits for the next key
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Key/None, None after a timeout or if the stream has been closed
+        """
+        self._open()
+        if self.closed and self._queue is None:
+            return None
+
+        try:
+            k = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if k is self._closed:
+            self._queue.put_nowait(k)  # keep waking up anything else waiting on us
+            return None
+
+        return k
+
+    def close(self):
+        """
+        Stops listening for keys, anything waiting on the stream gets None. Safe to call from any thread.
+        :return: None
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        if self._source is not None:
+            loop = self._source.loop
+            if loop.is_closed():
+                return
+
+            def close():
+                self._source.remove(self)
+                self._queue.put_nowait(self._closed)
+
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+
+            if running is loop:
+                close()
+            else:
+                loop.call_soon_threadsafe(close)
+
+    def __aiter__(self):
+        self._open()
+        return self
+
+    async def __anext__(self):
+        k = await self.get()
+        if k is None:
+            raise StopAsyncIteration
+        return k
+
+    async def __aenter__(self):
+        self._open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return '<KeyStream reader: %r, closed: %r>' % (self.reader, self.closed)
+
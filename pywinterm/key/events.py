@@ -0,0 +1,259 @@
+"""
+A bounded queue of timestamped key events, so that no keys are lost between frames, and the thread which fills it
+"""
+import time
+import threading
+from pywinterm import key
+
+# What to do with a key which arrives when the queue is full
+DROP_OLDEST = 0  # forget the oldest key in the queue to make room
+DROP_NEWEST = 1  # forget the key which has just arrived
+RAISE = 2  # raise KeyQueueOverflow
+
+
+class KeyQueueOverflow(Exception):
+    """
+    For when a key arrives when the queue is full, and the overflow policy is RAISE
+    """
+
+
+class KeyEvent:
+    """
+    A key, and when it was read
+    """
+    __slots__ = ('key', 'timestamp')
+
+    def __init__(self, key, timestamp=None):
+        """
+        Initialise a KeyEvent
+        :param key: Key
+        :param timestamp: float, time.monotonic() when the key was read, defaults to now
+        """
+        self.key = key
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+
+    def __repr__(self):
+        return '<KeyEvent key: %r, timestamp: %r>' % (self.key, self.timestamp)
+
+
+class KeyEventQueue:
+    """
+    A fixed size ring buffer of KeyEvents. Safe to use from multiple threads.
+
+    Keys are put on it as they are read (see EventReader), so they wait in it from one frame to the next, and the
+    overflow policy decides what happens when more arrive between frames than it can hold.
+    """
+    def __init__(self, capacity=1024, overflow=DROP_OLDEST):
+        """
+        Initialise a KeyEventQueue
+        :param capacity: int, the most events which can be waiting at once
+        :param overflow: int, one of DROP_OLDEST, DROP_NEWEST or RAISE
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.overflow = overflow
+        self.overflow_count = 0  # how many keys have been dropped (or refused) because the queue was full
+
+        self._events = [None] * capacity
+        self._head = 0  # index of the oldest event
+        self._size = 0
+        self._interrupts = 0  # interrupt()s so far, so a wait is only cut short by the ones after it started
+        self._condition = threading.Condition()
+
+    def put(self, key, timestamp=None):
+        """
+        Adds a key to the end of the queue
+        :param key: Key
+        :param timestamp: float, time.monotonic() when the key was read, defaults to now
+        :return: Bool, whether the key was added
+        """
+        event = KeyEvent(key, timestamp)
+
+        with self._condition:
+            if self._size == self.capacity:
+                self.overflow_count += 1
+
+                if self.overflow == DROP_NEWEST:
+                    return False
+                elif self.overflow == RAISE:
+                    raise KeyQueueOverflow("%r keys are already waiting" % self.capacity)
+
+                # DROP_OLDEST
+                self._head = (self._head + 1) % self.capacity
+                self._size -= 1
+
+            self._events[(self._head + self._size) % self.capacity] = event
+            self._size += 1
+            self._condition.notify_all()
+
+        return True
+
+    def put_all(self, keys):
+        """
+        Adds keys which were all read at the same time
+        :param keys: iter<Key>
+        :return: None
+        """
+        timestamp = time.monotonic()
+        for k in keys:
+            self.put(k, timestamp)
+
+    def get(self, timeout=0):
+        """
+        Takes the oldest event from the queue
+        :param timeout: float/None, seconds to wait for one, 0 to not wait, None to wait forever
+        :return: KeyEvent/None, None if there wasn't one before the timeout or interrupt()
+        """
+        with self._condition:
+            if self._size == 0 and timeout != 0:
+                interrupts = self._interrupts
+                self._condition.wait_for(lambda: self._size or self._interrupts != interrupts, timeout)
+
+            if self._size == 0:
+                return None
+
+            event = self._events[self._head]
+            self._events[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+
+            return event
+
+    def wait(self, timeout=None):
+        """
+        Blocks until there is an event in the queue
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Bool, whether there is one (False after a timeout or interrupt())
+        """
+        with self._condition:
+            interrupts = self._interrupts
+            self._condition.wait_for(lambda: self._size or self._interrupts != interrupts, timeout)
+            return self._size > 0
+
+    def interrupt(self):
+        """
+        Wakes up the threads waiting in get() or wait(), making them return early. With nothing waiting, this does
+        nothing, rather than cutting the next wait short.
+        :return: None
+        """
+        with self._condition:
+            self._interrupts += 1
+            self._condition.notify_all()
+
+    def drain(self):
+        """
+        Takes every event from the queue at once
+        :return: list<KeyEvent>, oldest first
+        """
+        with self._condition:
+            end = self._head + self._size
+            if end <= self.capacity:
+                events = self._events[self._head:end]
+            else:
+                events = self._events[self._head:] + self._events[:end - self.capacity]
+
+            self._events = [None] * self.capacity
+            self._head = 0
+            self._size = 0
+
+            return events
+
+    def clear(self):
+        """
+        Forgets every event in the queue
+        :return: None
+        """
+        self.drain()
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return '<KeyEventQueue size: %r, capacity: %r, overflow_count: %r>' % (
+            self._size,
+            self.capacity,
+            self.overflow_count
+        )
+
+
+class EventReader(threading.Thread):
+    """
+    Reads keys from a KeyReader as they arrive, and puts them on a KeyEventQueue stamped with when they were read.
+
+    KeyQueueOverflow can't be raised from the thread, so with the RAISE policy it is kept for raise_overflow() to raise
+    in whichever thread is taking events off the queue.
+    """
+    def __init__(self, reader, queue):
+        """
+        Initialise an EventReader
+        :param reader: KeyReader, which only we read from while we're running
+        :param queue: KeyEventQueue
+        """
+        super(EventReader, self).__init__(daemon=True)
+
+        self.reader = reader
+        self.queue = queue
+
+        self._overflow = None  # KeyQueueOverflow, for raise_overflow()
+        self._stopped = False
+
+    def start(self):
+        """
+        Puts the keys which have already arrived on the queue, then starts reading the rest as they arrive
+        :return: None
+        """
+        self._put(self.reader.read_available())
+        super(EventReader, self).start()
+
+    def run(self):
+        while not self._stopped:
+            k = self.reader.read(None)
+            if k is None:  # interrupt()ed, so wake up whatever is waiting on the queue instead
+                self.queue.interrupt()
+            else:
+                self._put([k])
+
+    def _put(self, keys):
+        """
+        :param keys: list<Key/Paste>, read at the same time
+        :return: None
+        """
+        if not keys:
+            return
+
+        key._input_received()
+        timestamp = time.monotonic()
+        for k in keys:
+            try:
+                self.queue.put(k, timestamp)
+            except KeyQueueOverflow as e:
+                self._overflow = e
+
+    def raise_overflow(self):
+        """
+        Raises the KeyQueueOverflow from a key which arrived while the queue was full, if there was one since the last
+        call
+        :return: None
+        """
+        overflow = self._overflow
+        if overflow is not None:
+            self._overflow = None
+            raise overflow
+
+    def stop(self):
+        """
+        Stops reading keys, leaving the ones already on the queue there
+        :return: None
+        """
+        self._stopped = True
+
+        # interrupt() only wakes a read which has already started, so it's repeated until the thread has seen
+        # _stopped, in case it was about to start one
+        while self.is_alive():
+            self.reader.interrupt()
+            self.join(0.01)
+
+    def __repr__(self):
+        return '<EventReader reader: %r, queue: %r>' % (self.reader, self.queue)
@@ -9,6 +9,7 @@ sKey = lambda x: Key(x, True)  # shorthand for a special key
 ESCAPE    = Key(27)
 RETURN    = Key(13)
 TAB       = Key(9)
+SHIFT_TAB = sKey(15)
 BACKSPACE = Key(8)
 
 # Arrow Keys
@@ -36,4 +37,6 @@ F7  = sKey(65)
 F8  = sKey(66)
 F9  = sKey(67)
 F10 = sKey(68)
+F11 = sKey(133)
 F12 = sKey(134)
+
@@ -0,0 +1,160 @@
+"""
+Dispatching keys to handlers
+"""
+from pywinterm.key import Key, as_key
+
+
+def _sequence(keys):
+    """
+    Converts what can be bound to a sequence of Keys
+    :param keys: String, Int, Key, or a tuple/list of them
+    :return: tuple<Key>
+    """
+    if isinstance(keys, (tuple, list)):
+        sequence = tuple(as_key(k) for k in keys)
+    elif isinstance(keys, str) and len(keys) > 1:
+        sequence = tuple(as_key(k) for k in keys)
+    else:
+        sequence = (as_key(keys),)
+
+    if not sequence or None in sequence:
+        raise ValueError("%r can't be bound, only keys (or sequences of keys) can be" % (keys, ))
+
+    return sequence
+
+
+class KeyMap:
+    """
+    Maps keys, and sequences of keys (chords), to handlers. Each key is dispatched with a single dictionary lookup.
+
+    Handlers are called with the key which completed their binding, followed by whatever else was passed to
+    dispatch().
+    """
+    def __init__(self, default=None):
+        """
+        Initialise a KeyMap
+        :param default: function/None, called with keys which aren't bound to anything
+        """
+        self.default = default
+
+        self._root = {}  # Key -> handler, or another dict for the rest of a sequence
+        self._node = self._root  # where we are in a partly typed sequence
+        self._sequence = []
+
+    def bind(self, keys, handler):
+        """
+        Binds a key, or a sequence of keys, to a handler
+        :param keys: String, Int, Key, or a tuple/list of them, a multi-character String is a sequence
+        :param handler: function
+        :return: None
+        """
+        sequence = _sequence(keys)
+
+        node = self._root
+        for k in sequence[:-1]:
+            node = node.setdefault(k, {})
+            if not isinstance(node, dict):
+                raise ValueError("%r is already bound, so it can't start a sequence" % k)
+
+        if isinstance(node.get(sequence[-1]), dict):
+            raise ValueError("%r already starts a sequence, so it can't be bound by itself" % sequence[-1])
+
+        node[sequence[-1]] = handler
+
+    def bind_all(self, keys, handler):
+        """
+        Binds each of many keys to the same handler
+        :param keys: iter<String, Int, Key>
+        :param handler: function
+        :return: None
+        """
+        for k in keys:
+            self.bind(as_key(k), handler)
+
+    def unbind(self, keys):
+        """
+        Removes a binding
+        :param keys: String, Int, Key, or a tuple/list of them
+        :return: None
+        """
+        sequence = _sequence(keys)
+
+        nodes = [self._root]
+        for k in sequence[:-1]:
+            nodes.append(nodes[-1][k])
+
+        del nodes[-1][sequence[-1]]
+
+        # tidy up anything which no longer leads anywhere
+        for i in range(len(sequence) - 2, -1, -1):
+            if nodes[i + 1]:
+                break
+            del nodes[i][sequence[i]]
+
+        self.reset()
+
+    def lookup(self, keys):
+        """
+        Gets the handler bound to a key, or sequence of keys
+        :param keys: String, Int, Key, or a tuple/list of them
+        :return: function/None
+        """
+        node = self._root
+        for k in _sequence(keys):
+            if not isinstance(node, dict) or k not in node:
+                return None
+            node = node[k]
+
+        return None if isinstance(node, dict) else node
+
+    @property
+    def pending(self):
+        """
+        :return: tuple<Key>, the start of a sequence which has been typed so far
+        """
+        return tuple(self._sequence)
+
+    def reset(self):
+        """
+        Forgets any partly typed sequence
+        :return: None
+        """
+        self._node = self._root
+        self._sequence = []
+
+    def dispatch(self, key, *args):
+        """
+        Calls the handler bound to a key, or moves along a sequence
+        :param key: Key
+        :return: Bool, whether the key was used
+        """
+        if not isinstance(key, Key):
+            key = as_key(key)
+
+        target = self._node.get(key)
+
+        if target is None:
+            if self._node is not self._root:
+                # the sequence was abandoned, but this key might start something else
+                self.reset()
+                return self.dispatch(key, *args)
+
+            if self.default is not None:
+                self.default(key, *args)
+                return True
+            return False
+
+        if isinstance(target, dict):
+            self._node = target
+            self._sequence.append(key)
+            return True
+
+        self.reset()
+        target(key, *args)
+        return True
+
+    def __contains__(self, keys):
+        return self.lookup(keys) is not None
+
+    def __repr__(self):
+        return '<KeyMap bindings: %r, pending: %r>' % (len(self._root), self.pending)
@@ -0,0 +1,253 @@
+"""
+Incremental parsing of the input VT terminals send, in to Keys and Pastes
+"""
+import codecs
+from pywinterm.key import Key, Paste
+from pywinterm.key.key import (
+    ESCAPE, SHIFT_TAB, UP, DOWN, LEFT, RIGHT, DELETE, INSERT, HOME, PAGE_UP, PAGE_DOWN, END,
+    F1, F2, F3, F4, F5, F6, F7, F8, F9, F10, F11, F12
+)
+
+# Special
+ESC = "\033"
+PASTE_START = 200
+PASTE_END = "\033[201~"
+
+# Sent for keys which have a different code on Windows
+TRANSLATIONS = {
+    127: 8,  # DEL is sent for backspace
+    10: 13,  # newline, for when the terminal sends it for return
+}
+
+# The keys for ESC [ <params> <final>, modifiers in the params are ignored
+CSI_FINALS = {
+    'A': UP,
+    'B': DOWN,
+    'C': RIGHT,
+    'D': LEFT,
+    'H': HOME,
+    'F': END,
+    'Z': SHIFT_TAB,
+    'P': F1,
+    'Q': F2,
+    'R': F3,
+    'S': F4,
+}
+
+# The keys for ESC O <final>, sent in application cursor mode and for F1-F4
+SS3_FINALS = {
+    'A': UP,
+    'B': DOWN,
+    'C': RIGHT,
+    'D': LEFT,
+    'H': HOME,
+    'F': END,
+    'P': F1,
+    'Q': F2,
+    'R': F3,
+    'S': F4,
+}
+
+# The keys for ESC [ <code> ~
+TILDE_CODES = {
+    1: HOME,
+    2: INSERT,
+    3: DELETE,
+    4: END,
+    5: PAGE_UP,
+    6: PAGE_DOWN,
+    7: HOME,
+    8: END,
+    11: F1,
+    12: F2,
+    13: F3,
+    14: F4,
+    15: F5,
+    17: F6,
+    18: F7,
+    19: F8,
+    20: F9,
+    21: F10,
+    23: F11,
+    24: F12,
+}
+
+# a CSI sequence longer than this is assumed to be garbage rather than waited for
+MAX_SEQUENCE_LENGTH = 32
+
+_START_PASTE = object()  # returned by _parse_escape for the start of a bracketed paste
+
+
+def _partial_suffix(text, marker):
+    """
+    :param text: String
+    :param marker: String
+    :return: int, the length of the longest end of text which could be the start of marker
+    """
+    for length in range(min(len(marker) - 1, len(text)), 0, -1):
+        if text.endswith(marker[:length]):
+            return length
+    return 0
+
+
+def _parse_escape(text, i):
+    """
+    Parses the escape sequence starting at text[i]
+    :param text: String
+    :param i: int, the index of the ESC
+    :return: tuple<Key/None, int>/None, the key (None if the sequence isn't one we know) and the index after the
+    sequence, or None if the sequence hasn't finished arriving
+    """
+    n = len(text)
+    if i + 1 == n:
+        return None
+
+    introducer = text[i + 1]
+
+    if introducer == '[':
+        j = i + 2
+        while j < n and '\x20' <= text[j] <= '\x3f':  # parameter and intermediate bytes
+            j += 1
+
+        if j == n:
+            if n - i > MAX_SEQUENCE_LENGTH:
+                return ESCAPE, i + 1
+            return None
+
+        params = text[i + 2:j]
+        final = text[j]
+
+        if final == '~':
+            code = params.split(';')[0]
+            code = int(code) if code.isdigit() else 0
+            if code == PASTE_START:
+                return _START_PASTE, j + 1
+            return TILDE_CODES.get(code), j + 1
+
+        return CSI_FINALS.get(final), j + 1
+
+    elif introducer == 'O':
+        if i + 2 == n:
+            return None
+        return SS3_FINALS.get(text[i + 2]), i + 3
+
+    # escape by itself (or alt + a key, which we can't tell apart from escape then the key)
+    return ESCAPE, i + 1
+
+
+class InputParser:
+    """
+    Turns the bytes sent by a VT terminal in to Keys, and bracketed pastes in to single Pastes.
+
+    Data can be fed in whatever chunks it arrives in. A sequence which hasn't finished arriving is kept until more
+    data is fed, or until flush() is called because nothing more arrived within `timeout` seconds; this is how the
+    escape key is told apart from the start of an escape sequence.
+    """
+    def __init__(self, escape_timeout=0.05, paste_timeout=1.0, encoding='utf-8'):
+        """
+        Initialise an InputParser
+        :param escape_timeout: float, seconds to wait for the rest of an escape sequence
+        :param paste_timeout: float, seconds to wait for more of a bracketed paste
+        :param encoding: String, what the terminal sends characters in
+        """
+        self.escape_timeout = escape_timeout
+        self.paste_timeout = paste_timeout
+
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._buffer = ''  # an unfinished escape sequence, or what might be the start of the end of a paste
+        self._paste = None  # list<String>, the chunks of a paste which is being received
+
+    @property
+    def pending(self):
+        """
+        :return: Bool, whether some input is being held on to, waiting for the rest of it
+        """
+        return bool(self._buffer) or self._paste is not None
+
+    @property
+    def timeout(self):
+        """
+        :return: float, seconds after the last feed() that flush() should be called if nothing more arrives
+        """
+        return self.paste_timeout if self._paste is not None else self.escape_timeout
+
+    def feed(self, data):
+        """
+        Parses as much input as possible
+        :param data: bytes
+        :return: list<Key/Paste>, in the order they were sent
+        """
+        return self._parse(self._buffer + self._decoder.decode(data))
+
+    def flush(self):
+        """
+        Gives up waiting for the rest of a sequence, and parses what has arrived as it is
+        :return: list<Key/Paste>
+        """
+        text = self._buffer
+        self._buffer = ''
+
+        if self._paste is not None:
+            self._paste.append(text)
+            events = [Paste(''.join(self._paste))]
+            self._paste = None
+            return events
+
+        if not text:
+            return []
+
+        # the escape was the escape key, and anything after it was typed separately
+        return [ESCAPE] + self._parse(text[1:])
+
+    def _parse(self, text):
+        """
+        :param text: String, everything not yet parsed
+        :return: list<Key/Paste>
+        """
+        self._buffer = ''
+        events = []
+
+        i = 0
+        n = len(text)
+        while i < n:
+            if self._paste is not None:
+                end = text.find(PASTE_END, i)
+                if end == -1:
+                    keep = _partial_suffix(text, PASTE_END)
+                    self._paste.append(text[i:n - keep])
+                    self._buffer = text[n - keep:]
+                    break
+
+                self._paste.append(text[i:end])
+                events.append(Paste(''.join(self._paste)))
+                self._paste = None
+                i = end + len(PASTE_END)
+                continue
+
+            escape = text.find(ESC, i)
+            if escape == -1:
+                escape = n
+
+            for char in text[i:escape]:
+                code = ord(char)
+                events.append(Key(TRANSLATIONS.get(code, code)))
+
+            i = escape
+            if i == n:
+                break
+
+            result = _parse_escape(text, i)
+            if result is None:
+                self._buffer = text[i:]
+                break
+
+            event, i = result
+            if event is _START_PASTE:
+                self._paste = []
+            elif event is not None:
+                events.append(event)
+
+        return events
+
+    def __repr__(self):
+        return '<InputParser pending: %r>' % self.pending
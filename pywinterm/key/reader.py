@@ -0,0 +1,399 @@
+"""
+Blocking key readers, which wait on the input handle instead of polling it
+"""
+import os
+import sys
+import time
+import atexit
+import select
+import platform
+import threading
+import selectors
+import collections
+from pywinterm.key import Key
+from pywinterm.key.parser import InputParser
+
+
+class KeyReader:
+    """
+    Reads keys from an input handle, blocking until they arrive (or a timeout passes) without using any CPU
+    """
+    def wait(self, timeout=None):
+        """
+        Blocks until a key is available
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :return: Bool, whether a key is available (False after a timeout or interrupt())
+        """
+        raise NotImplementedError()
+
+    def read(self, timeout=None):
+        """
+        Gets the next key
+        :param timeout: float/None, seconds to wait for, 0 to not wait, None to wait forever
+        :return: Key/Paste/None, None if there was no key before the timeout
+        """
+        raise NotImplementedError()
+
+    def read_available(self):
+        """
+        Gets every key which has already arrived, without waiting
+        :return: list<Key/Paste>
+        """
+        keys = []
+
+        k = self.read(0)
+        while k is not None:
+            keys.append(k)
+            k = self.read(0)
+
+        return keys
+
+    def flush_due(self):
+        """
+        :return: float/None, seconds until a partly received sequence should be given up on (which read_available()
+        does), None if there isn't one
+        """
+        return None
+
+    def interrupt(self):
+        """
+        Wakes up the threads which are waiting for a key, making their wait() or read() return early. Only the waits
+        already going are woken: with nothing waiting, this does nothing, rather than cutting the next wait short.
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Gives the input handle back the way we found it
+        :return: None
+        """
+
+
+class PosixKeyReader(KeyReader):
+    """
+    Reads keys from a tty (or pseudo-terminal) which is put in to raw mode, waiting on it with select/poll.
+    Escape sequences are parsed in to the same Keys the Windows console gives, and bracketed pastes in to Pastes.
+    """
+    def __init__(self, fd=None, parser=None):
+        """
+        Initialise a PosixKeyReader
+        :param fd: int/None, file descriptor of the terminal, defaults to standard input
+        :param parser: InputParser, defaults to one with the default timeouts
+        """
+        self.fd = sys.stdin.fileno() if fd is None else fd
+
+        self._pending = collections.deque()
+        self._parser = parser if parser is not None else InputParser()
+        self._last_feed = 0  # time.monotonic() when data was last given to the parser
+        self._lock = threading.Lock()
+
+        # interrupt()s so far, and how many waits started after each number of them are still going. A wait is only
+        # cut short by the interrupt()s after it started.
+        self._interrupts = 0
+        self._waiting = collections.Counter()
+
+        # a pipe to ourselves, so that interrupt() can wake the selector up. There's only something in it while a
+        # wait which started before the last interrupt() is still going.
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.fd, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self._saved_mode = None
+        self._enter_raw_mode()
+        atexit.register(self.close)
+
+    def _enter_raw_mode(self):
+        """
+        Stops the terminal from echoing and from waiting for return before sending keys.
+        Output processing and signals (e.g. Ctrl+C) are left alone.
+        :return: None
+        """
+        import termios
+
+        try:
+            self._saved_mode = termios.tcgetattr(self.fd)
+        except termios.error:  # not a terminal, e.g. a pipe
+            return
+
+        mode = termios.tcgetattr(self.fd)
+        mode[0] &= ~(termios.ICRNL | termios.IXON)  # iflag
+        mode[3] &= ~(termios.ECHO | termios.ICANON)  # lflag
+        mode[6][termios.VMIN] = 1
+        mode[6][termios.VTIME] = 0
+        termios.tcsetattr(self.fd, termios.TCSAFLUSH, mode)
+
+    def flush_due(self):
+        """
+        :return: float/None, seconds until a partly received sequence should be given up on, None if there isn't one
+        """
+        if not self._parser.pending:
+            return None
+        return max(0, self._last_feed + self._parser.timeout - time.monotonic())
+
+    def wait(self, timeout=None):
+        with self._lock:
+            interrupts = self._interrupts
+        return self._wait(timeout, interrupts)
+
+    def _wait(self, timeout, interrupts):
+        """
+        wait(), unless there has been an interrupt() since the number of them given
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :param interrupts: int, self._interrupts when the wait started
+        :return: Bool, whether a key is available
+        """
+        # the lock is only held to look at and change what has been read, never while waiting, so one thread waiting
+        # for a key doesn't hold up another which only wants what has already arrived
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            self._waiting[interrupts] += 1
+
+        try:
+            while True:
+                with self._lock:
+                    if self._pending:
+                        return True
+                    if self._interrupts != interrupts:
+                        return False
+                    due = self.flush_due()
+
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                flushing = due is not None and (remaining is None or due <= remaining)
+
+                events = self._selector.select(due if flushing else remaining)
+
+                if any([k.fd != self._wake_r for k, mask in events]):
+                    return True
+                # otherwise it was the wake pipe, which is for us if there has been an interrupt() since we started.
+                # If not it is for a wait which started before ours, and is emptied once that has finished.
+
+                if not events and not flushing:
+                    return False
+
+                with self._lock:
+                    self._flush_if_due()
+        finally:
+            with self._lock:
+                self._waiting[interrupts] -= 1
+                if not self._waiting[interrupts]:
+                    del self._waiting[interrupts]
+
+                if not any([waiting < self._interrupts for waiting in self._waiting]):
+                    self._empty_wake_pipe()  # nothing left to wake
+
+    def _flush_if_due(self):
+        """
+        Gives up on a partly received sequence if nothing more has arrived in time, so that what we have is all there
+        is. Called with the lock held.
+        :return: None
+        """
+        if self.flush_due() == 0:
+            self._pending.extend(self._parser.flush())
+
+    def _fill(self):
+        """
+        Reads everything the terminal has for us and parses it in to Keys. Called with the lock held.
+        :return: None
+        """
+        data = os.read(self.fd, 4096)
+        if not data:
+            raise EOFError("The terminal's input has been closed")
+
+        self._last_feed = time.monotonic()
+        self._pending.extend(self._parser.feed(data))
+
+    def _fill_ready(self):
+        """
+        _fill(), if the terminal has something for us, without waiting for it to. Another thread may have read what
+        woke us up, so this is checked again with the lock held. Called with the lock held.
+        :return: None
+        """
+        if select.select([self.fd], [], [], 0)[0]:
+            self._fill()  # may not give us a key yet, if a sequence has only partly arrived
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            interrupts = self._interrupts
+
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._fill_ready()
+                if self._pending:
+                    return self._pending.popleft()
+
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._wait(remaining, interrupts):
+                return None
+
+    def read_available(self):
+        with self._lock:
+            if not self._pending:
+                self._fill_ready()
+                self._flush_if_due()
+
+            keys = list(self._pending)
+            self._pending.clear()
+
+        return keys
+
+    def fileno(self):
+        """
+        :return: int, the file descriptor keys are read from, so it can be watched by an event loop
+        """
+        return self.fd
+
+    def _empty_wake_pipe(self):
+        """
+        Called with the lock held
+        :return: None
+        """
+        try:
+            while os.read(self._wake_r, 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def interrupt(self):
+        with self._lock:
+            self._interrupts += 1
+            if not self._waiting:
+                return
+
+            try:
+                os.write(self._wake_w, b'\0')
+            except BlockingIOError:  # already full of wake ups
+                pass
+
+    def close(self):
+        if self._saved_mode is not None:
+            import termios
+            termios.tcsetattr(self.fd, termios.TCSAFLUSH, self._saved_mode)
+            self._saved_mode = None
+
+
+class WindowsKeyReader(KeyReader):
+    """
+    Reads keys from the Windows console, waiting on the console input handle
+    """
+    STD_INPUT_HANDLE = -10
+    WAIT_OBJECT_0 = 0
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self):
+        import ctypes
+        import msvcrt
+
+        self._ctypes = ctypes
+        self._msvcrt = msvcrt
+        self._kernel32 = ctypes.windll.kernel32
+
+        self._handle = self._kernel32.GetStdHandle(self.STD_INPUT_HANDLE)
+        self._wake_event = self._kernel32.CreateEventW(None, True, False, None)  # manual reset, see _wait()
+
+        handles = ctypes.c_void_p * 2
+        self._handles = handles(self._handle, self._wake_event)
+
+        self._record = ctypes.create_string_buffer(20)  # sizeof(INPUT_RECORD)
+        self._lock = threading.Lock()
+
+        # as for PosixKeyReader, the wake event is only set while a wait which started before the last interrupt() is
+        # still going
+        self._interrupts = 0
+        self._waiting = collections.Counter()
+
+    def wait(self, timeout=None):
+        with self._lock:
+            interrupts = self._interrupts
+        return self._wait(timeout, interrupts)
+
+    def _wait(self, timeout, interrupts):
+        """
+        wait(), unless there has been an interrupt() since the number of them given
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :param interrupts: int, self._interrupts when the wait started
+        :return: Bool, whether a key is available
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            self._waiting[interrupts] += 1
+
+        try:
+            while not self._msvcrt.kbhit():
+                with self._lock:
+                    if self._interrupts != interrupts:
+                        return False
+
+                if deadline is None:
+                    milliseconds = self.INFINITE
+                else:
+                    milliseconds = max(0, int((deadline - time.monotonic()) * 1000))
+
+                result = self._kernel32.WaitForMultipleObjects(2, self._handles, False, milliseconds)
+
+                if result == self.WAIT_OBJECT_0:
+                    if not self._msvcrt.kbhit():
+                        # the handle is signalled for mouse, focus and key up events too, throw one away
+                        read = self._ctypes.c_ulong()
+                        self._kernel32.ReadConsoleInputW(self._handle, self._record, 1, self._ctypes.byref(read))
+                elif result != self.WAIT_OBJECT_0 + 1:  # a timeout. The wake event is looked at above.
+                    return False
+
+            return True
+        finally:
+            with self._lock:
+                self._waiting[interrupts] -= 1
+                if not self._waiting[interrupts]:
+                    del self._waiting[interrupts]
+
+                if not any([waiting < self._interrupts for waiting in self._waiting]):
+                    self._kernel32.ResetEvent(self._wake_event)  # nothing left to wake
+
+    def read(self, timeout=None):
+        # as for PosixKeyReader, the lock is only held to take a key, never while waiting for one
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            interrupts = self._interrupts
+
+        while True:
+            with self._lock:
+                if self._msvcrt.kbhit():
+                    code = ord(self._msvcrt.getch())
+                    if code == 224 or code == 0:  # 224 always comes before a special key, 0 before an F key
+                        return Key(ord(self._msvcrt.getch()), True)
+                    else:
+                        return Key(code)
+
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._wait(remaining, interrupts):
+                return None
+
+    def interrupt(self):
+        with self._lock:
+            self._interrupts += 1
+            if self._waiting:
+                self._kernel32.SetEvent(self._wake_event)
+
+    def close(self):
+        self._kernel32.CloseHandle(self._wake_event)
+
+
+def default_reader():
+    """
+    Creates the right reader for the terminal we're running in
+    :return: KeyReader
+    """
+    if platform.system() == 'Windows':
+        return WindowsKeyReader()
+    else:
+        return PosixKeyReader()
@@ -0,0 +1,284 @@
+"""
+Recording of the keys read from a KeyReader, and replaying them later through the same input path.
+
+A recording is a small binary file: MAGIC and a version byte, then one record per key of the microseconds since the
+previous key, the kind of key and its id (or for a Paste, the length of its UTF-8 text followed by the text).
+"""
+import time
+import struct
+import threading
+import collections
+from pywinterm import key
+from pywinterm.key.reader import KeyReader
+
+MAGIC = b"PWKR"
+VERSION = 1
+
+HEADER = struct.Struct('<4sB')
+RECORD = struct.Struct('<IBI')  # (microseconds since the previous key, kind, key id or paste length)
+
+# Kinds
+KIND_KEY = 0
+KIND_SPECIAL_KEY = 1
+KIND_PASTE = 2
+
+MAX_DELAY = 0xFFFFFFFF  # microseconds, longer gaps are shortened to this
+
+
+class ReplayFormatError(Exception):
+    """
+    For when a file isn't a recording we can replay
+    """
+
+
+def encode_event(delay, event):
+    """
+    :param delay: float, seconds since the previous key
+    :param event: Key/Paste
+    :return: bytes, the record for the key
+    """
+    micros = min(MAX_DELAY, max(0, int(delay * 1000000)))
+
+    if isinstance(event, key.Paste):
+        text = event.text.encode('utf-8')
+        return RECORD.pack(micros, KIND_PASTE, len(text)) + text
+
+    return RECORD.pack(micros, KIND_SPECIAL_KEY if event.is_special_key else KIND_KEY, event.id)
+
+
+def load(path):
+    """
+    Reads a recording
+    :param path: String/PathLike
+    :return: list<tuple<float, Key/Paste>>, every key and the seconds after the start of the recording it was read
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ReplayFormatError("%r is too short to be a recording" % (path,))
+
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayFormatError("%r is not a recording" % (path,))
+    if version != VERSION:
+        raise ReplayFormatError(
+            "%r is a version %r recording, only version %r can be replayed" % (path, version, VERSION)
+        )
+
+    events = []
+    elapsed = 0
+    position = HEADER.size
+    while position + RECORD.size <= len(data):
+        micros, kind, value = RECORD.unpack_from(data, position)
+        position += RECORD.size
+        elapsed += micros / 1000000
+
+        if kind == KIND_PASTE:
+            events.append((elapsed, key.Paste(data[position:position + value].decode('utf-8'))))
+            position += value
+        else:
+            events.append((elapsed, key.Key(value, kind == KIND_SPECIAL_KEY)))
+
+    return events
+
+
+class RecordingKeyReader(KeyReader):
+    """
+    Passes keys through from another KeyReader, writing each of them to a recording as it goes
+    """
+    def __init__(self, path, reader=None):
+        """
+        Initialise a RecordingKeyReader
+        :param path: String/PathLike, the file to record to, which is replaced
+        :param reader: KeyReader, where the keys really come from, defaults to the terminal's reader
+        """
+        self.path = path
+        self.reader = reader if reader is not None else key.get_reader()
+        self.count = 0
+
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION))
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _record(self, events):
+        now = time.monotonic()
+        with self._lock:
+            if self._file is None:
+                return
+
+            for event in events:
+                self._file.write(encode_event(now - self._last, event))
+                self._last = now
+            self.count += len(events)
+
+    def wait(self, timeout=None):
+        return self.reader.wait(timeout)
+
+    def read(self, timeout=None):
+        k = self.reader.read(timeout)
+        if k is not None:
+            self._record((k,))
+        return k
+
+    def read_available(self):
+        keys = self.reader.read_available()
+        if keys:
+            self._record(keys)
+        return keys
+
+    def flush_due(self):
+        return self.reader.flush_due()
+
+    def fileno(self):
+        return self.reader.fileno()  # AttributeError if it doesn't have one, as for any other reader
+
+    def interrupt(self):
+        self.reader.interrupt()
+
+    def stop(self):
+        """
+        Finishes the recording, leaving the reader we were recording from alone
+        :return: None
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        self.stop()
+        self.reader.close()
+
+    def __repr__(self):
+        return '<RecordingKeyReader path: %r, keys: %r>' % (self.path, self.count)
+
+
+class ReplayKeyReader(KeyReader):
+    """
+    Reads the keys from a recording, either at the times they were recorded at or as fast as they are asked for
+    """
+    def __init__(self, path, realtime=True, speed=1.0):
+        """
+        Initialise a ReplayKeyReader
+        :param path: String/PathLike, the recording
+        :param realtime: Bool, whether to wait for each key's time to come, rather than having every key ready at once
+        :param speed: float, how many times faster than real time to replay
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+
+        self.finished = threading.Event()  # set once every key has been read
+
+        self._events = collections.deque(load(path))
+        self._start = time.monotonic()
+        self._lock = threading.Lock()  # held to look at or take from _events, and let go of while waiting
+        self._condition = threading.Condition(self._lock)  # notified by interrupt()
+        self._interrupts = 0  # interrupt()s so far, so a wait is only cut short by the ones after it started
+
+        if not self._events:
+            self.finished.set()
+
+    def _until_due(self):
+        """
+        Called with the lock held
+        :return: float/None, seconds until the next key is due, None if there aren't any more
+        """
+        if not self._events:
+            return None
+        if not self.realtime:
+            return 0
+        return max(0, self._start + self._events[0][0] / self.speed - time.monotonic())
+
+    def wait(self, timeout=None):
+        with self._lock:
+            interrupts = self._interrupts
+        return self._wait(timeout, interrupts)
+
+    def _wait(self, timeout, interrupts):
+        """
+        wait(), unless there has been an interrupt() since the number of them given
+        :param timeout: float/None, seconds to wait for, None to wait forever
+        :param interrupts: int, self._interrupts when the wait started
+        :return: Bool, whether a key is due
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                due = self._until_due()
+                if due == 0:
+                    return True
+                if self._interrupts != interrupts:
+                    return False
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                if due is None:
+                    sleep = remaining  # nothing more is coming, like a terminal nobody is typing in to
+                else:
+                    sleep = due if remaining is None else min(due, remaining)
+
+                self._condition.wait(sleep)
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            interrupts = self._interrupts
+
+        while True:
+            with self._lock:  # another thread may have taken the key we waited for, or close()d us
+                if self._until_due() == 0:
+                    event = self._events.popleft()[1]
+                    if not self._events:
+                        self.finished.set()
+                    return event
+
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._wait(remaining, interrupts):
+                return None
+
+    def interrupt(self):
+        with self._condition:
+            self._interrupts += 1
+            self._condition.notify_all()
+
+    def close(self):
+        with self._lock:
+            self._events.clear()
+        self.finished.set()
+        self.interrupt()
+
+    def __repr__(self):
+        return '<ReplayKeyReader path: %r, remaining: %r, realtime: %r>' % (self.path, len(self._events), self.realtime)
+
+
+def record(path, reader=None):
+    """
+    Starts recording every key read, by putting a RecordingKeyReader in front of the current reader
+    :param path: String/PathLike, the file to record to
+    :param reader: KeyReader, defaults to the current reader
+    :return: RecordingKeyReader, stop() it to finish the recording
+    """
+    recorder = RecordingKeyReader(path, reader)
+    key.set_reader(recorder)
+    return recorder
+
+
+def replay(path, realtime=True, speed=1.0):
+    """
+    Makes keys come from a recording instead of the terminal, for everything which reads keys (pressed(),
+    ThreadedKeyListener, drain_events(), KeyStream etc.)
+    :param path: String/PathLike, the recording
+    :param realtime: Bool, whether to wait for each key's time to come
+    :param speed: float, how many times faster than real time to replay
+    :return: ReplayKeyReader
+    """
+    reader = ReplayKeyReader(path, realtime, speed)
+    key.set_reader(reader)
+    return reader
@@ -0,0 +1,118 @@
+import os
+import asyncio
+import unittest
+from pywinterm.display import RootDisplay, widget
+from pywinterm.display.backend import HeadlessBackend
+from pywinterm.key import aio, reader
+from pywinterm.key.key import RETURN
+
+
+class KeyStreamTest(unittest.TestCase):
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, self.write_fd)
+        self.reader = reader.PosixKeyReader(read_fd)
+
+    def type(self, data):
+        os.write(self.write_fd, data)
+
+    def run_async(self, coroutine):
+        return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+    def test_keys_in_order(self):
+        async def main():
+            keys = []
+            async with aio.KeyStream(self.reader) as stream:
+                self.type(b"abc")
+                async for k in stream:
+                    keys.append(str(k))
+                    if len(keys) == 3:
+                        break
+            return keys
+
+        self.assertEqual(self.run_async(main()), ['a', 'b', 'c'])
+
+    def test_keys_which_arrived_before_the_stream(self):
+        self.type(b"ab")
+
+        async def main():
+            async with aio.KeyStream(self.reader) as stream:
+                return [str(await stream.get(1)), str(await stream.get(1))]
+
+        self.assertEqual(self.run_async(main()), ['a', 'b'])
+
+    def test_every_stream_gets_every_key(self):
+        async def main():
+            async with aio.KeyStream(self.reader) as first, aio.KeyStream(self.reader) as second:
+                self.type(b"x")
+                return await first.get(1), await second.get(1)
+
+        self.assertEqual(self.run_async(main()), ('x', 'x'))
+
+    def test_timeout_and_close(self):
+        async def main():
+            stream = aio.KeyStream(self.reader)
+            timed_out = await stream.get(0.01)
+
+            waiter = asyncio.ensure_future(stream.get())
+            await asyncio.sleep(0.01)
+            stream.close()
+            return timed_out, await waiter, [k async for k in stream]
+
+        self.assertEqual(self.run_async(main()), (None, None, []))
+
+    def test_focus_async(self):
+        text_input = widget.TextInput(10)
+
+        async def main():
+            rerender_event = asyncio.Event()
+            focus = asyncio.ensure_future(text_input.focus_async(rerender_event, self.reader))
+            await asyncio.sleep(0.01)
+            self.type(b"hi\r")
+            return await focus, rerender_event.is_set()
+
+        self.assertEqual(self.run_async(main()), (RETURN, True))
+        self.assertEqual(text_input.text, "hi")
+        self.assertFalse(text_input.is_focused)
+
+    def test_focus_async_typed_ahead(self):
+        text_input = widget.TextInput(10)
+        self.type(b"ok\r")
+
+        async def main():
+            return await text_input.focus_async(asyncio.Event(), self.reader)
+
+        self.assertEqual(self.run_async(main()), RETURN)
+        self.assertEqual(text_input.text, "ok")
+
+
+class RunAsyncTest(unittest.TestCase):
+    def test_renders_once_per_wake_up(self):
+        backend = HeadlessBackend(20, 3)
+        root = RootDisplay("test", backend=backend, width=20, height=3)
+        label = widget.Label("first")
+        root.print(label)
+
+        async def main():
+            event = asyncio.Event()
+            task = asyncio.ensure_future(root.run_async(event))
+            await asyncio.sleep(0.01)
+            first = backend.take_output()
+
+            label.text = "second"
+            label.text = "third"
+            event.set()
+            event.set()
+            await asyncio.sleep(0.01)
+            task.cancel()
+            return first, backend.take_output()
+
+        first, second = asyncio.run(main())
+        self.assertIn("first", first)
+        self.assertIn("third", second)
+        self.assertNotIn("second", second)
+
+
+if __name__ == '__main__':
+    unittest.main()
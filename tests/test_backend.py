@@ -0,0 +1,86 @@
+import os
+import unittest
+from unittest import mock
+from pywinterm.display import RootDisplay
+from pywinterm.display.backend import HeadlessBackend, PosixBackend, BRACKETED_PASTE_OFF, RESIZE, SYNC_BEGIN, SYNC_END
+
+
+class BracketedPasteTest(unittest.TestCase):
+    def test_reset_at_exit_once_per_backend(self):
+        backend = HeadlessBackend(20, 5)
+        with mock.patch('atexit.register') as register:
+            for _ in range(3):
+                RootDisplay("test", backend=backend, width=20, height=5)
+
+        register.assert_called_once_with(backend.set_bracketed_paste, False)
+
+        backend.stream.seek(0)
+        backend.stream.truncate()
+        register.call_args[0][0](*register.call_args[0][1:])
+        self.assertEqual(backend.stream.getvalue(), BRACKETED_PASTE_OFF.encode())
+
+
+class ResizeTest(unittest.TestCase):
+    def test_not_resized_unless_asked(self):
+        backend = HeadlessBackend(80, 24)
+        RootDisplay("test", backend=backend, width=20, height=5)
+        self.assertNotIn(RESIZE.format(6, 20), backend.getvalue())
+        self.assertEqual(backend.size(), (80, 24))
+
+    def test_resized_when_asked(self):
+        backend = HeadlessBackend(80, 24)
+        RootDisplay("test", backend=backend, width=20, height=5, resize=True)
+        self.assertIn(RESIZE.format(6, 20), backend.getvalue())
+        self.assertEqual(backend.size(), (20, 6))
+
+
+@unittest.skipIf(os.name != 'posix', "needs a pseudo-terminal")
+class PosixBackendTest(unittest.TestCase):
+    def setUp(self):
+        import fcntl
+        import struct
+        import termios
+
+        self.master, self.slave = os.openpty()
+        self.addCleanup(os.close, self.master)
+        self.addCleanup(os.close, self.slave)
+
+        fcntl.ioctl(self.slave, termios.TIOCSWINSZ, struct.pack('HHHH', 24, 80, 0, 0))  # rows, columns
+
+    def read(self, size):
+        data = b''
+        while len(data) < size:
+            data += os.read(self.master, size - len(data))
+        return data
+
+    def test_size(self):
+        self.assertEqual(PosixBackend(self.slave, synchronized=False).size(), (80, 24))
+
+    def test_size_of_something_else(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        self.assertEqual(len(PosixBackend(write_fd, synchronized=False).size()), 2)  # falls back on the environment
+
+    def test_write_frame(self):
+        backend = PosixBackend(self.slave, synchronized=True)
+        frame = "\033[1;1Hhello, wörld"
+        written = backend.write_frame(frame)
+
+        expected = (SYNC_BEGIN + frame + SYNC_END).encode()
+        self.assertEqual(written, len(expected))
+        self.assertEqual(self.read(len(expected)), expected)
+
+    def test_root_display_on_a_pty(self):
+        backend = PosixBackend(self.slave, synchronized=False)
+        with mock.patch('atexit.register'):  # the pty is closed long before then
+            RootDisplay("title", backend=backend, width=20, height=5)
+        backend.flush()
+
+        output = os.read(self.master, 4096)
+        self.assertIn(b"\033]0;title\007", output)
+        self.assertNotIn(b"\033[8;", output)  # the terminal isn't resized
+
+
+if __name__ == '__main__':
+    unittest.main()
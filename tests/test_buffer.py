@@ -0,0 +1,123 @@
+import unicodedata
+import unittest
+from pywinterm.display import buffer, width
+from pywinterm.display.buffer import ScreenBuffer, BLANK, CONTINUATION, DEFAULT_STYLE, encode, decode
+
+
+class EncodeTest(unittest.TestCase):
+    def assertCells(self, text, cells):
+        chars = encode(text)
+        self.assertEqual(len(chars), cells)
+        self.assertEqual(decode(chars), unicodedata.normalize('NFC', text))
+
+    def test_ascii(self):
+        self.assertCells("hello", 5)
+
+    def test_wide(self):
+        chars = encode("中a")
+        self.assertEqual(list(chars), [ord("中"), CONTINUATION, ord("a")])
+        self.assertEqual(decode(chars), "中a")
+
+    def test_control_characters_are_left_out(self):
+        self.assertEqual(list(encode("a\0b\x1b[2J\t\x7f")), list(map(ord, "ab[2J")))
+        self.assertEqual(list(encode("é\x1bb\x9b")), [ord("é"), ord("b")])  # not combined with the é
+        self.assertEqual(len(encode("\0")), 0)
+
+    def test_combining_marks_are_kept(self):
+        self.assertCells("क्ष", 2)  # ksha, its virama combined with the ka
+        self.assertCells("é̂", 1)
+
+    def test_emoji_sequences_are_kept(self):
+        self.assertCells("\U0001F468‍\U0001F469‍\U0001F467", 2)  # family, joined with zero width joiners
+        self.assertCells("\U0001F44D\U0001F3FD", 2)  # thumbs up with a skin tone
+        self.assertCells("❤️", 1)  # heart with emoji presentation
+
+    def test_combining_with_nothing_before_is_left_out(self):
+        self.assertEqual(decode(encode("́ab")), "ab")
+
+    def test_same_cluster_same_cell(self):
+        self.assertEqual(encode("é̂"), encode("é̂"))
+        self.assertNotEqual(encode("é̂"), encode("é̃"))
+        self.assertGreaterEqual(encode("é̂")[0], buffer.CLUSTER)
+
+    def test_row_text(self):
+        screen = ScreenBuffer(6, 1)
+        screen.write(0, 0, "\U0001F44D\U0001F3FDxक्")
+        self.assertEqual(screen.row_text(0), "\U0001F44D\U0001F3FDxक्  ")
+
+
+class WidthTest(unittest.TestCase):
+    def test_table_matches_unicodedata(self):
+        for codepoint in range(0x80, 0x110000, 37):
+            self.assertEqual(width.char_width(codepoint), width._lookup(codepoint), hex(codepoint))
+
+    def test_widths(self):
+        self.assertEqual(width.char_width(ord("a")), 1)
+        self.assertEqual(width.char_width(0x1B), 0)
+        self.assertEqual(width.char_width(0x7F), 0)
+        self.assertEqual(width.char_width(ord("é")), 1)
+        self.assertEqual(width.char_width(ord("́")), 0)
+        self.assertEqual(width.char_width(ord("‍")), 0)
+        self.assertEqual(width.char_width(ord("中")), 2)
+        self.assertEqual(width.char_width(0x1F600), 2)
+        self.assertEqual(width.char_width(0x0378), 1)  # unassigned
+        self.assertEqual(width.char_width(0x10FFFF), 1)
+
+
+
+class ScreenBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.screen = ScreenBuffer(5, 3)
+
+    def test_starts_blank(self):
+        self.assertEqual(list(self.screen), ["     "] * 3)
+        self.assertEqual(set(self.screen.chars), {BLANK})
+        self.assertEqual(set(self.screen.styles), {DEFAULT_STYLE})
+
+    def test_write(self):
+        self.screen.write(1, 2, "abc", 3)
+        self.assertEqual(self.screen.row_text(2), " abc ")
+        self.assertEqual(list(self.screen.row(2)[1]), [0, 3, 3, 3, 0])
+
+    def test_write_outside(self):
+        self.assertRaises(IndexError, self.screen.write, 3, 0, "abc")
+        self.assertRaises(IndexError, self.screen.write, 0, 3, "a")
+
+    def test_clear_in_place(self):
+        chars = self.screen.chars
+        self.screen.write(0, 0, "hello", 1)
+        self.screen.clear()
+        self.assertIs(self.screen.chars, chars)
+        self.assertEqual(list(self.screen), ["     "] * 3)
+        self.assertEqual(set(self.screen.styles), {DEFAULT_STYLE})
+
+    def test_rows_are_views(self):
+        chars, styles = self.screen.row(1)
+        self.screen.write(0, 1, "hi")
+        self.assertEqual(decode(chars), "hi   ")
+
+    def test_clear_span_blanks_cut_wide_characters(self):
+        screen = ScreenBuffer(6, 1)
+        screen.write(0, 0, "中ab中")
+        screen.clear_span(1, 0, 4)
+        self.assertEqual(screen.row_text(0), "      ")
+        self.assertNotIn(CONTINUATION, screen.chars)
+
+    def test_row_equals_and_copy_from(self):
+        other = ScreenBuffer(5, 3)
+        self.screen.write(0, 1, "x")
+        self.assertTrue(self.screen.row_equals(other, 0))
+        self.assertFalse(self.screen.row_equals(other, 1))
+
+        other.copy_from(self.screen)
+        self.assertTrue(self.screen.row_equals(other, 1))
+
+        self.screen.write(0, 1, "y", 2)
+        self.assertFalse(self.screen.row_equals(other, 1))
+
+    def test_encode_decode(self):
+        self.assertEqual(decode(encode("hello")), "hello")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import atexit
+import unittest
+from unittest import mock
+from pywinterm.display import RootDisplay, Display, widget, buffer
+from pywinterm.display.backend import HeadlessBackend
+
+
+class DamageTest(unittest.TestCase):
+    """
+    Only the damaged parts of the screen are composited again, which has to give the same screen as compositing all
+    of it
+    """
+    pipelined = False
+
+    def setUp(self):
+        self.root = RootDisplay("test", backend=HeadlessBackend(30, 8), width=30, height=8, pipelined=self.pipelined)
+        self.addCleanup(self.root.close)
+        self.label = widget.Label("label")
+        self.root.print("first line", self.label, "中文 wide " * 4)
+
+        self.child = Display(width=10, height=3, x=2, y=3)
+        self.child.print("child", "中中中中中")
+        self.root.add_display(self.child)
+
+        self.cover = Display(width=6, height=2, x=20, y=0, opaque=True)
+        self.cover.print("cover")
+        self.root.add_display(self.cover)
+
+        self.check()
+
+    def flatten(self):
+        if not self.pipelined:
+            return self.root.flatten()
+
+        self.root.render()
+        self.root.pipeline.flush()
+        return self.root.screen
+
+    def check(self):
+        screen = self.flatten()
+
+        expected = buffer.ScreenBuffer(screen.width, screen.height)
+        for x, y, chars, styles in self.root.rasterize():
+            expected.blit(x, y, chars, styles)
+
+        self.assertEqual(list(screen), list(expected))
+        self.assertEqual(screen.chars, expected.chars)
+        self.assertEqual(screen.styles, expected.styles)
+        return screen
+
+    def test_unchanged_keeps_the_screen(self):
+        screen = self.flatten()
+        self.root.invalidate()
+        self.assertIs(self.check(), screen)
+
+    def test_label_changed(self):
+        self.label.text = "changed"
+        self.assertEqual(self.check().row_text(1).rstrip(), "changed")
+
+    def test_child_moved(self):
+        self.child.x = 14
+        self.child.y = 4
+        self.check()
+        self.child.x = 1
+        self.check()
+
+    def test_child_over_wide_characters(self):
+        self.child.y = 2  # the child's text starts half way through a wide character
+        self.check()
+        self.child.x = 3
+        self.check()
+
+    def test_runs_underneath_are_drawn_whole(self):
+        self.child.y = 2  # over the wide line, along with another child which changes
+        other = Display(width=5, height=1, x=22, y=2)
+        other.print("other")
+        self.root.add_display(other)
+        self.check()
+
+        other.clear()
+        other.print("new")
+        self.check()
+
+    def test_child_text_changed(self):
+        self.child.clear()
+        self.child.print("中 x")
+        self.check()
+
+    def test_child_removed_and_added(self):
+        self.root.children.remove(self.child)
+        self.root.invalidate()
+        self.check()
+        self.root.add_display(self.child)
+        self.check()
+
+    def test_cover_moved_and_restacked(self):
+        self.cover.x = 0
+        self.cover.y = 2
+        self.check()
+        self.cover.z = -1
+        self.check()
+        self.cover.opaque = False
+        self.check()
+
+    def test_nested(self):
+        grandchild = Display(width=4, height=1, x=5, y=1)
+        grandchild.print("gc")
+        self.child.add_display(grandchild)
+        self.check()
+        grandchild.x = 7
+        self.check()
+        grandchild.clear()
+        self.check()
+
+    def test_resize(self):
+        self.root.resize_window(20, 5)
+        self.root.invalidate_all()
+        self.check()
+
+    def test_many_changes(self):
+        for i in range(50):
+            self.label.text = "l" * (i % 7)
+            self.child.x = i % 25
+            self.cover.y = i % 7
+            if i % 3 == 0:
+                self.child.print("more %d" % i)
+            self.check()
+
+    def test_opaque_child_cutting_a_wide_character(self):
+        self.root.clear()
+        self.root.print("", "", "", "", "", widget.Label("b éa bébb中b"))
+        self.check()
+
+        cover = Display(width=8, height=3, x=0, y=0, opaque=True)
+        self.root.add_display(cover)
+        self.check()
+
+        cover.x = 10  # over the second half of the wide character, which is left showing nothing
+        cover.y = 4
+        screen = self.check()
+        self.assertEqual(screen.row_text(5), "b éa bébb" + " " * 21)
+        for y in range(screen.height):
+            self.assertEqual(len(screen.row_text(y)), screen.width)
+
+
+class PipelinedDamageTest(DamageTest):
+    """
+    The same, with the buffers swapped with the output thread, each of them a frame or two behind when it comes back
+    """
+    pipelined = True
+
+    def test_buffers_are_swapped_not_copied(self):
+        screens = set()
+        with mock.patch.object(buffer.ScreenBuffer, 'copy_from', side_effect=AssertionError("copied")):
+            for i in range(10):
+                self.label.text = "frame %d" % i
+                screens.add(id(self.check()))
+
+        self.assertLessEqual(len(screens), 3)
+        self.assertEqual(self.root.screen.row_text(1).rstrip(), "frame 9")
+
+    def test_skipped_frames(self):
+        for i in range(30):
+            self.label.text = "l" * (i % 5)
+            self.child.x = i % 20
+            self.root.render()  # without waiting for it to be written, so some are skipped
+        self.check()
+        self.assertIs(self.root.renderer.previous, self.root.screen)
+
+    def test_close_stops_the_output_thread(self):
+        self.label.text = "last"
+        self.root.render()
+        with mock.patch.object(atexit, 'unregister') as unregister:
+            self.root.close()
+
+        self.assertFalse(self.root.pipeline._thread.is_alive())
+        self.assertIs(self.root.renderer.previous, self.root.screen)  # the last frame was written first
+        unregister.assert_called_once_with(self.root.pipeline.stop)
+        atexit.unregister(self.root.pipeline.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
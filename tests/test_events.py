@@ -0,0 +1,144 @@
+import time
+import threading
+import unittest
+from pywinterm import key
+from pywinterm.key import events
+from pywinterm.display.server import SocketKeyReader
+
+
+class EventQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.reader = SocketKeyReader()
+        key.set_reader(self.reader)
+        self.addCleanup(self.cleanup)
+
+    def cleanup(self):
+        key.stop_events()
+        key.set_reader(None)
+        key.set_event_queue(None)
+        key.clear_keypresses()
+
+    def push(self, *keys):
+        """
+        Types keys, and waits for them to be read on to the event queue
+        """
+        queue = key.get_event_queue()
+        for k in keys:
+            before = len(queue) + queue.overflow_count
+            self.reader.push([key.as_key(k)])
+
+            deadline = time.monotonic() + 2
+            while len(queue) + queue.overflow_count == before and time.monotonic() < deadline:
+                time.sleep(0.001)
+
+    def frame(self):
+        keys = [str(event.key) for event in key.drain_events()]
+        key.clear_keypresses()
+        return keys
+
+    def test_keys_waiting_before_the_first_frame(self):
+        self.reader.push([key.as_key('a')])
+        self.assertEqual(self.frame(), ['a'])
+
+    def test_key_stamped_when_read_not_when_drained(self):
+        self.frame()  # starts reading
+        self.push('a')
+        read = time.monotonic()
+        time.sleep(0.05)
+
+        drained = key.drain_events()
+        self.assertEqual(len(drained), 1)
+        self.assertLessEqual(drained[0].timestamp, read)
+        self.assertTrue(key.key_down('a'))
+
+    def test_keys_wait_for_the_next_frame(self):
+        self.frame()
+        self.push('a', 'b')
+        self.assertEqual(self.frame(), ['a', 'b'])
+        self.assertEqual(self.frame(), [])
+        self.push('c')
+        self.assertEqual(self.frame(), ['c'])
+
+    def test_drop_oldest_across_frames(self):
+        key.set_event_queue(events.KeyEventQueue(3, events.DROP_OLDEST))
+        self.frame()
+        self.push('a', 'b')
+        self.push('c', 'd', 'e')
+        self.assertEqual(self.frame(), ['c', 'd', 'e'])
+        self.assertEqual(key.get_event_queue().overflow_count, 2)
+
+    def test_drop_newest_across_frames(self):
+        key.set_event_queue(events.KeyEventQueue(3, events.DROP_NEWEST))
+        self.frame()
+        self.push('a', 'b')
+        self.push('c', 'd', 'e')
+        self.assertEqual(self.frame(), ['a', 'b', 'c'])
+        self.assertEqual(key.get_event_queue().overflow_count, 2)
+
+    def test_raise_across_frames(self):
+        key.set_event_queue(events.KeyEventQueue(3, events.RAISE))
+        self.frame()
+        self.push('a', 'b', 'c', 'd')
+        self.assertRaises(events.KeyQueueOverflow, key.drain_events)
+        self.assertEqual(self.frame(), ['a', 'b', 'c'])
+
+    def test_pressed_takes_from_the_queue(self):
+        self.frame()
+        self.push('a')
+        self.assertEqual(key.pressed(1), 'a')
+        self.assertEqual(self.frame(), [])
+
+    def test_interrupt_wakes_pressed(self):
+        self.frame()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(key.pressed(None)))
+        thread.start()
+        time.sleep(0.05)
+
+        key.get_reader().interrupt()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [None])
+
+    def test_wait_for_keypress(self):
+        self.frame()
+        self.assertFalse(key.wait_for_keypress(0.01))
+        self.push('a')
+        self.assertTrue(key.wait_for_keypress(0))
+
+
+
+class KeyEventQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = events.KeyEventQueue(4)
+
+    def test_interrupt_wakes_a_waiting_get(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.queue.get(None)))
+        thread.start()
+        time.sleep(0.05)
+
+        self.queue.interrupt()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [None])
+
+    def test_interrupt_with_nothing_waiting_is_forgotten(self):
+        self.queue.interrupt()
+
+        start = time.monotonic()
+        self.assertIsNone(self.queue.get(0.2))
+        self.assertFalse(self.queue.wait(0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+
+    def test_event_reader_stops_straight_after_start(self):
+        reader = SocketKeyReader()
+        for i in range(20):  # the thread may not have started reading yet
+            event_reader = events.EventReader(reader, self.queue)
+            event_reader.start()
+            event_reader.stop()
+            self.assertFalse(event_reader.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest import mock
+from pywinterm import key
+from pywinterm.display.focus import FocusManager
+from pywinterm.display.server import SocketKeyReader
+from pywinterm.key.key import TAB, SHIFT_TAB
+
+
+class Focusable:
+    def __init__(self, name):
+        self.name = name
+        self.keys = []
+
+    def keypress_handler(self, k, rerender_event):
+        self.keys.append(str(k))
+
+    def __repr__(self):
+        return '<Focusable name: %r>' % self.name
+
+
+class FocusManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.reader = SocketKeyReader()
+        key.set_reader(self.reader)
+        self.addCleanup(key.set_reader, None)
+
+        self.manager = FocusManager()
+        self.addCleanup(self.manager.stop)
+
+        self.widgets = [Focusable(name) for name in "abc"]
+        for widget in self.widgets:
+            self.manager.add(widget)
+
+    def type(self, *keys):
+        self.reader.push([key.as_key(k) for k in keys])
+        deadline = time.monotonic() + 2
+        while self.reader._keys and time.monotonic() < deadline:
+            time.sleep(0.001)
+        time.sleep(0.02)  # for the last key to be dispatched
+
+    def test_keys_go_to_the_focused_widget(self):
+        a, b, c = self.widgets
+        self.manager.focus(b)
+        self.type('x', 'y')
+        self.assertEqual(b.keys, ['x', 'y'])
+        self.assertEqual(a.keys + c.keys, [])
+
+    def test_tab_and_shift_tab_cycle(self):
+        a, b, c = self.widgets
+        self.manager.focus(a)
+
+        focused = []
+        for k in (TAB, TAB, TAB, SHIFT_TAB, SHIFT_TAB):
+            self.type(k)
+            focused.append(self.manager.focused)
+        self.assertEqual(focused, [b, c, a, c, b])
+        self.assertEqual(a.keys + b.keys + c.keys, [])
+
+    def test_keys_after_blur_are_left_alone(self):
+        a = self.widgets[0]
+        self.manager.focus(a)
+        self.type('x')
+        self.manager.blur()
+
+        self.reader.push([key.as_key('y')])
+        self.assertEqual(key.pressed(1), 'y')  # not taken by the manager
+        self.assertEqual(a.keys, ['x'])
+
+    def test_key_read_as_focus_is_lost_goes_to_the_next_widget(self):
+        a, b, c = self.widgets
+
+        def blurred_while_reading(timeout):
+            self.manager.blur()
+            return key.as_key('x')
+
+        with mock.patch.object(key, 'pressed', side_effect=blurred_while_reading):
+            self.manager.focus(a)
+            self.assertTrue(self.manager.wait_blurred(a, 2))
+            time.sleep(0.02)
+        self.assertEqual(a.keys, [])
+
+        self.manager.focus(b)
+        self.type()
+        self.assertEqual(b.keys, ['x'])
+
+    def test_stop(self):
+        self.manager.focus(self.widgets[0])
+        time.sleep(0.02)  # so it's waiting for a key
+        self.manager.stop()
+
+        self.assertIsNone(self.manager.focused)
+        self.assertIsNone(self.manager._thread)
+        self.reader.push([key.as_key('y')])
+        self.assertEqual(key.pressed(1), 'y')
+
+    def test_stop_from_a_keypress_handler(self):
+        a = self.widgets[0]
+        a.keypress_handler = lambda k, rerender_event: self.manager.stop()
+        self.manager.focus(a)
+        thread = self.manager._thread
+        self.type('x')
+
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.manager.focused)
+
+
+if __name__ == '__main__':
+    unittest.main()
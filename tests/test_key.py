@@ -0,0 +1,83 @@
+import os
+import sys
+import pickle
+import threading
+import unittest
+from pywinterm import key
+from pywinterm.key import Key, as_key
+from pywinterm.key.reader import PosixKeyReader
+
+
+class KeyTest(unittest.TestCase):
+    def test_interned(self):
+        self.assertIs(Key(97), Key(97))
+        self.assertIs(Key(72, True), Key(72, 1))
+        self.assertIsNot(Key(72), Key(72, True))
+        self.assertIs(as_key('a'), Key(97))
+        self.assertIs(pickle.loads(pickle.dumps(Key(98))), Key(98))
+
+    def test_interned_across_threads(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        ids = range(0x50000, 0x50000 + 2000)  # not interned by anything else yet
+        threads = 8
+        barrier = threading.Barrier(threads)
+        results = [None] * threads
+
+        def run(n):
+            barrier.wait()
+            results[n] = [Key(i) for i in ids]
+
+        running = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+        for thread in running:
+            thread.start()
+        for thread in running:
+            thread.join()
+
+        for keys in results[1:]:
+            for a, b in zip(results[0], keys):
+                self.assertIs(a, b)
+        self.assertEqual(len(set(map(id, results[0]))), len(ids))
+
+
+
+@unittest.skipIf(os.name != 'posix', "reads keys from a pipe")
+class ThreadedKeyListenerTest(unittest.TestCase):
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, self.write_fd)
+
+        previous = key.get_reader() if key._reader is not None else None
+        key.set_reader(PosixKeyReader(read_fd))
+        self.addCleanup(key.set_reader, previous)
+
+    def test_keys_are_handled(self):
+        handled = threading.Event()
+        keys = []
+
+        def handler(k, rerender_event):
+            keys.append(k)
+            handled.set()
+
+        listener = key.ThreadedKeyListener(threading.Event(), handler)
+        listener.start()
+        os.write(self.write_fd, b'x')
+        self.assertTrue(handled.wait(2))
+
+        listener.stop()
+        self.assertFalse(listener.is_alive())
+        self.assertEqual(keys, [Key(ord('x'))])
+
+    def test_stop_straight_after_start(self):
+        for i in range(20):  # the thread may not have started waiting for a key yet
+            listener = key.ThreadedKeyListener(threading.Event())
+            listener.start()
+            listener.stop()
+            self.assertFalse(listener.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
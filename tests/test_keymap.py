@@ -0,0 +1,85 @@
+import unittest
+from pywinterm.key import Key, as_key
+from pywinterm.key.keymap import KeyMap
+
+
+class KeyMapTest(unittest.TestCase):
+    def setUp(self):
+        self.keymap = KeyMap()
+        self.calls = []
+
+    def handler(self, name):
+        return lambda k, *args: self.calls.append((name, str(k)) + args)
+
+    def type(self, keys):
+        return [self.keymap.dispatch(as_key(k)) for k in keys]
+
+    def test_single_keys(self):
+        self.keymap.bind('a', self.handler('a'))
+        self.keymap.bind_all('bc', self.handler('bc'))
+
+        self.assertTrue(self.keymap.dispatch(Key(97), 'extra'))
+        self.assertEqual(self.type('bcd'), [True, True, False])
+        self.assertEqual(self.calls, [('a', 'a', 'extra'), ('bc', 'b'), ('bc', 'c')])
+
+    def test_chords(self):
+        self.keymap.bind(('x', 's'), self.handler('save'))
+        self.keymap.bind('xq', self.handler('quit'))
+
+        self.assertEqual(self.type('x'), [True])
+        self.assertEqual(self.keymap.pending, (Key(ord('x')),))
+        self.assertEqual(self.calls, [])
+
+        self.type('s')
+        self.assertEqual(self.keymap.pending, ())
+        self.type('xq')
+        self.assertEqual(self.calls, [('save', 's'), ('quit', 'q')])
+
+    def test_abandoned_sequence_starts_again(self):
+        self.keymap.bind('xs', self.handler('save'))
+        self.keymap.bind('y', self.handler('y'))
+
+        self.assertEqual(self.type('xy'), [True, True])  # y isn't part of the sequence, but is bound by itself
+        self.assertEqual(self.keymap.pending, ())
+        self.assertEqual(self.type('xz'), [True, False])
+        self.assertEqual(self.calls, [('y', 'y')])
+
+    def test_prefixes_conflict(self):
+        self.keymap.bind('x', self.handler('x'))
+        self.assertRaises(ValueError, self.keymap.bind, 'xs', self.handler('save'))
+
+        self.keymap.bind('ab', self.handler('ab'))
+        self.assertRaises(ValueError, self.keymap.bind, 'a', self.handler('a'))
+
+    def test_lookup_and_contains(self):
+        handler = self.handler('save')
+        self.keymap.bind('xs', handler)
+
+        self.assertIs(self.keymap.lookup('xs'), handler)
+        self.assertIsNone(self.keymap.lookup('x'))  # only the start of a sequence
+        self.assertIn(('x', 's'), self.keymap)
+        self.assertNotIn('y', self.keymap)
+
+    def test_unbind_tidies_up(self):
+        self.keymap.bind('xs', self.handler('save'))
+        self.type('x')
+        self.keymap.unbind('xs')
+
+        self.assertEqual(self.keymap.pending, ())
+        self.assertNotIn('xs', self.keymap)
+        self.keymap.bind('x', self.handler('x'))  # no longer starts a sequence
+        self.type('x')
+        self.assertEqual(self.calls, [('x', 'x')])
+
+    def test_default(self):
+        self.keymap.default = self.handler('default')
+        self.keymap.bind('a', self.handler('a'))
+        self.assertEqual(self.type('ab'), [True, True])
+        self.assertEqual(self.calls, [('a', 'a'), ('default', 'b')])
+
+    def test_only_keys_can_be_bound(self):
+        self.assertRaises(ValueError, self.keymap.bind, (), self.handler('nothing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from unittest import mock
+from pywinterm.display import Box, Display, layout
+
+
+def geometry(display):
+    return display.x, display.y, display.width, display.height
+
+
+class DistributeTest(unittest.TestCase):
+    def test_fixed_and_percent_first(self):
+        self.assertEqual(layout.distribute([layout.fixed(3), layout.percent(50), layout.flex()], 20), [3, 10, 7])
+
+    def test_flex_by_weight(self):
+        self.assertEqual(layout.distribute([layout.flex(1), layout.flex(2)], 9), [3, 6])
+
+    def test_rounding_leaves_nothing_over(self):
+        self.assertEqual(sum(layout.distribute([layout.flex()] * 3, 10)), 10)
+
+    def test_gap(self):
+        lengths = layout.distribute([layout.flex(), layout.flex()], 11, gap=1)
+        self.assertEqual(lengths, [5, 5])
+        self.assertEqual(layout.offsets(lengths, 2, gap=1), [2, 8])
+
+    def test_no_room_for_flex(self):
+        self.assertEqual(layout.distribute([layout.fixed(8), layout.flex()], 5), [8, 0])
+
+    def test_align(self):
+        self.assertEqual(layout.align(4, 10, layout.START), (0, 4))
+        self.assertEqual(layout.align(4, 10, layout.CENTRE), (3, 4))
+        self.assertEqual(layout.align(4, 10, layout.END), (6, 4))
+        self.assertEqual(layout.align(4, 10, layout.STRETCH), (0, 10))
+        self.assertEqual(layout.align(14, 10, layout.START), (0, 10))
+
+    def test_padding(self):
+        self.assertEqual(layout.as_padding(1), (1, 1, 1, 1))
+        self.assertEqual(layout.as_padding((1, 2)), (1, 2, 1, 2))
+        self.assertEqual(layout.as_padding((1, 2, 3, 4)), (1, 2, 3, 4))
+
+
+class BoxTest(unittest.TestCase):
+    def test_vertical(self):
+        box = Box(width=10, height=20, padding=1, gap=1)
+        top = Display(width=5, height=3)
+        middle = Display(width=5, height=3)
+        bottom = Display(width=5, height=3)
+        box.add_display(top)
+        box.add_display(middle, height=layout.flex())
+        box.add_display(bottom, height=layout.percent(50))
+        box.layout()
+
+        self.assertEqual(geometry(top), (1, 1, 8, 3))
+        self.assertEqual(geometry(middle), (1, 5, 8, 4))
+        self.assertEqual(geometry(bottom), (1, 10, 8, 9))
+
+    def test_horizontal_aligned(self):
+        box = Box(width=20, height=5, direction=layout.HORIZONTAL, align=layout.END)
+        left = Display(width=4, height=2)
+        right = Display(width=4, height=3)
+        box.add_display(left)
+        box.add_display(right, width=layout.flex())
+        box.layout()
+
+        self.assertEqual(geometry(left), (0, 3, 4, 2))
+        self.assertEqual(geometry(right), (4, 2, 16, 3))
+
+    def test_nested_box_is_measured(self):
+        outer = Box(width=30, height=10, direction=layout.HORIZONTAL, align=layout.START)
+        inner = Box(direction=layout.VERTICAL, gap=1, align=layout.START)
+        inner.add_display(Display(width=6, height=2))
+        inner.add_display(Display(width=4, height=3))
+        outer.add_display(inner)
+        outer.add_display(Display(width=5, height=1))
+
+        self.assertEqual(inner.measure(), (6, 6))
+        outer.layout()
+        self.assertEqual(geometry(inner), (0, 0, 6, 6))
+        self.assertEqual(outer.children[1].x, 6)
+
+    def test_relayout_only_when_changed(self):
+        box = Box(width=10, height=10)
+        box.add_display(Display(width=5, height=2))
+        box.layout()
+
+        with mock.patch.object(layout, 'distribute', wraps=layout.distribute) as distribute:
+            box.layout()
+            box.rasterize()
+            box.layout()
+            self.assertEqual(distribute.call_count, 0)
+
+            box.gap = 2
+            box.layout()
+            self.assertEqual(distribute.call_count, 1)
+
+    def test_change_only_relays_out_its_branch(self):
+        outer = Box(width=20, height=20)
+        first = Box()
+        second = Box()
+        first.add_display(Display(width=5, height=2))
+        second.add_display(Display(width=5, height=2))
+        outer.add_display(first, height=layout.flex())
+        outer.add_display(second, height=layout.flex())
+        outer.layout()
+        outer.rasterize()
+
+        with mock.patch.object(Box, 'arrange', autospec=True, side_effect=Box.arrange) as arrange:
+            second.set_size(second.children[0], height=4)
+            outer.layout()
+            self.assertNotIn(first, [call[0][0] for call in arrange.call_args_list])
+            self.assertIn(second, [call[0][0] for call in arrange.call_args_list])
+
+        self.assertEqual(second.children[0].height, 4)
+
+    def test_child_resized_directly(self):
+        box = Box(width=20, height=10, direction=layout.HORIZONTAL, align=layout.START)
+        left = Display(width=4, height=2)
+        right = Display(width=5, height=2)
+        box.add_display(left)
+        box.add_display(right, height=layout.flex())
+        box.layout()
+
+        left.width = 7  # sized from its own width, so it keeps the new one
+        left.height = 3
+        box.layout()
+        self.assertEqual(geometry(left), (0, 0, 7, 3))
+        self.assertEqual(geometry(right), (7, 0, 5, 10))
+        self.assertEqual(box.measure(), (12, 3))
+
+        right.height = 4  # the layout decides it, so it goes back
+        box.layout()
+        self.assertEqual(geometry(right), (7, 0, 5, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
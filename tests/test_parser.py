@@ -0,0 +1,119 @@
+import os
+import time
+import unittest
+from pywinterm.key import Key, Paste
+from pywinterm.key.key import ESCAPE, UP, DOWN, LEFT, RIGHT, HOME, END, SHIFT_TAB, DELETE, PAGE_UP, F1, F4, F5, F12
+from pywinterm.key.parser import InputParser
+from pywinterm.key.reader import PosixKeyReader
+
+
+def comparable(events):
+    """
+    Pastes don't compare equal, so they are replaced with their text
+    """
+    return [('paste', event.text) if isinstance(event, Paste) else event for event in events]
+
+
+class InputParserTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = InputParser()
+
+    def test_characters(self):
+        self.assertEqual(self.parser.feed(b'ab\x7f\n'), [Key(97), Key(98), Key(8), Key(13)])
+        self.assertFalse(self.parser.pending)
+
+    def test_csi(self):
+        self.assertEqual(self.parser.feed(b'\033[A\033[B\033[C\033[D\033[H\033[F\033[Z'),
+                         [UP, DOWN, RIGHT, LEFT, HOME, END, SHIFT_TAB])
+        self.assertEqual(self.parser.feed(b'\033[3~\033[5~\033[15~\033[24~'), [DELETE, PAGE_UP, F5, F12])
+        self.assertEqual(self.parser.feed(b'\033[1;5A'), [UP])  # modifiers are ignored
+
+    def test_ss3(self):
+        self.assertEqual(self.parser.feed(b'\033OA\033OP\033OS'), [UP, F1, F4])
+
+    def test_unknown_sequences_are_skipped(self):
+        self.assertEqual(self.parser.feed(b'a\033[99~b\033[1;2xc'), [Key(97), Key(98), Key(99)])
+
+    def test_sequence_split_across_reads(self):
+        self.assertEqual(self.parser.feed(b'a\033'), [Key(97)])
+        self.assertTrue(self.parser.pending)
+        self.assertEqual(self.parser.feed(b'['), [])
+        self.assertEqual(self.parser.feed(b'1'), [])
+        self.assertEqual(self.parser.feed(b'5~b'), [F5, Key(98)])
+        self.assertFalse(self.parser.pending)
+
+    def test_lone_escape_is_flushed(self):
+        self.assertEqual(self.parser.feed(b'\033'), [])
+        self.assertTrue(self.parser.pending)
+        self.assertEqual(self.parser.timeout, self.parser.escape_timeout)
+
+        self.assertEqual(self.parser.flush(), [ESCAPE])
+        self.assertFalse(self.parser.pending)
+        self.assertEqual(self.parser.flush(), [])
+
+    def test_escape_then_a_key(self):
+        self.assertEqual(self.parser.feed(b'\033a'), [ESCAPE, Key(97)])
+        self.assertEqual(self.parser.feed(b'\033\033'), [ESCAPE])
+        self.assertEqual(self.parser.flush(), [ESCAPE])
+
+    def test_unfinished_sequence_flushed_as_keys(self):
+        self.parser.feed(b'\033[1')
+        self.assertEqual(self.parser.flush(), [ESCAPE, Key(ord('[')), Key(ord('1'))])
+
+    def test_garbage_sequence_isnt_waited_for(self):
+        self.assertEqual(self.parser.feed(b'\033[' + b'1' * 40)[0], ESCAPE)
+
+    def test_paste(self):
+        self.assertEqual(comparable(self.parser.feed(b'a\033[200~x\033[Ay\r\033[201~b')),
+                         [Key(97), ('paste', 'x\033[Ay\r'), Key(98)])
+
+    def test_paste_split_across_reads(self):
+        self.assertEqual(self.parser.feed(b'\033[20'), [])
+        self.assertEqual(self.parser.feed(b'0~hel'), [])
+        self.assertTrue(self.parser.pending)
+        self.assertEqual(self.parser.timeout, self.parser.paste_timeout)
+
+        self.assertEqual(self.parser.feed(b'lo\033[2'), [])  # might be the end of the paste
+        self.assertEqual(self.parser.feed(b'x wor'), [])  # wasn't
+        self.assertEqual(self.parser.feed(b'ld\033[201'), [])
+        self.assertEqual(comparable(self.parser.feed(b'~!')), [('paste', 'hello\033[2x world'), Key(33)])
+        self.assertFalse(self.parser.pending)
+
+    def test_paste_which_never_ends_is_flushed(self):
+        self.parser.feed(b'\033[200~abc\033[20')
+        self.assertEqual(comparable(self.parser.flush()), [('paste', 'abc\033[20')])
+        self.assertFalse(self.parser.pending)
+
+    def test_utf8_split_across_reads(self):
+        data = 'é中'.encode()
+        keys = []
+        for i in range(len(data)):
+            keys.extend(self.parser.feed(data[i:i + 1]))
+        self.assertEqual(keys, [Key(ord('é')), Key(ord('中'))])
+
+    def test_utf8_split_in_a_paste(self):
+        data = '\033[200~中文\033[201~'.encode()
+        events = self.parser.feed(data[:8]) + self.parser.feed(data[8:])
+        self.assertEqual(comparable(events), [('paste', '中文')])
+
+
+@unittest.skipIf(os.name != 'posix', "PosixKeyReader needs a POSIX system")
+class EscapeTimeoutTest(unittest.TestCase):
+    def test_lone_escape_is_read_after_the_timeout(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        reader = PosixKeyReader(read_fd, InputParser(escape_timeout=0.1))
+
+        os.write(write_fd, b'\033')
+        start = time.monotonic()
+        self.assertEqual(reader.read(2), ESCAPE)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertLess(time.monotonic() - start, 1)
+
+        os.write(write_fd, b'\033[A')
+        self.assertEqual(reader.read(2), UP)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Tests for the blocking key readers
+"""
+import os
+import time
+import unittest
+import threading
+import collections
+from pywinterm.key import Key
+from pywinterm.key.reader import PosixKeyReader, WindowsKeyReader
+
+
+class FakeConsole:
+    """
+    Stands in for msvcrt and kernel32, so WindowsKeyReader can be tested anywhere
+    """
+    WAIT_TIMEOUT = 0x102
+
+    def __init__(self):
+        self.keys = []
+        self.changed = threading.Condition()
+        self.woken = False
+
+    def type(self, data):
+        with self.changed:
+            self.keys.extend(data)
+            self.changed.notify_all()
+
+    def kbhit(self):
+        return bool(self.keys)
+
+    def getch(self):
+        return bytes([self.keys.pop(0)])
+
+    def WaitForMultipleObjects(self, count, handles, wait_all, milliseconds):
+        timeout = None if milliseconds == WindowsKeyReader.INFINITE else milliseconds / 1000
+        with self.changed:
+            self.changed.wait_for(lambda: self.keys or self.woken, timeout)
+            if self.keys:
+                return WindowsKeyReader.WAIT_OBJECT_0
+            if self.woken:
+                return WindowsKeyReader.WAIT_OBJECT_0 + 1
+            return self.WAIT_TIMEOUT
+
+    def SetEvent(self, handle):
+        with self.changed:
+            self.woken = True
+            self.changed.notify_all()
+
+    def ResetEvent(self, handle):
+        with self.changed:
+            self.woken = False
+
+
+@unittest.skipIf(os.name != 'posix', "PosixKeyReader needs a POSIX system")
+class PosixKeyReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()  # not a terminal, so it isn't put in to raw mode
+        self.reader = PosixKeyReader(self.read_fd)
+
+    def tearDown(self):
+        self.reader.interrupt()
+        os.close(self.write_fd)
+        os.close(self.read_fd)
+
+    def test_read_available_while_another_thread_reads(self):
+        keys = []
+        reading = threading.Thread(target=lambda: keys.append(self.reader.read()))
+        reading.start()
+        time.sleep(0.1)  # so it's waiting inside read()
+
+        start = time.monotonic()
+        self.assertEqual(self.reader.read_available(), [])
+        self.assertIsNone(self.reader.read(0))
+        self.assertLess(time.monotonic() - start, 1)
+
+        os.write(self.write_fd, b'x')
+        reading.join(2)
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(keys, [Key(ord('x'))])
+
+    def test_read_available_gets_keys_a_waiting_thread_hasnt(self):
+        os.write(self.write_fd, b'ab')
+        self.assertEqual(self.reader.read_available(), [Key(ord('a')), Key(ord('b'))])
+
+    def test_escape_on_its_own_is_flushed(self):
+        os.write(self.write_fd, b'\033')
+        self.assertEqual(self.reader.read(1), Key(27))
+
+    def test_interrupt_wakes_a_waiting_read(self):
+        keys = []
+        reading = threading.Thread(target=lambda: keys.append(self.reader.read()))
+        reading.start()
+        time.sleep(0.1)
+
+        self.reader.interrupt()
+        reading.join(2)
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(keys, [None])
+
+    def test_interrupt_with_nothing_waiting_is_forgotten(self):
+        self.reader.interrupt()
+
+        start = time.monotonic()
+        self.assertIsNone(self.reader.read(0.2))
+        self.assertFalse(self.reader.wait(0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+
+
+
+class WindowsKeyReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.console = FakeConsole()
+        self.reader = WindowsKeyReader.__new__(WindowsKeyReader)
+        self.reader._msvcrt = self.reader._kernel32 = self.console
+        self.reader._handles = self.reader._wake_event = None
+        self.reader._lock = threading.Lock()
+        self.reader._interrupts = 0
+        self.reader._waiting = collections.Counter()
+
+    def test_read(self):
+        self.console.type(b'a\xe0H')
+        self.assertEqual(self.reader.read(0), Key(ord('a')))
+        self.assertEqual(self.reader.read(0), Key(ord('H'), True))
+        self.assertIsNone(self.reader.read(0))
+
+    def test_read_available_while_another_thread_reads(self):
+        keys = []
+        reading = threading.Thread(target=lambda: keys.append(self.reader.read(2)))
+        reading.start()
+        time.sleep(0.1)  # so it's waiting inside read()
+
+        start = time.monotonic()
+        self.assertEqual(self.reader.read_available(), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+        self.console.type(b'x')
+        reading.join(2)
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(keys, [Key(ord('x'))])
+
+    def test_interrupt_wakes_a_waiting_read(self):
+        keys = []
+        reading = threading.Thread(target=lambda: keys.append(self.reader.read()))
+        reading.start()
+        time.sleep(0.1)
+
+        self.reader.interrupt()
+        reading.join(2)
+        self.assertFalse(reading.is_alive())
+        self.assertEqual(keys, [None])
+
+    def test_interrupt_with_nothing_waiting_is_forgotten(self):
+        self.reader.interrupt()
+
+        start = time.monotonic()
+        self.assertIsNone(self.reader.read(0.2))
+        self.assertFalse(self.reader.wait(0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pywinterm.display import RootDisplay, renderer, widget
+from pywinterm.display.backend import HeadlessBackend
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'session.cast')
+
+        self.backend = HeadlessBackend(20, 3)
+        self.root = RootDisplay("recorded", backend=self.backend, width=20, height=3, max_fps=None)
+        self.label = widget.Label("first")
+        self.root.print(self.label)
+
+    def tearDown(self):
+        self.root.stop_recording()
+        shutil.rmtree(self.directory)
+
+    def events(self):
+        with open(self.path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        return lines[0], lines[1:]
+
+    def test_header_and_frames(self):
+        recorder = self.root.start_recording(self.path)
+        self.root.render()
+        self.label.text = "again"
+        self.root.render()
+        self.root.render()  # nothing changed, so nothing is recorded
+        self.assertIs(self.root.stop_recording(), recorder)
+
+        header, events = self.events()
+        self.assertEqual(header['version'], 2)
+        self.assertEqual((header['width'], header['height']), (20, 4))
+        self.assertEqual(header['title'], "recorded")
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(recorder.frames, 2)
+        self.assertEqual([event[1] for event in events], ['o', 'o'])
+        self.assertLessEqual(events[0][0], events[1][0])
+
+        output = self.backend.getvalue()
+        for event in events:
+            self.assertIn(event[2], output)  # exactly what was sent to the terminal
+        self.assertIn(renderer.CLEAR_SCREEN, events[0][2])
+        self.assertNotIn(renderer.CLEAR_SCREEN, events[1][2])
+
+    def test_recording_starts_with_a_keyframe(self):
+        self.root.render()
+        self.root.start_recording(self.path)
+        self.label.text = "again"
+        self.root.render()
+        self.root.stop_recording()
+
+        header, events = self.events()
+        self.assertEqual(len(events), 1)
+        self.assertIn(renderer.CLEAR_SCREEN, events[0][2])
+        self.assertIn("again", events[0][2])
+
+    def test_frames_after_a_drop_wait_for_a_keyframe(self):
+        recorder = self.root.start_recording(self.path)
+        self.root.render()
+        recorder.drop()
+
+        with mock.patch.object(recorder, 'has_room', return_value=False):
+            self.label.text = "again"
+            self.root.render()
+        self.assertEqual(recorder.dropped, 2)
+
+        self.label.text = "third"
+        self.root.render()
+        self.root.stop_recording()
+
+        header, events = self.events()
+        self.assertEqual(len(events), 2)
+        self.assertIn(renderer.CLEAR_SCREEN, events[1][2])
+        self.assertIn("third", events[1][2])
+
+    def test_stopping_after_a_drop_ends_with_a_keyframe(self):
+        recorder = self.root.start_recording(self.path)
+        self.root.render()
+        recorder.drop()
+        self.root.stop_recording()
+
+        header, events = self.events()
+        self.assertEqual(len(events), 2)
+        self.assertIn(renderer.CLEAR_SCREEN, events[1][2])
+        self.assertIn("first", events[1][2])
+        self.assertFalse(recorder.needs_keyframe)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+from pywinterm.display import renderer
+from pywinterm.display import backend
+from pywinterm.display.backend import HeadlessBackend
+from pywinterm.display.buffer import ScreenBuffer
+
+
+def screen(*rows):
+    buffer = ScreenBuffer(len(rows[0]), len(rows))
+    for y, row in enumerate(rows):
+        buffer.write(0, y, row)
+    return buffer
+
+
+class DiffRendererTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = HeadlessBackend()
+        self.renderer = renderer.DiffRenderer(self.backend)
+
+    def render(self, frame, full=False):
+        before = len(self.backend.getvalue())
+        self.renderer.render(frame, full)
+        return self.backend.getvalue()[before:]
+
+    def test_first_frame_is_full(self):
+        output = self.render(screen("ab", "cd"))
+        self.assertTrue(output.startswith(renderer.RESET_STYLE + renderer.CLEAR_SCREEN))
+        self.assertIn("ab", output)
+        self.assertIn("cd", output)
+
+    def test_unchanged_sends_nothing(self):
+        self.render(screen("ab", "cd"))
+        self.assertEqual(self.render(screen("ab", "cd")), "")
+
+    def test_only_changed_cells_are_sent(self):
+        self.render(screen("abcdefghij", "klmnopqrst"))
+        output = self.render(screen("abcdefghij", "klmnXpqrst"))
+        self.assertEqual(output, renderer.move_cursor(4, 1) + "X" + renderer.move_cursor(0, 2))
+
+    def test_close_runs_are_merged(self):
+        self.render(screen("abcdefghij"))
+        output = self.render(screen("XbcXefghij"))
+        self.assertEqual(output, renderer.move_cursor(0, 0) + "XbcX" + renderer.move_cursor(0, 1))
+
+    def test_distant_runs_are_separate(self):
+        self.render(screen("abcdefghij"))
+        output = self.render(screen("Xbcdefghi" + "X"))
+        self.assertEqual(output, renderer.move_cursor(0, 0) + "X" + renderer.move_cursor(9, 0) + "X" +
+                         renderer.move_cursor(0, 1))
+
+    def test_full_and_resize_redraw_everything(self):
+        self.render(screen("ab", "cd"))
+        self.assertIn(renderer.CLEAR_SCREEN, self.render(screen("ab", "cd"), full=True))
+        self.assertIn(renderer.CLEAR_SCREEN, self.render(screen("abc", "def")))
+
+    def test_previous_frame_is_copied(self):
+        frame = screen("ab")
+        self.render(frame)
+        frame.write(0, 0, "X")  # the screen is reused for the next frame, which mustn't change the last one
+        self.assertEqual(self.render(frame), renderer.move_cursor(0, 0) + "X" + renderer.move_cursor(0, 1))
+
+    def test_one_write_per_frame(self):
+        self.render(screen("ab", "cd"))
+        with mock.patch.object(self.backend, 'write', wraps=self.backend.write) as write:
+            self.render(screen("Xb", "cX"))
+            self.render(screen("Xb", "cX"))
+        self.assertEqual(write.call_count, 1)
+
+    def test_bytes_written(self):
+        first = self.render(screen("ab", "cd"))
+        self.assertEqual(self.renderer.last_frame_bytes, len(first.encode()))
+
+        second = self.render(screen("éb", "cd"))
+        self.assertEqual(self.renderer.last_frame_bytes, len(second.encode()))
+        self.assertEqual(self.renderer.bytes_written, len(first.encode()) + len(second.encode()))
+
+        self.render(screen("éb", "cd"))
+        self.assertEqual(self.renderer.last_frame_bytes, 0)
+
+    def test_synchronized_frames(self):
+        self.backend.synchronized = True
+        output = self.render(screen("ab"))
+        self.assertTrue(output.startswith(backend.SYNC_BEGIN + renderer.RESET_STYLE))
+        self.assertTrue(output.endswith(backend.SYNC_END))
+        self.assertEqual(self.render(screen("ab")), "")
+
+    def test_reset(self):
+        self.render(screen("ab"))
+        self.renderer.reset()
+        self.assertIn(renderer.CLEAR_SCREEN, self.render(screen("ab")))
+
+
+class DetectSynchronizedOutputTest(unittest.TestCase):
+    def test_detect(self):
+        self.assertTrue(backend.detect_synchronized_output({'WT_SESSION': 'abc'}))
+        self.assertTrue(backend.detect_synchronized_output({'TERM_PROGRAM': 'WezTerm'}))
+        self.assertTrue(backend.detect_synchronized_output({'TERM': 'xterm-kitty'}))
+        self.assertFalse(backend.detect_synchronized_output({'TERM': 'xterm-256color'}))
+        self.assertFalse(backend.detect_synchronized_output({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
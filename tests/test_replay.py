@@ -0,0 +1,114 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pywinterm.key import Key, replay
+
+
+class ReplayKeyReaderTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        # switch threads as often as possible, so that they get between waiting for a key and taking it
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        self.path = os.path.join(directory, 'keys.rec')
+        with open(self.path, 'wb') as f:
+            f.write(replay.HEADER.pack(replay.MAGIC, replay.VERSION))
+            for i in range(200):
+                f.write(replay.encode_event(0, Key(ord('a') + i % 26)))
+
+    def read_in_threads(self, reader, threads=8):
+        read = []
+        errors = []
+
+        def run():
+            try:
+                while True:
+                    k = reader.read(0)
+                    if k is None:
+                        return
+                    read.append(k)
+            except Exception as e:
+                errors.append(e)
+
+        running = [threading.Thread(target=run) for _ in range(threads)]
+        for thread in running:
+            thread.start()
+        return running, read, errors
+
+    def test_concurrent_reads(self):
+        for _ in range(20):
+            reader = replay.ReplayKeyReader(self.path, realtime=False)
+            running, read, errors = self.read_in_threads(reader)
+            for thread in running:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(len(read), 200)
+            self.assertTrue(reader.finished.is_set())
+
+    def test_key_taken_while_waiting_for_it(self):
+        with open(self.path, 'wb') as f:
+            f.write(replay.HEADER.pack(replay.MAGIC, replay.VERSION))
+            f.write(replay.encode_event(0.05, Key(ord('a'))))
+
+        reader = replay.ReplayKeyReader(self.path)
+        wait = reader._wait
+        taken = []
+
+        def wait_then_lose_the_key(timeout, interrupts):
+            ready = wait(timeout, interrupts)
+            if ready and not taken:
+                taken.append(None)
+                taken.append(reader.read(0))  # as if another thread got in between waiting and reading
+            return ready
+
+        reader._wait = wait_then_lose_the_key
+        self.assertIsNone(reader.read(0.2))
+        self.assertEqual(taken, [None, Key(ord('a'))])
+
+    def test_read_while_closing(self):
+        for _ in range(20):
+            reader = replay.ReplayKeyReader(self.path, realtime=False)
+            running, read, errors = self.read_in_threads(reader, 4)
+            reader.close()
+            for thread in running:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertIsNone(reader.read(0))
+
+
+    def test_interrupt_with_nothing_waiting_is_forgotten(self):
+        reader = replay.ReplayKeyReader(self.path, realtime=False)
+        reader.read_available()
+        reader.interrupt()
+
+        start = time.monotonic()
+        self.assertIsNone(reader.read(0.2))
+        self.assertFalse(reader.wait(0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+
+    def test_interrupt_wakes_a_waiting_read(self):
+        reader = replay.ReplayKeyReader(self.path, realtime=False)
+        reader.read_available()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(reader.read()))
+        thread.start()
+        time.sleep(0.05)
+
+        reader.interrupt()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
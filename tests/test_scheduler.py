@@ -0,0 +1,125 @@
+import time
+import asyncio
+import threading
+import unittest
+from pywinterm.display.scheduler import FrameScheduler
+
+
+class Root:
+    """
+    Stands in for a RootDisplay, remembering the renders asked of it
+    """
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.renders = []
+        self.rendered = threading.Event()
+
+    def render(self, full=False):
+        time.sleep(self.delay)
+        self.renders.append(full)
+        self.rendered.set()
+
+
+class FrameSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Root()
+        self.scheduler = FrameScheduler(self.root, max_fps=None)
+
+    def run_in_thread(self):
+        thread = threading.Thread(target=self.scheduler.run)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(self.scheduler.stop)
+        return thread
+
+    def test_invalidations_are_coalesced(self):
+        self.assertFalse(self.scheduler.render())
+
+        self.scheduler.invalidate()
+        self.scheduler.set()
+        self.scheduler.invalidate(True)
+        self.assertTrue(self.scheduler.is_set())
+
+        self.assertTrue(self.scheduler.render())
+        self.assertFalse(self.scheduler.render())
+        self.assertEqual(self.root.renders, [True])
+        self.assertFalse(self.scheduler.is_set())
+
+    def test_wait_for_the_frame_interval(self):
+        self.scheduler.max_fps = 20
+        self.scheduler.invalidate()
+        self.assertTrue(self.scheduler.wait(0.01))
+        self.scheduler.render()
+
+        self.scheduler.invalidate()
+        self.assertFalse(self.scheduler.wait(0.01))  # too soon after the last frame
+        self.assertTrue(self.scheduler.wait(0.2))
+
+    def test_nothing_to_wait_for(self):
+        start = time.monotonic()
+        self.assertFalse(self.scheduler.wait(0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_run_renders_when_invalidated(self):
+        thread = self.run_in_thread()
+        self.assertTrue(self.root.rendered.wait(2))  # the first frame straight away
+        self.root.rendered.clear()
+
+        self.scheduler.invalidate(True)
+        self.assertTrue(self.root.rendered.wait(2))
+        self.assertEqual(self.root.renders, [False, True])
+
+        self.scheduler.stop()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+
+    def test_stop_before_run(self):
+        self.scheduler.stop()
+        thread = self.run_in_thread()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.root.renders, [])
+
+        thread = self.run_in_thread()  # stop() only stopped the one run
+        self.assertTrue(self.root.rendered.wait(2))
+        self.assertTrue(thread.is_alive())
+
+    def test_overruns(self):
+        overruns = []
+        self.root.delay = 0.02
+        self.scheduler.max_fps = 100
+        self.scheduler.add_overrun_callback(lambda taken, interval: overruns.append(interval))
+
+        self.scheduler.invalidate()
+        self.scheduler.render()
+        self.assertEqual(self.scheduler.overrun_count, 1)
+        self.assertEqual(overruns, [0.01])
+
+    def test_run_async(self):
+        async def main():
+            task = asyncio.ensure_future(self.scheduler.run_async())
+            await asyncio.sleep(0.01)
+            first = list(self.root.renders)
+            self.root.rendered.clear()
+
+            # from another thread, as a key handler would
+            threading.Thread(target=self.scheduler.invalidate, args=(True,)).start()
+            await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(None, self.root.rendered.wait), 2)
+            await asyncio.sleep(0.01)
+
+            threading.Thread(target=self.scheduler.stop).start()
+            await asyncio.wait_for(task, 2)
+            return first
+
+        self.assertEqual(asyncio.run(main()), [False])
+        self.assertEqual(self.root.renders, [False, True])
+        self.assertIsNone(self.scheduler._loop)
+
+    def test_stop_before_run_async(self):
+        self.scheduler.stop()
+        asyncio.run(asyncio.wait_for(self.scheduler.run_async(), 2))
+        self.assertEqual(self.root.renders, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
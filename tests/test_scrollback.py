@@ -0,0 +1,84 @@
+import unittest
+from pywinterm.display import ScrollDisplay, buffer
+from pywinterm.display.scrollback import Scrollback
+
+
+class ScrollbackTest(unittest.TestCase):
+    def test_keeps_the_newest_lines(self):
+        lines = Scrollback(3)
+        self.assertEqual(lines.extend(["a", "b"]), [])
+        self.assertEqual(lines.extend(["c", "d", "e"]), ["a", "b"])
+
+        self.assertEqual(list(lines), ["c", "d", "e"])
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines.dropped, 2)
+
+    def test_indexing(self):
+        lines = Scrollback(3, ["a", "b", "c", "d"])
+        self.assertEqual(lines[0], "b")
+        self.assertEqual(lines[-1], "d")
+        self.assertRaises(IndexError, lambda: lines[3])
+        self.assertEqual(lines.lines(1, 10), ["c", "d"])
+
+    def test_clear(self):
+        lines = Scrollback(2, ["a", "b", "c"])
+        lines.clear()
+        self.assertEqual(list(lines), [])
+        lines.append("d")
+        self.assertEqual(list(lines), ["d"])
+
+    def test_capacity(self):
+        self.assertRaises(ValueError, Scrollback, 0)
+
+
+class ScrollDisplayTest(unittest.TestCase):
+    def setUp(self):
+        self.display = ScrollDisplay(width=10, height=3, capacity=100)
+
+    def showing(self):
+        rows = {run[1]: buffer.decode(run[2]) for run in self.display.rasterize()}
+        return [rows.get(y, "") for y in range(self.display.height)]
+
+    def test_follows_the_newest_lines(self):
+        for i in range(10):
+            self.display.print("line %d" % i)
+        self.assertEqual(self.showing(), ["line 7", "line 8", "line 9"])
+
+    def test_scrolling_stops_following(self):
+        self.display.print(*["line %d" % i for i in range(10)])
+        self.display.scroll_by(-3)
+        self.assertFalse(self.display.follow)
+        self.assertEqual(self.showing(), ["line 4", "line 5", "line 6"])
+
+        self.display.print("line 10")
+        self.assertEqual(self.showing(), ["line 4", "line 5", "line 6"])
+
+        self.display.scroll_to_end()
+        self.assertTrue(self.display.follow)
+        self.assertEqual(self.showing(), ["line 8", "line 9", "line 10"])
+
+    def test_viewport_stays_on_its_lines_as_old_ones_are_forgotten(self):
+        display = ScrollDisplay(width=10, height=2, capacity=5)
+        display.print(*["line %d" % i for i in range(5)])
+        display.scroll_to(1)
+        display.print("line 5", "line 6")
+        self.assertEqual(display.top, 0)
+        self.assertEqual(display.visible_lines(), ["line 2", "line 3"])
+
+    def test_scroll_is_clamped(self):
+        self.display.print(*["line %d" % i for i in range(5)])
+        self.display.scroll_to(-5)
+        self.assertEqual(self.display.top, 0)
+        self.display.scroll_by(100)
+        self.assertEqual(self.display.top, 2)
+        self.assertTrue(self.display.follow)
+
+    def test_memory_stays_flat(self):
+        for i in range(10000):
+            self.display.print("line %d" % i)
+        self.assertEqual(len(self.display.text), 100)
+        self.assertEqual(self.display.visible_lines(), ["line 9997", "line 9998", "line 9999"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import socket
+import threading
+import time
+import unittest
+from pywinterm.display import RootDisplay, widget
+from pywinterm.display.backend import HeadlessBackend
+from pywinterm.display.server import SocketKeyReader
+from pywinterm.key import Key
+
+
+class LateClientTest(unittest.TestCase):
+    def serve(self, pipelined):
+        root = RootDisplay("test", backend=HeadlessBackend(40, 5), width=40, height=5, pipelined=pipelined)
+        root.print(widget.Label("hello there"))
+
+        display_server = root.serve(('127.0.0.1', 0), route_input=False)
+        thread = threading.Thread(target=root.run, daemon=True)
+        thread.start()
+
+        def cleanup():
+            display_server.stop()
+            root.stop()
+            thread.join(1)
+        self.addCleanup(cleanup)
+
+        time.sleep(0.2)  # the screen has been rendered and nothing more is changing
+        return display_server
+
+    def receive(self, display_server, text, timeout=2):
+        sock = socket.create_connection(display_server.address)
+        self.addCleanup(sock.close)
+        sock.settimeout(0.1)
+
+        data = b''
+        deadline = time.monotonic() + timeout
+        while text.encode() not in data and time.monotonic() < deadline:
+            try:
+                data += sock.recv(4096)
+            except socket.timeout:
+                pass
+        return data
+
+    def test_late_client_gets_keyframe(self):
+        self.assertIn(b'hello there', self.receive(self.serve(False), 'hello there'))
+
+    def test_late_client_gets_keyframe_pipelined(self):
+        self.assertIn(b'hello there', self.receive(self.serve(True), 'hello there'))
+
+
+
+class SocketKeyReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.reader = SocketKeyReader()
+
+    def test_read(self):
+        self.reader.push([Key(97), Key(98)])
+        self.assertEqual(self.reader.read(0), Key(97))
+        self.assertEqual(self.reader.read_available(), [Key(98)])
+        self.assertIsNone(self.reader.read(0))
+
+    def test_interrupt_wakes_a_waiting_read(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.reader.read()))
+        thread.start()
+        time.sleep(0.05)
+
+        self.reader.interrupt()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [None])
+
+    def test_interrupt_with_nothing_waiting_is_forgotten(self):
+        self.reader.interrupt()
+
+        start = time.monotonic()
+        self.assertIsNone(self.reader.read(0.2))
+        self.assertFalse(self.reader.wait(0.2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+
+
+if __name__ == '__main__':
+    unittest.main()
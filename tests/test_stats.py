@@ -0,0 +1,42 @@
+import unittest
+from pywinterm.display import RootDisplay
+from pywinterm.display.backend import HeadlessBackend
+
+
+class FrameStatsTest(unittest.TestCase):
+    def render(self, pipelined):
+        root = RootDisplay("test", backend=HeadlessBackend(20, 4), width=20, height=4, pipelined=pipelined)
+        root.stats.enable()
+        root.print("hello")
+
+        def render(full=False):
+            root.render(full)
+            if pipelined:
+                root.pipeline.flush()
+            return root.stats.last
+
+        return root, render
+
+    def check(self, pipelined):
+        root, render = self.render(pipelined)
+
+        self.assertTrue(render().full)  # nothing has been drawn yet, so everything is
+
+        root.print("more")
+        self.assertFalse(render().full)
+
+        self.assertTrue(render(True).full)
+
+        root.resize_window(30, 4)
+        root.print("resized")
+        self.assertTrue(render().full)
+
+    def test_full_is_what_was_drawn(self):
+        self.check(False)
+
+    def test_full_is_what_was_drawn_pipelined(self):
+        self.check(True)
+
+
+if __name__ == '__main__':
+    unittest.main()
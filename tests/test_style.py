@@ -0,0 +1,94 @@
+import sys
+import threading
+import unittest
+from pywinterm.display import style
+from pywinterm.display.style import Style, StyleTable, foreground, background, _transition
+
+
+class StyleTableTest(unittest.TestCase):
+    def test_interned(self):
+        red = Style(fore=foreground.RED)
+        self.assertIs(Style(fore=foreground.RED), red)
+        self.assertIs(style.TABLE[red.id], red)
+        self.assertEqual(style.TABLE.id_of(None), 0)
+        self.assertEqual(Style().id, 0)
+
+    def test_interned_across_threads(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        table = StyleTable()
+        codes = [(str(fore), str(back), None) for fore in range(20) for back in range(20)]
+        threads = 8
+        barrier = threading.Barrier(threads)
+        results = [None] * threads
+
+        def run(n):
+            barrier.wait()
+            results[n] = [table.intern(*c) for c in codes]
+
+        running = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+        for thread in running:
+            thread.start()
+        for thread in running:
+            thread.join()
+
+        for styles in results[1:]:
+            for a, b in zip(results[0], styles):
+                self.assertIs(a, b)
+        self.assertEqual(len(table), len(codes))
+        self.assertEqual(sorted(s.id for s in results[0]), list(range(len(codes))))
+        for s in results[0]:
+            self.assertIs(table[s.id], s)
+
+
+class TransitionTest(unittest.TestCase):
+    def setUp(self):
+        enabled = style.COLOUR_ENABLED
+        style.set_colour_enabled(True)
+        self.addCleanup(style.set_colour_enabled, enabled)
+
+    def test_same_style(self):
+        red = Style(fore=foreground.RED)
+        self.assertEqual(_transition(red, red), '')
+
+    def test_to_default(self):
+        self.assertEqual(_transition(Style(fore=foreground.RED, style=style.BOLD), Style()), style.END)
+
+    def test_only_what_changed(self):
+        self.assertEqual(_transition(Style(fore=foreground.RED), Style(fore=foreground.RED, back=background.BLUE)),
+                         "\033[44m")
+
+    def test_style_off(self):
+        self.assertEqual(_transition(Style(fore=foreground.RED, style=style.BOLD), Style(fore=foreground.RED)),
+                         "\033[22m")
+        self.assertEqual(_transition(Style(back=background.RED, style=style.UNDERLINE),
+                                     Style(back=background.RED, style=style.INVERSE)), "\033[24;7m")
+
+    def test_default_colours(self):
+        previous = Style(fore=foreground.RED, back=background.BLUE, style=style.BOLD)
+        self.assertEqual(_transition(previous, Style(back=background.BLUE, style=style.BOLD)), "\033[39m")
+        self.assertEqual(_transition(previous, Style(fore=foreground.RED, style=style.BOLD)), "\033[49m")
+
+    def test_reset_when_a_style_cant_be_undone(self):
+        blink = "5"  # not in STYLE_OFF
+        self.assertEqual(_transition(Style(fore=foreground.RED, style=blink), Style(fore=foreground.RED)),
+                         "\033[0;31m")
+
+    def test_reset_when_shorter(self):
+        previous = Style(fore=foreground.RED, back=background.BLUE, style=style.BOLD)
+        self.assertEqual(_transition(previous, Style(style=style.UNDERLINE)), "\033[0;4m")
+
+    def test_without_colour(self):
+        style.set_colour_enabled(False)
+        self.assertEqual(_transition(Style(), Style(fore=foreground.RED)), '')
+
+    def test_table_caches_transitions(self):
+        red, blue = Style(fore=foreground.RED), Style(fore=foreground.BLUE)
+        self.assertEqual(style.TABLE.transition(red.id, blue.id), "\033[34m")
+        self.assertEqual(style.TABLE.transition(blue.id, 0), style.END)
+
+
+if __name__ == '__main__':
+    unittest.main()
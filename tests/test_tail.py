@@ -0,0 +1,111 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+from pywinterm.display import TailDisplay
+from pywinterm.display.lineindex import LineIndex
+
+
+class LineIndexTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'service.log')
+        self.write('w', 'one\ntwo\n')
+
+        self.index = LineIndex(self.path)
+        self.addCleanup(self.index.close)
+
+    def write(self, mode, text, path=None):
+        with open(path or self.path, mode) as f:
+            f.write(text)
+
+    def test_appended(self):
+        self.write('a', 'three\nfour')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(list(self.index), ['one', 'two', 'three', 'four'])
+        self.assertFalse(self.index.refresh())
+
+    def test_truncated(self):
+        self.write('w', 'new\n')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(list(self.index), ['new'])
+
+    def test_rotated(self):
+        os.rename(self.path, self.path + '.1')
+        self.write('a', 'three\n', self.path + '.1')  # written before the writer moved on to the new file
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(list(self.index), ['one', 'two', 'three'])  # nothing to move on to yet
+
+        self.write('w', 'first\nsecond\nthird\n')  # bigger than the old file was, as well
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(list(self.index), ['first', 'second', 'third'])
+
+    def test_rotated_to_an_empty_file(self):
+        os.rename(self.path, self.path + '.1')
+        self.write('w', '')
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(list(self.index), [])
+
+
+class TailDisplayTest(unittest.TestCase):
+    def test_iterator_read_while_rendering(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        done = threading.Event()
+
+        def lines():
+            for i in range(20000):
+                yield str(i)
+            done.set()
+
+        tail = TailDisplay(lines(), width=10, height=5, capacity=7)
+        self.addCleanup(tail.close)
+
+        while not done.is_set():
+            for _ in range(100):
+                shown = [int(line) for line in tail.text.lines(0, 7)]
+                self.assertEqual(shown, list(range(shown[0], shown[0] + len(shown))) if shown else [])
+
+        tail._watcher.join(5)
+        self.assertEqual(tail.visible_lines(), [str(i) for i in range(19995, 20000)])
+
+    @unittest.skipIf(os.name != 'posix', "waits on a pipe")
+    def test_pipe(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, write_fd)
+        source = open(read_fd, encoding='utf-8')
+        self.addCleanup(source.close)
+
+        tail = TailDisplay(source, width=10, height=5)
+        self.addCleanup(tail.close)
+
+        os.write(write_fd, "one\r\ntwo\nthr".encode())
+        os.write(write_fd, "ee \u4e2d".encode()[:-1])  # in the middle of a character
+        os.write(write_fd, "ee \u4e2d\n".encode()[-2:])
+        deadline = time.monotonic() + 5
+        while len(tail.text) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(list(tail.text.lines(0, 3)), ["one", "two", "three \u4e2d"])
+
+    @unittest.skipIf(os.name != 'posix', "waits on a pipe")
+    def test_close_while_waiting_for_a_line(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, write_fd)
+        source = open(read_fd, 'rb')
+        self.addCleanup(source.close)
+
+        tail = TailDisplay(source, width=10, height=5)
+        time.sleep(0.05)
+        tail.close()
+        self.assertFalse(tail._watcher.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
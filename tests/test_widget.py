@@ -0,0 +1,93 @@
+import unittest
+from unittest import mock
+import threading
+from pywinterm import key
+from pywinterm.display import widget, style, buffer
+from pywinterm.key.key import BACKSPACE, ESCAPE, RETURN
+
+
+class CellsTest(unittest.TestCase):
+    def test_label(self):
+        red = style.Style(fore=style.foreground.RED)
+        chars, styles = widget.Label("hi", red).cells()
+        self.assertEqual(buffer.decode(chars), "hi")
+        self.assertEqual(list(styles), [red.id, red.id])
+
+    def test_unchanged_widget_is_cached(self):
+        label = widget.Label("hi")
+        cells = label.cells()
+        self.assertIs(label.cells(), cells)
+
+        label.text = "ho"
+        self.assertIsNot(label.cells(), cells)
+        self.assertEqual(buffer.decode(label.cells()[0]), "ho")
+
+    def test_row_reuses_its_widgets_cells(self):
+        first = widget.Label("ab")
+        second = widget.Label("cd", style.Style(fore=style.foreground.BLUE))
+        row = widget.Row((first, "-", second))
+
+        chars, styles = row.cells()
+        self.assertEqual(buffer.decode(chars), "ab-cd")
+        self.assertEqual(len(row), 5)
+
+        with mock.patch.object(widget.Label, 'segments') as segments:
+            second.text = "xyz"  # changes the row too
+            segments.return_value = [("xyz", second.style)]
+            self.assertEqual(buffer.decode(row.cells()[0]), "ab-xyz")
+            segments.assert_called_once_with()  # only the widget which changed
+
+    def test_text_input_takes_one_snapshot_per_version(self):
+        text_input = widget.TextInput(6)
+        text_input.text = "abc"
+
+        with mock.patch.object(widget.TextInput, '_unstyled_text', new_callable=mock.PropertyMock) as unstyled:
+            unstyled.return_value = "abc___"
+            self.assertEqual(''.join(text_input), str(text_input))
+            self.assertEqual([text_input[i] for i in range(1, 5)], list("bc__"))
+            text_input.cells()
+            self.assertEqual(unstyled.call_count, 1)
+
+            text_input.text = "abcd"
+            unstyled.return_value = "abcd__"
+            self.assertEqual(buffer.decode(text_input.cells()[0]), "abcd__")
+            self.assertEqual(unstyled.call_count, 2)
+
+
+
+class TextInputKeysTest(unittest.TestCase):
+    def setUp(self):
+        self.text_input = widget.TextInput(10)
+        self.unfocused = []
+        self.text_input.unfocus_handler = self.unfocused.append
+
+    def type(self, *keys):
+        for k in keys:
+            self.text_input.keypress_handler(key.as_key(k), threading.Event())
+
+    def test_keys(self):
+        self.type('a', 'b', BACKSPACE, 'c', '\x01')  # ctrl+a isn't a valid character
+        self.assertEqual(self.text_input.text, "ac")
+        self.type(RETURN)
+        self.assertEqual(self.unfocused, [RETURN])
+
+    def test_changing_valid_chars(self):
+        self.type('a')
+        self.text_input.valid_chars = "xyz"
+        self.type('a', 'x')
+        self.text_input.keypress_handler(key.Paste("axbyc"), threading.Event())
+        self.assertEqual(self.text_input.text, "axxy")
+
+    def test_changing_unfocus_and_backspace_keys(self):
+        self.text_input.unfocus_keys = (ESCAPE,)
+        self.text_input.backspace_key = '\x7f'
+        self.type('a', 'b', '\x7f', BACKSPACE, RETURN)
+        self.assertEqual(self.text_input.text, "a")
+        self.assertEqual(self.unfocused, [])
+
+        self.type(ESCAPE)
+        self.assertEqual(self.unfocused, [ESCAPE])
+
+
+if __name__ == '__main__':
+    unittest.main()